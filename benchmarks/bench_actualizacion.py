@@ -0,0 +1,85 @@
+"""
+Benchmark de la actualización incremental del grafo frente a reconstruirlo.
+
+Aplica a una red sintética unos pocos cambios (estaciones agregadas, eliminadas,
+movidas o de otra troncal) y compara `actualizar_grafo_estaciones` con construir el
+grafo de nuevo, en ambos modelos. Verifica que los dos grafos tengan las mismas
+aristas y pesos.
+
+Uso:
+    python -m benchmarks.bench_actualizacion [--sinteticas N] [--cambios N]
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.estaciones import StationStore
+from src.logic.routing import actualizar_grafo_estaciones, construir_grafo_estaciones, construir_grafo_lineas
+
+
+def aplicar_cambios(estaciones, cantidad, semilla=17):
+    """Copia de las estaciones con `cantidad` cambios al azar."""
+    aleatorio = random.Random(semilla)
+    filas = [dict(est) for est in estaciones]
+    troncales = sorted(set(estaciones.troncales))
+    for k in range(cantidad):
+        tipo = k % 4
+        if tipo == 0:
+            filas.pop(aleatorio.randrange(len(filas)))
+        elif tipo == 1:
+            fila = aleatorio.choice(filas)
+            fila["latitud"] += aleatorio.uniform(-0.01, 0.01)
+            fila["lon"] += aleatorio.uniform(-0.01, 0.01)
+        elif tipo == 2:
+            aleatorio.choice(filas)["troncal"] = aleatorio.choice(troncales)
+        else:
+            base = aleatorio.choice(filas)
+            filas.append({"nombre": f"Estación nueva {k}", "latitud": base["latitud"] + aleatorio.uniform(-0.01, 0.01),
+                          "lon": base["lon"] + aleatorio.uniform(-0.01, 0.01), "troncal": aleatorio.choice(troncales)})
+    return StationStore(filas)
+
+
+def aristas(grafo):
+    return sorted((min(u, v), max(u, v), peso) for u, v, peso in grafo.edges(data="weight"))
+
+
+def comparar(construir, anteriores, nuevas):
+    grafo = construir(anteriores)
+    inicio = time.perf_counter()
+    cambios = actualizar_grafo_estaciones(grafo, anteriores, nuevas)
+    incremental_s = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    reconstruido = construir(nuevas)
+    completo_s = time.perf_counter() - inicio
+    return {
+        "agregadas": len(cambios.agregadas),
+        "eliminadas": len(cambios.eliminadas),
+        "modificadas": len(cambios.modificadas),
+        "aristas": grafo.number_of_edges(),
+        "iguales": aristas(grafo) == aristas(reconstruido),
+        "incremental_s": incremental_s,
+        "reconstruccion_s": completo_s,
+        "aceleracion": completo_s / incremental_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=20000)
+    parser.add_argument("--cambios", type=int, default=8)
+    args = parser.parse_args()
+
+    anteriores = estaciones_sinteticas(args.sinteticas)
+    nuevas = aplicar_cambios(anteriores, args.cambios)
+    resumen = {
+        "estaciones": len(anteriores),
+        "distancia": comparar(construir_grafo_estaciones, anteriores, nuevas),
+        "lineas": comparar(construir_grafo_lineas, anteriores, nuevas),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark del agrupamiento KMeans con selección automática de k y resultados guardados.
+
+Mide, sobre las estaciones de `resources/estaciones_transmilenio.snap` y una red
+sintética grande (donde se usa MiniBatchKMeans), el primer agrupamiento (evaluando
+todos los candidatos de k), la repetición en el mismo proceso y la lectura del
+resultado guardado en disco desde un proceso nuevo.
+
+Uso:
+    python -m benchmarks.bench_agrupamiento [--sinteticas N] [--criterio {inercia,silhouette}] [--hilos N]
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic import modelo_unsupervisado
+from src.logic.estaciones import StationStore
+from src.logic.modelo_unsupervisado import CRITERIOS_K, agrupar_estaciones
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def medir(estaciones, criterio, hilos):
+    X = np.column_stack([estaciones.latitudes, estaciones.longitudes])
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        resultado = agrupar_estaciones(X, criterio=criterio, hilos=hilos, directorio_cache=directorio)
+        primero_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        agrupar_estaciones(X, criterio=criterio, hilos=hilos, directorio_cache=directorio)
+        memoria_s = time.perf_counter() - inicio
+
+        modelo_unsupervisado._resultados.clear()  # Como en un proceso nuevo
+        inicio = time.perf_counter()
+        guardado = agrupar_estaciones(X, criterio=criterio, hilos=hilos, directorio_cache=directorio)
+        disco_s = time.perf_counter() - inicio
+    return {
+        "estaciones": len(X),
+        "k": resultado.k,
+        "puntajes": resultado.puntajes,
+        "iguales": bool(np.array_equal(resultado.etiquetas, guardado.etiquetas)),
+        "primer_agrupamiento_s": primero_s,
+        "repeticion_en_memoria_s": memoria_s,
+        "lectura_de_disco_s": disco_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=50000)
+    parser.add_argument("--criterio", choices=CRITERIOS_K, default="inercia")
+    parser.add_argument("--hilos", type=int)
+    args = parser.parse_args()
+
+    resumen = {"transmilenio": medir(StationStore.cargar(RUTA_SNAPSHOT), args.criterio, args.hilos)}
+    if args.sinteticas:
+        resumen["sinteticas"] = medir(estaciones_sinteticas(args.sinteticas), args.criterio, args.hilos)
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark del tiempo de importación de `src.gui.app`.
+
+Cada repetición importa la aplicación en un proceso nuevo y mide cuánto tarda, si
+se hizo alguna llamada de red y si se cargó o entrenó el modelo de troncales.
+La importación no debe depender de la red ni del ajuste de scikit-learn.
+
+Uso:
+    python -m benchmarks.bench_arranque [--repeticiones N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en un proceso limpio: cuenta las llamadas de red y los entrenamientos
+# que ocurran durante la importación de la aplicación.
+_SONDA = """
+import json, sys, time
+import requests
+llamadas_red = []
+_original = requests.Session.request
+def _contar(self, method, url, *args, **kwargs):
+    llamadas_red.append(url)
+    return _original(self, method, url, *args, **kwargs)
+requests.Session.request = _contar
+
+inicio = time.perf_counter()
+import src.gui.app
+segundos = time.perf_counter() - inicio
+
+import src.logic.modelo_ml as modelo_ml
+print(json.dumps({
+    "segundos": segundos,
+    "llamadas_red": len(llamadas_red),
+    "modelo_cargado": modelo_ml._modelo is not None,
+    "sklearn_ensemble_importado": "sklearn.ensemble" in sys.modules,
+}))
+"""
+
+
+def medir_importacion():
+    """Importa `src.gui.app` en un proceso nuevo y devuelve las métricas de la sonda."""
+    entorno = dict(os.environ)
+    # Una URL inalcanzable: si la importación intentara descargar datos, se notaría.
+    entorno["API_TRANSMILENIO"] = "http://127.0.0.1:9/sin-red"
+    salida = subprocess.run([sys.executable, "-c", _SONDA], cwd=RAIZ_PROYECTO, env=entorno,
+                            capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    mediciones = [medir_importacion() for _ in range(args.repeticiones)]
+    tiempos = [m["segundos"] for m in mediciones]
+    resumen = {
+        "repeticiones": args.repeticiones,
+        "mediana_s": statistics.median(tiempos),
+        "min_s": min(tiempos),
+        "max_s": max(tiempos),
+        "llamadas_red": max(m["llamadas_red"] for m in mediciones),
+        "modelo_cargado": any(m["modelo_cargado"] for m in mediciones),
+        "sklearn_ensemble_importado": any(m["sklearn_ensemble_importado"] for m in mediciones),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
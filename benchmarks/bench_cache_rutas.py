@@ -0,0 +1,77 @@
+"""
+Benchmark de la caché de resultados de rutas con tráfico de pares repetidos.
+
+Genera consultas en las que unos pocos pares origen/destino concentran la mayoría del
+tráfico (distribución de Zipf sobre un conjunto de pares) y compara las consultas por
+segundo del servicio con y sin `CACHE_RUTAS`, verificando que las respuestas coincidan.
+
+Uso:
+    python -m benchmarks.bench_cache_rutas [--sinteticas N] [--consultas N] [--pares N]
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.routing import CACHE_RUTAS, buscar_mejor_ruta_estaciones, buscar_ruta_alternativa
+from src.logic.servicio import ServicioRutas
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def generar_consultas(nombres, cantidad, distintos, exponente=1.1, semilla=5):
+    aleatorio = random.Random(semilla)
+    pares = [(aleatorio.choice(nombres), aleatorio.choice(nombres)) for _ in range(distintos)]
+    pesos = [1 / (rango + 1) ** exponente for rango in range(distintos)]
+    return aleatorio.choices(pares, weights=pesos, k=cantidad)
+
+
+def consultar(servicio, origen, destino, usar_cache):
+    """Lo mismo que `ServicioRutas.consultar`, con la caché activada o no."""
+    ruta, distancia = buscar_mejor_ruta_estaciones(servicio.grafo, origen, destino, usar_cache=usar_cache)
+    if ruta:
+        return ruta, distancia
+    return buscar_ruta_alternativa(servicio.grafo, servicio.estaciones, origen, destino, usar_cache=usar_cache)
+
+
+def medir(servicio, consultas, usar_cache):
+    CACHE_RUTAS.limpiar()
+    inicio = time.perf_counter()
+    respuestas = [consultar(servicio, origen, destino, usar_cache) for origen, destino in consultas]
+    segundos = time.perf_counter() - inicio
+    return respuestas, {"segundos": segundos, "consultas_por_segundo": len(consultas) / segundos}
+
+
+def comparar(servicio, cantidad, distintos):
+    consultas = generar_consultas(servicio.nombres_estaciones(), cantidad, distintos)
+    sin_cache, medida_sin = medir(servicio, consultas, usar_cache=False)
+    con_cache, medida_con = medir(servicio, consultas, usar_cache=True)
+    return {
+        "estaciones": servicio.grafo.number_of_nodes(),
+        "consultas": len(consultas),
+        "pares_distintos": len(set(consultas)),
+        "diferencias": sum(a != b for a, b in zip(sin_cache, con_cache)),
+        "sin_cache": medida_sin,
+        "con_cache": medida_con,
+        "aceleracion": medida_sin["segundos"] / medida_con["segundos"],
+        "cache": CACHE_RUTAS.estadisticas(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--pares", type=int, default=500, help="Pares distintos en el tráfico")
+    args = parser.parse_args()
+
+    resumen = {"transmilenio": comparar(ServicioRutas.desde_snapshot(RUTA_SNAPSHOT), args.consultas, args.pares)}
+    if args.sinteticas:
+        servicio = ServicioRutas(estaciones_sinteticas(args.sinteticas))
+        resumen["sinteticas"] = comparar(servicio, args.consultas, args.pares)
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
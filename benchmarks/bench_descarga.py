@@ -0,0 +1,81 @@
+"""
+Benchmark de la descarga paginada de estaciones contra un servidor ArcGIS local.
+
+Compara peticiones sin sesión (una conexión nueva por página, como antes), la descarga
+secuencial con la sesión compartida y la descarga paralela con distintos límites de
+concurrencia, y verifica que todas devuelvan las mismas estaciones en el mismo orden.
+
+Uso:
+    python -m benchmarks.bench_descarga [--estaciones N] [--tam-pagina N] [--latencia-ms N]
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from benchmarks.stub_arcgis import ServidorStub, generar_features
+from src.logic.data import (
+    _estaciones_de_bloques,
+    crear_sesion,
+    descargar_estaciones_paralelo,
+    iterar_estaciones_paginadas,
+    url_pagina
+)
+
+
+def descargar_sin_sesion(url, tam_pagina):
+    """Implementación anterior: un `requests.get` sin sesión por cada página."""
+    estaciones, desplazamiento = [], 0
+    while True:
+        respuesta = requests.get(url_pagina(url, desplazamiento, tam_pagina))
+        respuesta.raise_for_status()
+        pagina = list(_estaciones_de_bloques([respuesta.content]))
+        estaciones.extend(pagina)
+        if len(pagina) < tam_pagina:
+            return estaciones
+        desplazamiento += tam_pagina
+
+
+def medir(stub, funcion):
+    stub.peticiones = 0
+    inicio = time.perf_counter()
+    estaciones = funcion()
+    segundos = time.perf_counter() - inicio
+    return estaciones, {"segundos": segundos, "peticiones": stub.peticiones,
+                        "estaciones_por_segundo": len(estaciones) / segundos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--estaciones", type=int, default=20000)
+    parser.add_argument("--tam-pagina", type=int, default=1000)
+    parser.add_argument("--latencia-ms", type=float, default=50.0)
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    features = generar_features(args.estaciones)
+    resumen = {"estaciones": args.estaciones, "tam_pagina": args.tam_pagina, "latencia_ms": args.latencia_ms}
+    with ServidorStub(features, latencia_s=args.latencia_ms / 1000) as stub:
+        referencia, resumen["sin_sesion"] = medir(stub, lambda: descargar_sin_sesion(stub.url, args.tam_pagina))
+        estaciones, resumen["secuencial"] = medir(
+            stub, lambda: list(iterar_estaciones_paginadas(stub.url, args.tam_pagina)))
+        resumen["secuencial"]["igual"] = estaciones == referencia
+        for concurrencia in args.concurrencias:
+            sesion = crear_sesion(max_conexiones=concurrencia)
+            estaciones, medicion = medir(stub, lambda: descargar_estaciones_paralelo(
+                stub.url, args.tam_pagina, max_concurrencia=concurrencia, sesion=sesion))
+            medicion["igual"] = estaciones == referencia
+            resumen[f"paralelo_{concurrencia}"] = medicion
+
+    # Fallos transitorios: cada página responde 503 una vez antes de responder bien
+    with ServidorStub(features, fallos_por_pagina=1) as stub:
+        estaciones, medicion = medir(stub, lambda: descargar_estaciones_paralelo(
+            stub.url, args.tam_pagina, sesion=crear_sesion(factor_espera=0.01)))
+        medicion["igual"] = estaciones == referencia
+        resumen["con_reintentos"] = medicion
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
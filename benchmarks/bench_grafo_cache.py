@@ -0,0 +1,94 @@
+"""
+Benchmark del arranque en frío y en caliente del grafo de estaciones.
+
+Cada medición corre en un proceso nuevo: carga las estaciones desde un snapshot y
+obtiene el grafo con `obtener_grafo_estaciones`. En frío el directorio del grafo
+está vacío (se construye y se guarda); en caliente se carga el grafo guardado. Se
+verifica además que ambos grafos sean idénticos.
+
+Uso:
+    python -m benchmarks.bench_grafo_cache [--sinteticas N] [--repeticiones N]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from src.logic.estaciones import StationStore
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+_SONDA = """
+import hashlib, json, sys, time
+inicio = time.perf_counter()
+from src.logic.estaciones import StationStore
+from src.logic.routing import obtener_grafo_estaciones
+estaciones = StationStore.cargar(sys.argv[1])
+grafo = obtener_grafo_estaciones(estaciones, umbral_km=float(sys.argv[3]), directorio_cache=sys.argv[2] or None)
+segundos = time.perf_counter() - inicio
+huella = hashlib.sha256(repr([(u, list(grafo.adj[u].items())) for u in grafo]).encode()).hexdigest()
+print(json.dumps({"segundos": segundos, "aristas": grafo.number_of_edges(), "huella": huella}))
+"""
+
+
+def estaciones_sinteticas(cantidad, semilla=3):
+    """Estaciones al azar en un área como la de Bogotá, con la densidad de una red grande."""
+    aleatorio = random.Random(semilla)
+    return StationStore(
+        {"nombre": f"Estación {i:06d}", "latitud": 4.45 + aleatorio.random() * 0.35,
+         "lon": -74.20 + aleatorio.random() * 0.15, "troncal": f"Troncal {i % 12}"}
+        for i in range(cantidad)
+    )
+
+
+def medir(ruta_snapshot, directorio, umbral_km):
+    salida = subprocess.run([sys.executable, "-c", _SONDA, ruta_snapshot, directorio or "", str(umbral_km)],
+                            cwd=RAIZ_PROYECTO, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def comparar(ruta_snapshot, umbral_km, repeticiones):
+    directorio = tempfile.mkdtemp(prefix="bench_grafo_")
+    try:
+        sin_cache, frio, caliente = [], [], []
+        for _ in range(repeticiones):
+            sin_cache.append(medir(ruta_snapshot, None, umbral_km))
+            shutil.rmtree(directorio, ignore_errors=True)
+            frio.append(medir(ruta_snapshot, directorio, umbral_km))
+            caliente.append(medir(ruta_snapshot, directorio, umbral_km))
+        huellas = {m["huella"] for m in sin_cache + frio + caliente}
+        return {
+            "aristas": frio[0]["aristas"],
+            "sin_cache_s": statistics.median(m["segundos"] for m in sin_cache),
+            "frio_s": statistics.median(m["segundos"] for m in frio),
+            "caliente_s": statistics.median(m["segundos"] for m in caliente),
+            "grafos_identicos": len(huellas) == 1,
+        }
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=10000)
+    parser.add_argument("--umbral-km", type=float, default=1.0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    resumen = {"umbral_km": args.umbral_km,
+               "transmilenio": comparar(RUTA_SNAPSHOT, args.umbral_km, args.repeticiones)}
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta = os.path.join(temporal, "sinteticas.snap")
+        estaciones_sinteticas(args.sinteticas).guardar(ruta)
+        resumen[f"sinteticas_{args.sinteticas}"] = comparar(ruta, args.umbral_km, args.repeticiones)
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark de la matriz origen-destino por lotes frente a consultas par a par.
+
+La referencia es llamar a `buscar_mejor_ruta_estaciones` para cada par (una búsqueda
+por par, en un hilo); sobre la red sintética se mide una muestra de pares y se estima
+el tiempo de la matriz completa. Se compara con `resolver_matriz_od` (una búsqueda por
+origen) en un proceso y con varios, y se verifica que las distancias coincidan.
+
+Uso:
+    python -m benchmarks.bench_matriz_od [--sinteticas N] [--procesos N]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.estaciones import StationStore
+from src.logic.matriz_od import resolver_matriz_od
+from src.logic.routing import buscar_mejor_ruta_estaciones, construir_grafo_estaciones
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def medir_par_a_par(grafo, pares):
+    inicio = time.perf_counter()
+    distancias = [buscar_mejor_ruta_estaciones(grafo, origen, destino, usar_cache=False)[1] for origen, destino in pares]
+    return time.perf_counter() - inicio, distancias
+
+
+def comparar(estaciones, procesos, pares_max, semilla=5):
+    grafo = construir_grafo_estaciones(estaciones, umbral_km=1.0)
+    nombres = list(grafo.nodes)
+    total_pares = len(nombres) ** 2
+    if total_pares <= pares_max:
+        pares = [(o, d) for o in nombres for d in nombres]
+    else:
+        aleatorio = random.Random(semilla)
+        pares = [(aleatorio.choice(nombres), aleatorio.choice(nombres)) for _ in range(pares_max)]
+    segundos, referencia = medir_par_a_par(grafo, pares)
+    resumen = {
+        "estaciones": len(nombres),
+        "aristas": grafo.number_of_edges(),
+        "par_a_par_s": segundos * total_pares / len(pares),
+        "par_a_par_estimado": len(pares) < total_pares,
+    }
+    for cantidad in sorted({1, procesos}):
+        with tempfile.TemporaryDirectory() as directorio:
+            inicio = time.perf_counter()
+            matriz = resolver_matriz_od(grafo, directorio, con_rutas=True, procesos=cantidad)
+            segundos = time.perf_counter() - inicio
+            iguales = all(
+                (esperada is None and matriz.distancia(o, d) is None)
+                or (esperada is not None and math.isclose(matriz.distancia(o, d), esperada, rel_tol=1e-12))
+                for (o, d), esperada in zip(pares, referencia)
+            )
+            resumen[f"lote_{cantidad}_procesos"] = {
+                "segundos": segundos,
+                "origenes_por_segundo": len(nombres) / segundos,
+                "distancias_iguales": iguales,
+                "tam_salida_bytes": sum(os.path.getsize(os.path.join(directorio, f)) for f in os.listdir(directorio)),
+            }
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=2000)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pares", type=int, default=25000)
+    args = parser.parse_args()
+
+    resumen = {
+        "procesos_disponibles": os.cpu_count(),
+        "transmilenio": comparar(StationStore.cargar(RUTA_SNAPSHOT), args.procesos, args.pares),
+        f"sinteticas_{args.sinteticas}": comparar(estaciones_sinteticas(args.sinteticas), args.procesos,
+                                                  max(1, args.pares // 50)),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
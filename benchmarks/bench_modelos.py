@@ -0,0 +1,90 @@
+"""
+Comparación de los modelos de grafo: por distancia (`umbral_km`) y por líneas con transbordos.
+
+Para cada modelo informa el tiempo de construcción, el número de aristas, las
+componentes conexas y las consultas por segundo de cada método de búsqueda, además
+del costo de las rutas del modelo de líneas (distancia recorrida y transbordos).
+
+Se mide sobre la red de `resources/estaciones_transmilenio.snap` (todos los pares)
+y sobre una red sintética más grande (pares al azar).
+
+Uso:
+    python -m benchmarks.bench_modelos [--sinteticas N] [--pares N] [--umbral-km 1.0]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import networkx as nx
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.estaciones import StationStore
+from src.logic.routing import (
+    METODOS_BUSQUEDA,
+    buscar_mejor_ruta_estaciones,
+    construir_grafo_estaciones,
+    construir_grafo_lineas,
+    contar_transbordos
+)
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def generar_pares(nombres, pares_max, semilla=13):
+    if len(nombres) ** 2 <= pares_max:
+        return [(o, d) for o in nombres for d in nombres if o != d]
+    aleatorio = random.Random(semilla)
+    return [tuple(aleatorio.sample(nombres, 2)) for _ in range(pares_max)]
+
+
+def medir_modelo(construir, estaciones, pares):
+    inicio = time.perf_counter()
+    grafo = construir(estaciones)
+    resumen = {
+        "construccion_s": time.perf_counter() - inicio,
+        "aristas": grafo.number_of_edges(),
+        "grado_medio": 2 * grafo.number_of_edges() / max(grafo.number_of_nodes(), 1),
+        "componentes": nx.number_connected_components(grafo),
+    }
+    for metodo in METODOS_BUSQUEDA:
+        inicio = time.perf_counter()
+        resultados = [buscar_mejor_ruta_estaciones(grafo, o, d, metodo, usar_cache=False) for o, d in pares]
+        segundos = time.perf_counter() - inicio
+        resumen[metodo] = {"consultas_por_segundo": len(pares) / segundos,
+                           "latencia_media_ms": 1000 * segundos / len(pares)}
+    rutas = [(ruta, dist) for ruta, dist in resultados if ruta]
+    resumen["pares_con_ruta"] = len(rutas)
+    if rutas:
+        resumen["distancia_media_km"] = statistics.fmean(dist for _, dist in rutas)
+        resumen["transbordos_medios"] = statistics.fmean(contar_transbordos(grafo, ruta) for ruta, _ in rutas)
+    return resumen
+
+
+def comparar(estaciones, pares_max, umbral_km):
+    pares = generar_pares(list(estaciones.nombres), pares_max)
+    return {
+        "estaciones": len(estaciones),
+        "pares": len(pares),
+        "distancia": medir_modelo(lambda est: construir_grafo_estaciones(est, umbral_km=umbral_km),
+                                  estaciones, pares),
+        "lineas": medir_modelo(construir_grafo_lineas, estaciones, pares),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=5000)
+    parser.add_argument("--pares", type=int, default=2000)
+    parser.add_argument("--umbral-km", type=float, default=1.0)
+    args = parser.parse_args()
+
+    resumen = {"transmilenio": comparar(StationStore.cargar(RUTA_SNAPSHOT), 150 * 150, args.umbral_km)}
+    if args.sinteticas:
+        resumen["sinteticas"] = comparar(estaciones_sinteticas(args.sinteticas), args.pares, args.umbral_km)
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Comparación de los motores de búsqueda de rutas: NetworkX y arreglos CSR.
+
+Verifica la paridad de ambos motores (misma ruta y distancia para Dijkstra y A*;
+misma distancia para la búsqueda bidireccional) y compara la memoria que ocupa
+cada representación del grafo y las consultas por segundo de cada método.
+
+Se mide sobre la red de `resources/estaciones_transmilenio.snap` (todos los pares)
+y sobre una red sintética más grande (pares al azar).
+
+Uso:
+    python -m benchmarks.bench_motores [--sinteticas N] [--pares N]
+"""
+import argparse
+import json
+import math
+import random
+import time
+import tracemalloc
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.estaciones import StationStore
+from src.logic.grafo_csr import GrafoCSR
+from src.logic.routing import METODOS_BUSQUEDA, buscar_mejor_ruta_estaciones, construir_grafo_estaciones
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def memoria(funcion):
+    """Bytes que quedan reservados tras ejecutar `funcion` (y su resultado)."""
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    resultado = funcion()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, despues - antes
+
+
+def comprobar_paridad(grafo, grafo_csr, pares):
+    diferencias = {metodo: 0 for metodo in METODOS_BUSQUEDA}
+    for origen, destino in pares:
+        for metodo in METODOS_BUSQUEDA:
+            ruta_nx, dist_nx = buscar_mejor_ruta_estaciones(grafo, origen, destino, metodo, usar_cache=False)
+            ruta_csr, dist_csr = buscar_mejor_ruta_estaciones(grafo_csr, origen, destino, metodo)
+            if metodo == "bidireccional":
+                # Con empates, la bidireccional puede elegir otra ruta de igual longitud
+                igual = (dist_nx is None) == (dist_csr is None) and (
+                    dist_nx is None or math.isclose(dist_nx, dist_csr, rel_tol=1e-12, abs_tol=1e-12))
+            else:
+                igual = ruta_nx == ruta_csr and dist_nx == dist_csr
+            diferencias[metodo] += not igual
+    return diferencias
+
+
+def medir_consultas(grafo, pares, metodo):
+    inicio = time.perf_counter()
+    for origen, destino in pares:
+        buscar_mejor_ruta_estaciones(grafo, origen, destino, metodo, usar_cache=False)
+    return len(pares) / (time.perf_counter() - inicio)
+
+
+def comparar(estaciones, pares_max, semilla=11):
+    grafo = construir_grafo_estaciones(estaciones, umbral_km=1.0)
+    _, bytes_nx = memoria(lambda: GrafoCSR.desde_networkx(grafo).a_networkx())
+    grafo_csr, bytes_csr = memoria(lambda: GrafoCSR.desde_networkx(grafo))
+    nombres = list(grafo.nodes)
+    if len(nombres) ** 2 <= pares_max:
+        pares = [(o, d) for o in nombres for d in nombres]
+    else:
+        aleatorio = random.Random(semilla)
+        pares = [(aleatorio.choice(nombres), aleatorio.choice(nombres)) for _ in range(pares_max)]
+    resumen = {
+        "estaciones": grafo.number_of_nodes(),
+        "aristas": grafo.number_of_edges(),
+        "pares": len(pares),
+        "memoria_networkx_bytes": bytes_nx,
+        "memoria_csr_bytes": bytes_csr,
+        "diferencias": comprobar_paridad(grafo, grafo_csr, pares),
+    }
+    for metodo in METODOS_BUSQUEDA:
+        qps_nx = medir_consultas(grafo, pares, metodo)
+        qps_csr = medir_consultas(grafo_csr, pares, metodo)
+        resumen[metodo] = {"networkx_qps": qps_nx, "csr_qps": qps_csr, "aceleracion": qps_csr / qps_nx}
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sinteticas", type=int, default=5000)
+    parser.add_argument("--pares", type=int, default=25000)
+    args = parser.parse_args()
+
+    resumen = {
+        "transmilenio": comparar(StationStore.cargar(RUTA_SNAPSHOT), args.pares),
+        f"sinteticas_{args.sinteticas}": comparar(estaciones_sinteticas(args.sinteticas), max(1, args.pares // 25)),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark del costo de la instrumentación de `src.utils.perfilado`.
+
+Llama a las funciones instrumentadas más frecuentes a través del decorador `medir` y
+directamente (`__wrapped__`, sin decorador), con la medición desactivada y activada,
+y compara los tiempos por llamada. Con la medición desactivada la diferencia es el
+costo que la instrumentación agrega siempre.
+
+Uso:
+    python -m benchmarks.bench_perfilado [--consultas N] [--rondas N]
+"""
+import argparse
+import functools
+import json
+import random
+import statistics
+import time
+
+from src.logic.modelo_ml import predecir_troncal_por_coords
+from src.logic.routing import CACHE_RUTAS, buscar_mejor_ruta_estaciones
+from src.logic.servicio import ServicioRutas
+from src.utils import perfilado
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+def por_llamada_us(funcion, argumentos, rondas):
+    """Mínimo entre rondas del tiempo medio por llamada, en microsegundos."""
+    tiempos = []
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        for args in argumentos:
+            funcion(*args)
+        tiempos.append(1e6 * (time.perf_counter() - inicio) / len(argumentos))
+    return min(tiempos)
+
+
+def comparar(funcion, argumentos, rondas):
+    """Tiempo por llamada sin decorador, decorada con la medición desactivada y activada."""
+    def activada(*args):
+        perfilado.activar()
+        try:
+            return por_llamada_us(funcion, *args)
+        finally:
+            perfilado.desactivar()
+            perfilado.reiniciar()
+
+    variantes = [("sin_decorador", functools.partial(por_llamada_us, funcion.__wrapped__)),
+                 ("desactivada", functools.partial(por_llamada_us, funcion)),
+                 ("activada", activada)]
+    por_llamada_us(funcion, argumentos, 1)  # Calentamiento (cachés, modelo cargado)
+    # Las variantes se alternan y rotan en cada ronda para que la deriva de la máquina y
+    # la posición dentro de la ronda las afecten por igual
+    medidas = {nombre: [] for nombre, _ in variantes}
+    for ronda in range(rondas):
+        for nombre, medir_variante in variantes[ronda % 3:] + variantes[:ronda % 3]:
+            medidas[nombre].append(medir_variante(argumentos, 1))
+    resultado = {}
+    for variante, tiempos in medidas.items():
+        resultado[f"{variante}_us"] = min(tiempos)
+    resultado["costo_desactivada_us"] = resultado["desactivada_us"] - resultado["sin_decorador_us"]
+    resultado["costo_desactivada_pct"] = 100 * resultado["costo_desactivada_us"] / resultado["sin_decorador_us"]
+    resultado["costo_activada_us"] = resultado["activada_us"] - resultado["sin_decorador_us"]
+    resultado["mediana_rondas_desactivada_pct"] = 100 * statistics.median(
+        d / s - 1 for d, s in zip(medidas["desactivada"], medidas["sin_decorador"]))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--rondas", type=int, default=15)
+    args = parser.parse_args()
+
+    perfilado.desactivar()
+    servicio = ServicioRutas.desde_snapshot(RUTA_SNAPSHOT)
+    aleatorio = random.Random(17)
+    nombres = servicio.nombres_estaciones()
+    pares = [(servicio.grafo, *aleatorio.sample(nombres, 2)) for _ in range(args.consultas)]
+    for grafo, origen, destino in pares:  # Las rutas quedan en la caché: se mide la ruta más corta posible
+        buscar_mejor_ruta_estaciones(grafo, origen, destino)
+    coords = [(4.5 + aleatorio.random() * 0.3, -74.2 + aleatorio.random() * 0.15)
+              for _ in range(args.consultas // 10 or 1)]
+
+    resumen = {
+        "ruta_en_cache": comparar(buscar_mejor_ruta_estaciones, pares, args.rondas),
+        "prediccion": comparar(predecir_troncal_por_coords, coords, args.rondas),
+        "cache": CACHE_RUTAS.estadisticas(),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de `buscar_mejor_ruta_estaciones` sobre todos los pares de estaciones.
+
+Compara la implementación anterior (dos búsquedas de Dijkstra por consulta: una para
+la ruta y otra para la distancia) con los métodos de una sola búsqueda y con la tabla
+precalculada de todos los pares, y verifica que todos encuentren la misma distancia.
+
+Uso:
+    python -m benchmarks.bench_rutas [--umbral-km 1.0]
+"""
+import argparse
+import json
+import math
+import time
+
+import networkx as nx
+import pandas as pd
+
+from src.logic.routing import METODOS_BUSQUEDA, buscar_mejor_ruta_estaciones, construir_grafo_estaciones
+from src.logic.tabla_rutas import TablaRutas
+
+RUTA_CSV = "resources/estaciones_transmilenio.csv"
+
+
+def ruta_dos_busquedas(grafo, origen, destino):
+    """Implementación anterior: la ruta y la distancia se buscan por separado."""
+    try:
+        ruta = nx.dijkstra_path(grafo, source=origen, target=destino, weight='weight')
+        distancia = nx.dijkstra_path_length(grafo, source=origen, target=destino, weight='weight')
+        return ruta, distancia
+    except nx.NetworkXNoPath:
+        return None, None
+
+
+def medir(buscar, grafo, pares):
+    inicio = time.perf_counter()
+    distancias = [buscar(grafo, origen, destino)[1] for origen, destino in pares]
+    segundos = time.perf_counter() - inicio
+    return distancias, {"segundos": segundos, "consultas_por_segundo": len(pares) / segundos}
+
+
+def misma_distancia(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--umbral-km", type=float, default=1.0)
+    args = parser.parse_args()
+
+    estaciones = pd.read_csv(RUTA_CSV).to_dict("records")
+    grafo = construir_grafo_estaciones(estaciones, umbral_km=args.umbral_km)
+    nombres = list(grafo.nodes)
+    pares = [(o, d) for o in nombres for d in nombres if o != d]
+
+    referencia, resultados = medir(ruta_dos_busquedas, grafo, pares)
+    resumen = {"pares": len(pares), "umbral_km": args.umbral_km,
+               "dos_busquedas": resultados}
+    for metodo in METODOS_BUSQUEDA:
+        distancias, resultados = medir(
+            lambda g, o, d: buscar_mejor_ruta_estaciones(g, o, d, metodo, usar_cache=False), grafo, pares)
+        resultados["coincide_con_referencia"] = all(
+            misma_distancia(a, b) for a, b in zip(referencia, distancias))
+        resultados["aceleracion"] = resumen["dos_busquedas"]["segundos"] / resultados["segundos"]
+        resumen[metodo] = resultados
+
+    inicio = time.perf_counter()
+    tabla = TablaRutas.construir(grafo)
+    construccion_s = time.perf_counter() - inicio
+    distancias, resultados = medir(
+        lambda g, o, d: buscar_mejor_ruta_estaciones(g, o, d, tabla=tabla), grafo, pares)
+    resultados["construccion_s"] = construccion_s
+    resultados["coincide_con_referencia"] = all(
+        misma_distancia(a, b) for a, b in zip(referencia, distancias))
+    resultados["aceleracion"] = resumen["dos_busquedas"]["segundos"] / resultados["segundos"]
+    resumen["tabla"] = resultados
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark de rendimiento (consultas por segundo) del motor de rutas sin interfaz.
+
+Mide el servicio en el mismo proceso y a través del servidor HTTP local, con pares
+origen/destino aleatorios sobre `resources/estaciones_transmilenio.csv`. La caché de
+resultados se vacía antes de cada medición, así que los pares repetidos por azar son
+los únicos aciertos (ver `benchmarks.bench_cache_rutas`).
+
+Uso:
+    python -m benchmarks.bench_servicio [--consultas N] [--hilos N]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from src.cli import crear_servidor
+from src.logic.routing import CACHE_RUTAS
+from src.logic.servicio import ServicioRutas
+
+RUTA_CSV = "resources/estaciones_transmilenio.csv"
+
+
+def generar_pares(servicio, cantidad, semilla=42):
+    nombres = servicio.nombres_estaciones()
+    aleatorio = random.Random(semilla)
+    return [(aleatorio.choice(nombres), aleatorio.choice(nombres)) for _ in range(cantidad)]
+
+
+def medir_en_proceso(servicio, pares):
+    CACHE_RUTAS.limpiar()
+    inicio = time.perf_counter()
+    for origen, destino in pares:
+        servicio.consultar(origen, destino)
+    segundos = time.perf_counter() - inicio
+    return {"consultas": len(pares), "segundos": segundos, "consultas_por_segundo": len(pares) / segundos}
+
+
+def medir_http(servicio, pares, hilos):
+    CACHE_RUTAS.limpiar()
+    servidor = crear_servidor(servicio, "127.0.0.1", 0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}/ruta?"
+
+    def consultar(par):
+        with urlopen(base + urlencode({"origen": par[0], "destino": par[1]})) as respuesta:
+            return respuesta.read()
+
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            list(pool.map(consultar, pares))
+        segundos = time.perf_counter() - inicio
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    return {"consultas": len(pares), "hilos": hilos, "segundos": segundos,
+            "consultas_por_segundo": len(pares) / segundos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--hilos", type=int, default=4)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    servicio = ServicioRutas.desde_csv(RUTA_CSV)
+    carga_s = time.perf_counter() - inicio
+    pares = generar_pares(servicio, args.consultas)
+
+    resumen = {
+        "estaciones": servicio.grafo.number_of_nodes(),
+        "aristas": servicio.grafo.number_of_edges(),
+        "carga_s": carga_s,
+        "en_proceso": medir_en_proceso(servicio, pares),
+        "http": medir_http(servicio, pares[: max(1, args.consultas // 4)], args.hilos),
+    }
+    print(json.dumps(resumen, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Suite de benchmarks reproducible y sin conexión, con comparación contra una línea base.
+
+Mide sobre las estaciones de `resources/estaciones_transmilenio.csv` y sobre redes
+sintéticas de 1k, 10k y 100k estaciones (con densidad constante, para que el grafo
+crezca como una red real y no como un área cada vez más llena):
+
+    - descarga: `cargar_estaciones_api` contra un servidor ArcGIS local (`stub_arcgis`)
+    - construccion_grafo: `construir_grafo_estaciones`
+    - ruta: `buscar_mejor_ruta_estaciones` sobre pares al azar
+    - indice_alternativas / ruta_alternativa: `buscar_ruta_alternativa`
+    - carga_modelo / prediccion / prediccion_lote: `predecir_troncal_por_coords` y `predecir_troncales`
+    - indice_autocompletado / autocompletado: el filtrado de `AutocompleteCombobox`
+      (`IndiceBusqueda.buscar`), simulando que se escriben nombres letra por letra
+
+Las semillas son fijas. Cada operación se repite y se informa la mediana y el mínimo
+en milisegundos por llamada; las llamadas rápidas se agrupan en lotes hasta que cada
+muestra sea medible. En las operaciones por consulta se informa además la mediana y el
+percentil 95 de cada consulta, y se compara el tiempo medio por consulta de la lista
+completa (repetida en lotes si es rápida).
+
+Intercalada con las muestras de cada operación se mide una carga de calibración fija
+(`carga_calibracion`), y cada operación se compara con la línea base como múltiplo de
+esa calibración: si la máquina está más lenta o más rápida que al grabar la línea base
+(o que hace unos segundos, en una máquina virtual), la calibración cambia en la misma
+proporción y la comparación no se ve afectada.
+
+El resultado se imprime en JSON. Si existe la línea base (`benchmarks/linea_base.json`
+por defecto) se agrega la comparación con ella, y el proceso termina con código 1 si
+alguna operación es más lenta que la tolerancia. `--guardar-linea-base` reemplaza la
+línea base con la ejecución actual.
+
+Uso:
+    python -m benchmarks.bench_suite [--tamanos 1000 10000 100000] [--repeticiones N] [--consultas N]
+                                     [--linea-base RUTA] [--guardar-linea-base] [--tolerancia 0.5]
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.stub_arcgis import ServidorStub
+from src.gui.autocombo import MAX_RESULTADOS, IndiceBusqueda
+from src.logic import modelo_ml
+from src.logic.data import cargar_estaciones_api
+from src.logic.estaciones import StationStore
+from src.logic.modelo_ml import predecir_troncal_por_coords, predecir_troncales
+from src.logic.routing import (
+    IndiceAlternativas,
+    buscar_mejor_ruta_estaciones,
+    buscar_ruta_alternativa,
+    construir_grafo_estaciones,
+    obtener_indice_alternativas
+)
+
+RUTA_CSV = "resources/estaciones_transmilenio.csv"
+RUTA_LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linea_base.json")
+TAMANOS = (1_000, 10_000, 100_000)
+DENSIDAD_SINTETICA = 2.0  # Estaciones por km²: unas 6 conexiones por estación con umbral de 1 km
+CENTRO = (4.65, -74.10)  # Bogotá
+KM_POR_GRADO = 111.32
+TOLERANCIA = 0.5  # Regresión: 50 % más lento que la línea base, en proporción a la calibración
+TIEMPO_MINIMO_S = 0.2  # Tiempo mínimo medido por operación, repitiendo las rápidas
+MUESTRA_MINIMA_MS = 5.0  # Las llamadas más rápidas se agrupan hasta que cada muestra dure esto
+REPETICIONES_MAX = 100  # Muestras como máximo por operación
+MUESTRAS_CALIBRACION = 5  # Antes y después de una operación que no se repite
+
+
+def estaciones_escaladas(cantidad, semilla=11):
+    """
+    Estaciones al azar en un cuadrado alrededor de Bogotá cuyo lado crece con la cantidad,
+    de modo que la densidad (y el número de conexiones por estación) no cambie.
+    """
+    aleatorio = random.Random(semilla)
+    lado_km = math.sqrt(cantidad / DENSIDAD_SINTETICA)
+    alto = lado_km / KM_POR_GRADO
+    ancho = lado_km / (KM_POR_GRADO * math.cos(math.radians(CENTRO[0])))
+    return StationStore(
+        {"nombre": f"Estación {i:06d}", "latitud": CENTRO[0] + (aleatorio.random() - 0.5) * alto,
+         "lon": CENTRO[1] + (aleatorio.random() - 0.5) * ancho, "troncal": f"Troncal {i % 12}"}
+        for i in range(cantidad)
+    )
+
+
+def a_features(estaciones):
+    """Las estaciones como features GeoJSON de la capa ArcGIS."""
+    return [
+        {"type": "Feature", "geometry": None,
+         "properties": {"nombre_estacion": est["nombre"], "latitud_estacion": est["latitud"],
+                        "longitud_estacion": est["lon"], "troncal_estacion": est["troncal"]}}
+        for est in estaciones
+    ]
+
+
+def _medir_lote(funcion, llamadas):
+    """Resultado de la última de `llamadas` llamadas seguidas a `funcion` y su duración total en ms."""
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        resultado = funcion()
+    return resultado, 1000 * (time.perf_counter() - inicio)
+
+
+def cronometrar(funcion, repeticiones):
+    """
+    Mediana y mínimo en ms por llamada a `funcion` y el resultado de la última llamada.
+
+    Tras una llamada de calentamiento, las llamadas se agrupan en lotes (1, 2, 5, 10,
+    20...) hasta que un lote dure al menos `MUESTRA_MINIMA_MS`: así el tiempo de una
+    operación de microsegundos no queda dominado por la resolución del reloj ni por
+    interrupciones sueltas. Se toman al menos `repeticiones` muestras, y más hasta
+    sumar `TIEMPO_MINIMO_S` (como máximo `REPETICIONES_MAX`).
+
+    Después de cada muestra se mide una vez `carga_calibracion`; su mínimo se informa en
+    `calibracion_ms` (ver `comparar_con_linea_base`).
+    """
+    resultado, duracion = _medir_lote(funcion, 1)
+    llamadas = 1
+    for factor in itertools.cycle((2, 2.5, 2)):  # 1, 2, 5, 10, 20, 50...
+        if duracion >= MUESTRA_MINIMA_MS:
+            break
+        llamadas = int(llamadas * factor)
+        resultado, duracion = _medir_lote(funcion, llamadas)
+    tiempos, calibracion = [], []
+    while len(tiempos) < repeticiones or (sum(tiempos) < 1000 * TIEMPO_MINIMO_S and len(tiempos) < REPETICIONES_MAX):
+        resultado, duracion = _medir_lote(funcion, llamadas)
+        tiempos.append(duracion)
+        calibracion.append(_medir_lote(carga_calibracion, 1)[1])
+    return resultado, {"mediana_ms": statistics.median(tiempos) / llamadas, "minimo_ms": min(tiempos) / llamadas,
+                       "llamadas_por_muestra": llamadas, "calibracion_ms": min(calibracion)}
+
+
+def por_consulta(funcion, argumentos, repeticiones):
+    """
+    Latencia de las llamadas a `funcion(*args)` sobre la lista `argumentos`.
+
+    Retorna la mediana y el percentil 95 de cada consulta, las consultas por segundo y
+    `por_consulta_ms`, el tiempo medio por consulta con que se compara la línea base. Si
+    la lista completa tarda menos que `TIEMPO_MINIMO_S`, se repite con `cronometrar` y se
+    toma el mínimo, de modo que las consultas de microsegundos también sean medibles; si
+    no, la calibración se mide justo antes y justo después de recorrerla y se toma su
+    mediana, porque el tiempo por consulta es un promedio y no un mínimo.
+    """
+    calibracion = [_medir_lote(carga_calibracion, 1)[1] for _ in range(MUESTRAS_CALIBRACION)]
+    tiempos = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append(1000 * (time.perf_counter() - inicio))
+    calibracion += [_medir_lote(carga_calibracion, 1)[1] for _ in range(MUESTRAS_CALIBRACION)]
+    total, calibracion = sum(tiempos), statistics.median(calibracion)
+    if total < 1000 * TIEMPO_MINIMO_S:
+        _, lote = cronometrar(lambda: [funcion(*args) for args in argumentos], repeticiones)
+        total, calibracion = lote["minimo_ms"], lote["calibracion_ms"]
+    return {"mediana_ms": statistics.median(tiempos), "p95_ms": float(np.percentile(tiempos, 95)),
+            "consultas_por_segundo": 1000 * len(tiempos) / sum(tiempos), "por_consulta_ms": total / len(tiempos),
+            "calibracion_ms": calibracion}
+
+
+def carga_calibracion():
+    """
+    Carga de trabajo fija que mezcla lo que mide la suite: Dijkstra en NetworkX sobre una
+    cuadrícula, distancias vectorizadas con NumPy y ordenamiento de cadenas en Python.
+    No depende del código del proyecto, así que solo cambia si cambia la máquina.
+    """
+    nx.single_source_dijkstra_path_length(_GRAFO_CALIBRACION, (0, 0), weight="weight")
+    lats, lons = _COORDS_CALIBRACION
+    d_lat, d_lon = np.radians(lats[:, None] - lats[None, :]), np.radians(lons[:, None] - lons[None, :])
+    cosenos = np.cos(np.radians(lats))
+    a = np.sin(d_lat / 2) ** 2 + cosenos[:, None] * cosenos[None, :] * np.sin(d_lon / 2) ** 2
+    np.arctan2(np.sqrt(a), np.sqrt(1 - a)).sum()
+    return sorted(_TEXTOS_CALIBRACION, key=str.lower)
+
+
+def _datos_calibracion(semilla=43):
+    aleatorio = random.Random(semilla)
+    grafo = nx.grid_2d_graph(30, 30)
+    for u, v in grafo.edges:
+        grafo.edges[u, v]["weight"] = aleatorio.random()
+    coords = np.array([[4.5 + aleatorio.random() * 0.3, -74.2 + aleatorio.random() * 0.15] for _ in range(200)])
+    textos = [f"Estación {aleatorio.getrandbits(32):08x}" for _ in range(3000)]
+    return grafo, (coords[:, 0], coords[:, 1]), textos
+
+
+_GRAFO_CALIBRACION, _COORDS_CALIBRACION, _TEXTOS_CALIBRACION = _datos_calibracion()
+
+
+def tecleos(nombres, cantidad, aleatorio):
+    """Consultas que produce escribir `cantidad` nombres letra por letra."""
+    consultas = []
+    for nombre in aleatorio.sample(nombres, min(cantidad, len(nombres))):
+        consultas.extend((nombre[:k],) for k in range(1, len(nombre) + 1))
+    return consultas
+
+
+def medir_conjunto(estaciones, repeticiones, consultas):
+    aleatorio = random.Random(29)
+    resumen = {"estaciones": len(estaciones)}
+
+    with ServidorStub(a_features(estaciones)) as stub:
+        descargadas, resumen["descarga"] = cronometrar(
+            lambda: cargar_estaciones_api(stub.url, usar_cache=False), repeticiones)
+    resumen["descarga"]["igual"] = len(descargadas) == len(estaciones)
+
+    grafo, resumen["construccion_grafo"] = cronometrar(
+        lambda: construir_grafo_estaciones(estaciones), repeticiones)
+    resumen["construccion_grafo"]["aristas"] = grafo.number_of_edges()
+    resumen["construccion_grafo"]["componentes"] = nx.number_connected_components(grafo)
+
+    nombres = list(estaciones.nombres)
+    pares = [tuple(aleatorio.sample(nombres, 2)) for _ in range(consultas)]
+    resumen["ruta"] = por_consulta(
+        lambda o, d: buscar_mejor_ruta_estaciones(grafo, o, d, usar_cache=False), pares, repeticiones)
+
+    _, resumen["indice_alternativas"] = cronometrar(
+        lambda: IndiceAlternativas(grafo), repeticiones)
+    obtener_indice_alternativas(grafo)
+    resumen["ruta_alternativa"] = por_consulta(
+        lambda o, d: buscar_ruta_alternativa(grafo, estaciones, o, d, usar_cache=False), pares, repeticiones)
+
+    coords = np.column_stack([estaciones.latitudes, estaciones.longitudes])
+    muestra = coords[aleatorio.sample(range(len(coords)), min(consultas, len(coords)))]
+    resumen["prediccion"] = por_consulta(predecir_troncal_por_coords, muestra.tolist(), repeticiones)
+    _, resumen["prediccion_lote"] = cronometrar(lambda: predecir_troncales(coords), repeticiones)
+    resumen["prediccion_lote"]["filas_por_segundo"] = 1000 * len(coords) / resumen["prediccion_lote"]["mediana_ms"]
+
+    ordenados = sorted(nombres, key=str.lower)
+    indice, resumen["indice_autocompletado"] = cronometrar(lambda: IndiceBusqueda(ordenados), repeticiones)
+    resumen["autocompletado"] = por_consulta(
+        lambda texto: indice.buscar(texto, limite=MAX_RESULTADOS), tecleos(ordenados, consultas // 10 or 1, aleatorio),
+        repeticiones)
+    return resumen
+
+
+def medir_carga_modelo(repeticiones):
+    """Carga del modelo de troncales desde disco, como en la primera predicción de la aplicación."""
+    def cargar():
+        modelo_ml._modelo = modelo_ml._encoder = None
+        return modelo_ml.cargar_modelo()
+    return cronometrar(cargar, repeticiones)[1]
+
+
+def comparar_con_linea_base(resultados, linea_base, tolerancia):
+    """
+    Compara cada operación con la línea base en proporción a la calibración.
+
+    El tiempo de cada operación se divide por el de `carga_calibracion` medido junto con
+    ella, en esta ejecución y en la de la línea base; la razón entre ambas proporciones
+    es la que se compara con la tolerancia. Se usa el tiempo mínimo por llamada en las
+    operaciones repetidas y el tiempo medio por consulta en las demás.
+
+    Parámetros:
+        - resultados (dict): Mediciones actuales, por conjunto y operación.
+        - linea_base (dict): Mediciones guardadas, con la misma forma.
+        - tolerancia (float): Aumento relativo a partir del cual hay regresión.
+
+    Retorna:
+        dict: Por conjunto y operación, el tiempo anterior y el actual, la razón entre las
+              calibraciones, la razón entre los tiempos ya calibrada y si es una
+              regresión; además la lista de regresiones.
+
+    Lanza:
+        ValueError: Si la línea base no tiene calibración (se grabó con una versión anterior).
+    """
+    comparacion = {}
+    regresiones = []
+    for conjunto, operaciones in resultados.items():
+        anteriores = linea_base.get(conjunto, {})
+        for operacion, medida in operaciones.items():
+            anterior = anteriores.get(operacion)
+            if not isinstance(medida, dict) or not isinstance(anterior, dict):
+                continue
+            if "calibracion_ms" not in anterior:
+                raise ValueError("La línea base no tiene calibración: vuelve a grabarla con --guardar-linea-base")
+            metrica = "minimo_ms" if "minimo_ms" in medida else "por_consulta_ms"
+            calibracion = medida["calibracion_ms"] / anterior["calibracion_ms"]
+            razon = medida[metrica] / anterior[metrica] / calibracion
+            comparacion.setdefault(conjunto, {})[operacion] = {
+                "metrica": metrica, "linea_base_ms": anterior[metrica], "actual_ms": medida[metrica],
+                "calibracion": calibracion, "razon": razon, "regresion": razon > 1 + tolerancia}
+            if razon > 1 + tolerancia:
+                regresiones.append(f"{conjunto}.{operacion}")
+    return {"tolerancia": tolerancia, "operaciones": comparacion, "regresiones": regresiones}
+
+
+def entorno():
+    return {"python": platform.python_version(), "sistema": f"{platform.system()} {platform.machine()}",
+            "cpus": os.cpu_count(), "numpy": np.__version__, "networkx": nx.__version__, "sklearn": sklearn.__version__}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanos", type=int, nargs="*", default=list(TAMANOS),
+                        help="Cantidades de estaciones sintéticas")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--consultas", type=int, default=100, help="Consultas por operación de búsqueda")
+    parser.add_argument("--linea-base", default=RUTA_LINEA_BASE)
+    parser.add_argument("--guardar-linea-base", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    resultados = {"modelo": {"carga_modelo": medir_carga_modelo(args.repeticiones)},
+                  "transmilenio": medir_conjunto(StationStore(pd.read_csv(RUTA_CSV).to_dict("records")),
+                                                 args.repeticiones, args.consultas)}
+    for cantidad in args.tamanos:
+        resultados[f"sinteticas_{cantidad}"] = medir_conjunto(
+            estaciones_escaladas(cantidad), args.repeticiones, args.consultas)
+    resumen = {"entorno": entorno(), "resultados": resultados}
+
+    if os.path.exists(args.linea_base) and not args.guardar_linea_base:
+        with open(args.linea_base, "r", encoding="utf-8") as f:
+            linea_base = json.load(f)
+        try:
+            resumen["comparacion"] = comparar_con_linea_base(resultados, linea_base["resultados"], args.tolerancia)
+        except ValueError as e:
+            print(f"⚠️ {e}", file=sys.stderr)
+            sys.exit(2)
+    if args.guardar_linea_base:
+        with open(args.linea_base, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    if resumen.get("comparacion", {}).get("regresiones"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Servidor local que imita una capa ArcGIS FeatureServer (`f=geojson`).
+
+Genera estaciones sintéticas y respeta `resultOffset` / `resultRecordCount` (recortando
+las páginas a `MAX_RECORD_COUNT` e indicándolo con `exceededTransferLimit`), con una
+latencia artificial por petición y, opcionalmente, fallos 503 transitorios, una página
+con el JSON cortado o sin paginación (como una capa sin `supportsPagination`), para medir
+y probar la descarga de estaciones sin depender de la red.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MAX_RECORD_COUNT = 2000
+
+
+def generar_features(cantidad, semilla=7):
+    """Features GeoJSON sintéticos alrededor de Bogotá, repartidos en 12 troncales."""
+    aleatorio = random.Random(semilla)
+    return [
+        {
+            "type": "Feature",
+            "geometry": None,
+            "properties": {
+                "nombre_estacion": f"Estación {i:06d}",
+                "latitud_estacion": 4.45 + aleatorio.random() * 0.35,
+                "longitud_estacion": -74.20 + aleatorio.random() * 0.15,
+                "troncal_estacion": f"Troncal {chr(ord('A') + i % 12)}",
+            },
+        }
+        for i in range(cantidad)
+    ]
+
+
+class ServidorStub:
+    """
+    Servidor HTTP en un hilo, para usar con `with`.
+
+    Atributos:
+        url (str): URL de consulta de la capa simulada.
+        peticiones (int): Peticiones atendidas.
+    """
+
+    def __init__(self, features, latencia_s=0.0, fallos_por_pagina=0, pagina_malformada=None,
+                 ignorar_paginacion=False):
+        self.features = features
+        self.latencia_s = latencia_s
+        self.fallos_por_pagina = fallos_por_pagina
+        self.pagina_malformada = pagina_malformada  # resultOffset cuya respuesta llega truncada
+        # Si es True, ignora resultOffset y resultRecordCount: siempre responde las primeras
+        # MAX_RECORD_COUNT estaciones
+        self.ignorar_paginacion = ignorar_paginacion
+        self.peticiones = 0
+        self._fallos = {}
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._crear_manejador())
+        self._servidor.daemon_threads = True
+        self.url = (f"http://127.0.0.1:{self._servidor.server_address[1]}"
+                    "/FeatureServer/0/query?outFields=*&where=1%3D1&f=geojson")
+
+    def __enter__(self):
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _crear_manejador(self):
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Permite reutilizar la conexión
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                consulta = parse_qs(urlsplit(self.path).query)
+                desplazamiento = int(consulta.get("resultOffset", ["0"])[0])
+                cantidad = int(consulta.get("resultRecordCount", [len(stub.features)])[0])
+                with stub._lock:
+                    stub.peticiones += 1
+                    fallos = stub._fallos.get(desplazamiento, 0)
+                    if fallos < stub.fallos_por_pagina:
+                        stub._fallos[desplazamiento] = fallos + 1
+                if stub.latencia_s:
+                    time.sleep(stub.latencia_s)
+                if fallos < stub.fallos_por_pagina:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if stub.ignorar_paginacion:
+                    desplazamiento, cantidad = 0, MAX_RECORD_COUNT
+                elif "resultOffset" in consulta:
+                    cantidad = min(cantidad, MAX_RECORD_COUNT)
+                pagina = stub.features[desplazamiento:desplazamiento + cantidad]
+                documento = {"type": "FeatureCollection", "features": pagina}
+                if desplazamiento + len(pagina) < len(stub.features):
+                    # Como ArcGIS en GeoJSON: quedan features después de esta página
+                    documento["properties"] = {"exceededTransferLimit": True}
+                cuerpo = json.dumps(documento).encode("utf-8")
+                if desplazamiento == stub.pagina_malformada:
+                    cuerpo = cuerpo[:len(cuerpo) // 2]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/geo+json")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+        return Manejador
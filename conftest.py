@@ -0,0 +1,2 @@
+# Permite importar `src` y `benchmarks` desde las pruebas de `tests/` al ejecutar `pytest`
+# desde la raíz del proyecto.
@@ -1,12 +1,27 @@
+import argparse
+
 from src.gui.app import RouteApp
+from src.utils import perfilado
 import src.version as version
 import tkinter as tk
 
-def main():
+def main(depuracion=False):
     root = tk.Tk()
-    RouteApp(root)
+    RouteApp(root, depuracion=depuracion)
     root.mainloop()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sistema experto de rutas TransMilenio")
+    parser.add_argument("--perfilar", nargs="?", const="tiempos", choices=("tiempos", "detallado"),
+                        help="Mide los tiempos de las operaciones y muestra la pestaña de depuración; "
+                             "'detallado' agrega cProfile y tracemalloc.")
+    args = parser.parse_args()
+
     print(f"Versión del sistema experto: {version.__version__}")
-    main()
+    if args.perfilar:
+        perfilado.activar(detallado=args.perfilar == "detallado")
+    main(depuracion=perfilado.activo())
+    if perfilado.activo():
+        print(perfilado.informe())
+        for ruta in perfilado.volcar():
+            print(f"📊 Mediciones guardadas en: {ruta}")
@@ -0,0 +1,193 @@
+"""
+Punto de entrada sin interfaz gráfica para el motor de rutas.
+
+Modos:
+    - lote: lee pares origen/destino de un archivo y escribe un JSON por línea.
+    - http: expone el motor en un servidor HTTP local.
+    - matriz: calcula la matriz origen-destino de todas las estaciones en varios procesos.
+
+Ejemplos:
+    python -m src.cli lote consultas.csv
+    python -m src.cli lote consultas.jsonl --salida resultados.jsonl
+    python -m src.cli --csv resources/estaciones_transmilenio.csv http --puerto 8000
+    python -m src.cli --snapshot resources/estaciones_transmilenio.snap lote consultas.csv
+    python -m src.cli --snapshot resources/estaciones_transmilenio.snap --modelo lineas http
+    python -m src.cli --snapshot resources/estaciones_transmilenio.snap matriz salida_od --rutas
+"""
+import argparse
+import csv
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.logic.matriz_od import resolver_matriz_od
+from src.logic.routing import CACHE_RUTAS, MODELOS_GRAFO, MOTORES
+from src.logic.servicio import ServicioRutas
+from src.utils import perfilado
+
+
+def leer_consultas(archivo, formato):
+    """
+    Genera los pares (origen, destino) de un archivo de consultas.
+
+    Parámetros:
+        - archivo (file): Archivo de texto abierto.
+        - formato (str): "csv" (dos columnas origen,destino; se admite encabezado)
+          o "jsonl" (un objeto {"origen": ..., "destino": ...} por línea).
+
+    Retorna:
+        generator: Tuplas (origen, destino).
+    """
+    if formato == "jsonl":
+        for linea in archivo:
+            if linea.strip():
+                consulta = json.loads(linea)
+                yield consulta["origen"].strip(), consulta["destino"].strip()
+        return
+    for fila in csv.reader(archivo):
+        if len(fila) < 2 or not fila[0].strip():
+            continue
+        origen, destino = fila[0].strip(), fila[1].strip()
+        if (origen.lower(), destino.lower()) == ("origen", "destino"):
+            continue  # Encabezado
+        yield origen, destino
+
+
+def procesar_lote(servicio, consultas, salida):
+    """
+    Responde cada consulta y escribe el resultado en cuanto está listo (JSON Lines).
+
+    Retorna:
+        int: Número de consultas procesadas.
+    """
+    total = 0
+    for origen, destino in consultas:
+        salida.write(json.dumps(servicio.consultar(origen, destino)) + "\n")
+        salida.flush()
+        total += 1
+    return total
+
+
+def crear_servidor(servicio, host="127.0.0.1", puerto=8000):
+    """
+    Crea un servidor HTTP local con las rutas:
+        - GET /ruta?origen=...&destino=...
+        - GET /estaciones
+        - GET /salud (con las mediciones de `src.utils.perfilado` si están activadas)
+
+    Retorna:
+        ThreadingHTTPServer: Servidor listo para `serve_forever()`.
+    """
+
+    class ManejadorRutas(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if url.path == "/ruta":
+                origen = params.get("origen", [""])[0].strip()
+                destino = params.get("destino", [""])[0].strip()
+                if not origen or not destino:
+                    self._responder(400, {"error": "Se requieren los parámetros origen y destino"})
+                    return
+                resultado = servicio.consultar(origen, destino)
+                self._responder(404 if "error" in resultado else 200, resultado)
+            elif url.path == "/estaciones":
+                self._responder(200, servicio.nombres_estaciones())
+            elif url.path == "/salud":
+                salud = {"estado": "ok", "estaciones": servicio.grafo.number_of_nodes(),
+                         "cache_rutas": CACHE_RUTAS.estadisticas()}
+                if perfilado.activo():
+                    salud["perfilado"] = perfilado.resumen()
+                self._responder(200, salud)
+            else:
+                self._responder(404, {"error": "Ruta HTTP no encontrada"})
+
+        def _responder(self, codigo, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, format, *args):
+            pass  # Sin registro por petición: penaliza el rendimiento
+
+    return ThreadingHTTPServer((host, puerto), ManejadorRutas)
+
+
+def crear_servicio(args):
+    opciones = {"umbral_km": args.umbral_km, "precalcular": args.precalcular, "motor": args.motor,
+                "modelo": args.modelo}
+    if args.snapshot:
+        return ServicioRutas.desde_snapshot(args.snapshot, **opciones)
+    if args.csv:
+        return ServicioRutas.desde_csv(args.csv, **opciones)
+    return ServicioRutas.desde_api(**opciones)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motor de rutas TransMilenio sin interfaz gráfica.")
+    parser.add_argument("--csv", help="CSV de estaciones a usar en lugar de la API.")
+    parser.add_argument("--snapshot", help="Snapshot binario de estaciones (.snap) a usar en lugar de la API.")
+    parser.add_argument("--umbral-km", type=float, default=1.0,
+                        help="Distancia máxima para conectar estaciones (por defecto 1.0).")
+    parser.add_argument("--precalcular", action="store_true",
+                        help="Responde desde una tabla de rutas de todos los pares guardada en disco.")
+    parser.add_argument("--motor", choices=MOTORES, default="networkx",
+                        help="Motor de búsqueda de rutas (por defecto networkx; csr usa arreglos).")
+    parser.add_argument("--modelo", choices=MODELOS_GRAFO, default="distancia",
+                        help="Modelo del grafo (por defecto distancia; lineas sigue las troncales "
+                             "y penaliza los transbordos).")
+    modos = parser.add_subparsers(dest="modo", required=True)
+
+    lote = modos.add_parser("lote", help="Procesa un archivo de consultas origen/destino.")
+    lote.add_argument("entrada", help="Archivo de consultas (CSV o JSONL). Usa '-' para stdin.")
+    lote.add_argument("--formato", choices=("csv", "jsonl"),
+                      help="Formato de la entrada (por defecto según la extensión).")
+    lote.add_argument("--salida", default="-", help="Archivo JSONL de resultados (por defecto stdout).")
+
+    http = modos.add_parser("http", help="Inicia un servidor HTTP local.")
+    http.add_argument("--host", default="127.0.0.1")
+    http.add_argument("--puerto", type=int, default=8000)
+
+    matriz = modos.add_parser("matriz", help="Calcula la matriz origen-destino de todas las estaciones.")
+    matriz.add_argument("salida", help="Carpeta donde se escriben distancias.npy y estaciones.json.")
+    matriz.add_argument("--rutas", action="store_true", help="Guarda también los predecesores de cada ruta.")
+    matriz.add_argument("--procesos", type=int, help="Procesos a usar (por defecto uno por núcleo).")
+
+    args = parser.parse_args(argv)
+    servicio = crear_servicio(args)
+
+    if args.modo == "lote":
+        formato = args.formato or ("jsonl" if args.entrada.endswith((".jsonl", ".json")) else "csv")
+        entrada = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8", newline="")
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+        try:
+            procesar_lote(servicio, leer_consultas(entrada, formato), salida)
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+            if salida is not sys.stdout:
+                salida.close()
+    elif args.modo == "matriz":
+        resultado = resolver_matriz_od(servicio.grafo, args.salida, con_rutas=args.rutas, procesos=args.procesos)
+        print(f"Matriz origen-destino de {len(resultado.origenes)}x{len(resultado.destinos)} "
+              f"estaciones guardada en {args.salida}", file=sys.stderr)
+    else:
+        servidor = crear_servidor(servicio, args.host, args.puerto)
+        print(f"Servidor de rutas en http://{args.host}:{args.puerto} "
+              f"({servicio.grafo.number_of_nodes()} estaciones)", file=sys.stderr)
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
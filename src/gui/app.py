@@ -3,24 +3,54 @@ import tkinter as tk
 import webbrowser
 from tkinter import ttk, messagebox
 
-import joblib
 from PIL import ImageTk, Image
 from dotenv import load_dotenv
 
 from src.gui.autocombo import AutocompleteCombobox
-from src.logic.data import cargar_estaciones_api
-from src.logic.modelo_ml import predecir_troncal_por_coords, exportar_estaciones_csv
+from src.gui.tareas import EjecutorTareas
+from src.logic.data import cargar_estaciones
+from src.logic.estaciones import StationStore
+from src.logic.modelo_ml import predecir_troncal_por_coords, obtener_troncales, generar_arbol_decision
 from src.logic.modelo_unsupervisado import realizar_agrupamiento_kmeans
 from src.logic.routing import (
-    construir_grafo_estaciones,
+    CACHE_RUTAS,
+    obtener_grafo_estaciones,
     buscar_mejor_ruta_estaciones,
     buscar_ruta_alternativa
 )
+from src.utils import perfilado
+
+
+RUTA_AGRUPAMIENTO = "resources/agrupamiento_kmeans.png"
+INTERVALO_REINTENTO_MS = 100  # Cada cuánto se revisa si terminó una carga cancelada
+
+
+def _cargar_estaciones_y_grafo(tarea=None):
+    """
+    Trabajo de arranque que corre fuera del hilo de Tkinter.
+
+    Si la tarea se cancela durante la descarga, el grafo no se construye.
+    """
+    load_dotenv()  # Carga desde .env
+
+    API_URL = os.getenv("API_TRANSMILENIO")
+
+    if not API_URL:
+        raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
+
+    estaciones = cargar_estaciones(API_URL)
+    if tarea is not None and tarea.cancelada.is_set():
+        return None
+    return estaciones, obtener_grafo_estaciones(estaciones, umbral_km=1.0)
+
+
+def _predecir_con_etiquetas(lat, lon):
+    return predecir_troncal_por_coords(lat, lon), obtener_troncales()
 
 
 def validate_lat_lon(self, lat, lon):
-    # Validar si las coordenadas están dentro de las estaciones cargadas desde la API
-    return any(est["latitud"] == lat and est["lon"] == lon for est in self.estaciones)
+    # Validar si las coordenadas corresponden (con una tolerancia de metros) a una estación cargada
+    return self.estaciones.buscar_por_coordenadas(lat, lon) is not None
 
 
 
@@ -30,20 +60,24 @@ class RouteApp:
 
     Atributos:
         root (tk.Tk): La ventana principal de la aplicación.
-        estaciones (list): Lista de estaciones cargadas desde la API.
+        estaciones (StationStore): Estaciones cargadas desde la API.
         grafo (networkx.Graph): Grafo de estaciones.
         lista_estaciones (list): Lista de nombres de estaciones.
         origen_cb (AutocompleteCombobox): Combobox para seleccionar la estación de origen.
         destino_cb (AutocompleteCombobox): Combobox para seleccionar la estación de destino.
         buscar_btn (ttk.Button): Botón para buscar la ruta.
         resultado_text (tk.Text): Área de texto para mostrar los resultados de la búsqueda.
+        tareas (EjecutorTareas): Ejecutor de los trabajos pesados en segundo plano.
+        depuracion_text (tk.Text): Tiempos y contadores medidos (solo con `depuracion`).
     """
-    def __init__(self, root):
+    def __init__(self, root, depuracion=False):
         """
         Inicializa la aplicación de rutas.
 
         Parámetros:
             root (tk.Tk): La ventana principal de la aplicación.
+            depuracion (bool): Si es True, agrega la pestaña "Depuración" con las
+                mediciones de `src.utils.perfilado`.
         """
         self.root = root
         self.root.title("Sistema Experto de Rutas Transmilenio")
@@ -70,23 +104,12 @@ class RouteApp:
         self.root.configure(bg='lightblue')
         self.root.resizable(False, False)
 
-        # Cargar datos desde la API
-        try:
-            load_dotenv()  # Carga desde .env
-
-            API_URL = os.getenv("API_TRANSMILENIO")
+        self.estaciones = StationStore()
+        self.grafo = None
+        self.lista_estaciones = []
+        self.tarea_carga = None
 
-            if not API_URL:
-                raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
-
-            self.estaciones = cargar_estaciones_api(API_URL)
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo cargar las estaciones:\n{e}")
-            self.root.destroy()
-            return
-
-        self.grafo = construir_grafo_estaciones(self.estaciones, umbral_km=1.0)
-        self.lista_estaciones = sorted([est["nombre"] for est in self.estaciones])
+        self.init_barra_estado()
 
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -103,6 +126,108 @@ class RouteApp:
         self.init_tab_prediccion()
         self.init_tab_mapa()
 
+        if depuracion:
+            self.tab_depuracion = ttk.Frame(self.notebook)
+            self.notebook.add(self.tab_depuracion, text="Depuración")
+            self.init_tab_depuracion()
+            self.notebook.bind("<<NotebookTabChanged>>", lambda _: self.actualizar_depuracion())
+
+        # Los trabajos pesados corren en segundo plano para no congelar la ventana
+        self.tareas = EjecutorTareas(self.root, al_cambiar=self.actualizar_barra_estado)
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.botones_con_datos = [self.buscar_btn, self.pred_btn, self.ver_mapa_btn]
+        self.cargar_datos()
+
+    def init_barra_estado(self):
+        frame = ttk.Frame(self.root, padding=(10, 2))
+        frame.pack(fill=tk.X, side=tk.BOTTOM)
+
+        self.estado_label = ttk.Label(frame, text="")
+        self.estado_label.pack(side=tk.LEFT)
+
+        self.cancelar_btn = ttk.Button(frame, text="Cancelar", command=self.cancelar_tareas)
+        self.reintentar_btn = ttk.Button(frame, text="Reintentar", command=self.cargar_datos)
+        self.progreso = ttk.Progressbar(frame, mode="indeterminate", length=160)
+        self.progreso_visible = False
+
+    def actualizar_barra_estado(self, pendientes):
+        """
+        Muestra u oculta el indicador de progreso según las tareas en curso.
+
+        Parámetros:
+            pendientes (list): Tareas en segundo plano que aún no terminan.
+        """
+        if pendientes:
+            self.estado_label.config(text=f"⏳ {pendientes[-1].descripcion}...")
+            if not self.progreso_visible:
+                self.progreso_visible = True
+                self.cancelar_btn.pack(side=tk.RIGHT)
+                self.progreso.pack(side=tk.RIGHT, padx=5)
+                self.progreso.start(15)
+        elif self.progreso_visible:
+            self.progreso_visible = False
+            self.progreso.stop()
+            self.progreso.pack_forget()
+            self.cancelar_btn.pack_forget()
+            self.estado_label.config(text="")
+
+    def cancelar_tareas(self):
+        self.tareas.cancelar_todas()
+        self.kmeans_btn.config(state=tk.NORMAL)
+        self.arbol_btn.config(state=tk.NORMAL)
+        if self.grafo is None:
+            # Sin estaciones la aplicación no sirve: se ofrece volver a cargarlas
+            self.ofrecer_reintento()
+            return
+        for boton in self.botones_con_datos:
+            boton.config(state=tk.NORMAL)
+        self.estado_label.config(text="Operación cancelada.")
+
+    def ofrecer_reintento(self):
+        """
+        Muestra "Reintentar" cuando la carga cancelada terminó de verdad.
+
+        La descarga en curso no se puede interrumpir; reintentar antes de que acabe
+        pondría dos cargas a escribir las mismas cachés a la vez.
+        """
+        if self.tarea_carga is not None and not self.tarea_carga.terminada:
+            self.estado_label.config(text="Cancelando la carga de estaciones...")
+            self.root.after(INTERVALO_REINTENTO_MS, self.ofrecer_reintento)
+            return
+        self.estado_label.config(text="Carga de estaciones cancelada.")
+        self.reintentar_btn.pack(side=tk.RIGHT)
+
+    def cerrar(self):
+        self.tareas.cerrar()
+        self.root.destroy()
+
+    def cargar_datos(self):
+        """
+        Carga las estaciones desde la API y construye el grafo en segundo plano.
+        Los botones que dependen de los datos se habilitan al terminar.
+        """
+        self.reintentar_btn.pack_forget()
+        for boton in self.botones_con_datos:
+            boton.config(state=tk.DISABLED)
+        self.tarea_carga = self.tareas.enviar(_cargar_estaciones_y_grafo,
+                                              al_terminar=self.datos_cargados,
+                                              al_fallar=self.error_carga_datos,
+                                              descripcion="Cargando estaciones",
+                                              pasar_tarea=True)
+
+    def datos_cargados(self, resultado):
+        self.estaciones, self.grafo = resultado
+        self.lista_estaciones = sorted(self.estaciones.nombres)
+        for combo in (self.origen_cb, self.destino_cb, self.estacion_cb):
+            combo.set_completion_list(self.lista_estaciones)
+        for boton in self.botones_con_datos:
+            boton.config(state=tk.NORMAL)
+        self.estado_label.config(text=f"✅ {len(self.estaciones)} estaciones cargadas.")
+
+    def error_carga_datos(self, error):
+        messagebox.showerror("Error", f"No se pudo cargar las estaciones:\n{error}")
+        self.cerrar()
+
     def init_tab_rutas(self):
         frame = ttk.Frame(self.tab_rutas, padding=10)
         frame.pack(fill=tk.BOTH, expand=True)
@@ -113,12 +238,10 @@ class RouteApp:
 
         ttk.Label(frame, text="Estación de Origen: ").grid(row=2, column=0, sticky=tk.W)
         self.origen_cb = AutocompleteCombobox(frame, width=50)
-        self.origen_cb.set_completion_list(self.lista_estaciones)
         self.origen_cb.grid(row=2, column=1, padx=5, pady=5)
 
         ttk.Label(frame, text="Estación de Destino: ").grid(row=3, column=0, sticky=tk.W)
         self.destino_cb = AutocompleteCombobox(frame, width=50)
-        self.destino_cb.set_completion_list(self.lista_estaciones)
         self.destino_cb.grid(row=3, column=1, padx=5, pady=5)
 
         # Divider
@@ -169,7 +292,7 @@ class RouteApp:
 
         self.arbol_btn = ttk.Button(frame, text="Ver Árbol de Decisión", command=self.mostrar_arbol_decision)
         self.arbol_btn.grid(row=9, column=0, columnspan=2, pady=10)
-        ttk.Label(frame, text="🌳 Muestra el árbol de decisión utilizado para la predicción.").grid(row=10, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(frame, text="🌳 Muestra un árbol de decisión que explica cómo se separan las troncales.").grid(row=10, column=0, columnspan=2, sticky=tk.W)
 
         self.kmeans_btn = ttk.Button(frame, text="Ver Agrupamiento KMeans", command=self.mostrar_agrupamiento_kmeans)
         self.kmeans_btn.grid(row=11, column=0, columnspan=2, pady=10)
@@ -190,7 +313,6 @@ class RouteApp:
 
         ttk.Label(frame, text="Selecciona una estación:").grid(row=0, column=0, sticky=tk.W)
         self.estacion_cb = AutocompleteCombobox(frame, width=50)
-        self.estacion_cb.set_completion_list(self.lista_estaciones)
         self.estacion_cb.grid(row=0, column=1, padx=5, pady=5)
 
         self.ver_mapa_btn = ttk.Button(frame, text="Ver en Google Maps", command=self.mostrar_en_mapa)
@@ -199,6 +321,42 @@ class RouteApp:
         self.mapa_text = tk.Text(frame, wrap=tk.WORD, width=80, height=12)
         self.mapa_text.grid(row=2, column=0, columnspan=2, pady=10)
 
+    def init_tab_depuracion(self):
+        frame = ttk.Frame(self.tab_depuracion, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="⏱️ Tiempos y contadores de las operaciones:").grid(row=0, column=0, columnspan=3, sticky=tk.W, pady=(0, 5))
+
+        self.depuracion_text = tk.Text(frame, wrap=tk.NONE, width=100, height=26, font=("Courier", 8))
+        self.depuracion_text.grid(row=1, column=0, columnspan=3, pady=10)
+
+        ttk.Button(frame, text="Actualizar", command=self.actualizar_depuracion).grid(row=2, column=0, pady=5)
+        ttk.Button(frame, text="Reiniciar", command=self.reiniciar_depuracion).grid(row=2, column=1, pady=5)
+        ttk.Button(frame, text="Guardar en disco", command=self.volcar_depuracion).grid(row=2, column=2, pady=5)
+
+    def actualizar_depuracion(self):
+        """Muestra las mediciones actuales y las estadísticas de la caché de rutas."""
+        self.depuracion_text.config(state=tk.NORMAL)
+        self.depuracion_text.delete(1.0, tk.END)
+        self.depuracion_text.insert(tk.END, perfilado.informe())
+        estadisticas = CACHE_RUTAS.estadisticas()
+        self.depuracion_text.insert(tk.END, "\n\nCaché de rutas: " + ", ".join(
+            f"{clave} {valor:.2f}" if isinstance(valor, float) else f"{clave} {valor}"
+            for clave, valor in estadisticas.items()))
+        self.depuracion_text.config(state=tk.DISABLED)
+
+    def reiniciar_depuracion(self):
+        perfilado.reiniciar()
+        self.actualizar_depuracion()
+
+    def volcar_depuracion(self):
+        try:
+            rutas = perfilado.volcar()
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudieron guardar las mediciones:\n{e}")
+            return
+        messagebox.showinfo("Mediciones guardadas", "\n".join(rutas))
+
     def calcular_ruta(self):
         """
         Calcula la mejor ruta entre las estaciones seleccionadas y muestra el resultado.
@@ -248,16 +406,12 @@ class RouteApp:
             lat = float(self.lat_entry.get())
             lon = float(self.lon_entry.get())
             if validate_lat_lon(self,lat, lon):
-                troncal = predecir_troncal_por_coords(lat, lon)
-                self.pred_text.insert(tk.END, f"Predicción de troncal para ({lat}, {lon}):\n")
-                self.pred_text.insert(tk.END, f"➡️ Troncal: {troncal}\n")
-                # Cargar el codificador para ver las etiquetas originales
-                encoder = joblib.load("resources/label_encoder_troncal.pkl")
-                self.pred_text.insert(tk.END, f"➡️ Etiquetas originales: {encoder.classes_}\n")
-                self.pred_text.insert(tk.END, "✅ Predicción realizada con éxito.")
-
-                # Exportar estaciones a CSV
-                exportar_estaciones_csv(self.estaciones, "resources/estaciones_transmilenio.csv")
+                # La primera predicción carga el modelo desde disco: se hace en segundo plano
+                self.pred_btn.config(state=tk.DISABLED)
+                self.tareas.enviar(_predecir_con_etiquetas, lat, lon,
+                                   al_terminar=lambda r: self.prediccion_lista(lat, lon, *r),
+                                   al_fallar=self.error_prediccion,
+                                   descripcion="Prediciendo troncal")
             else:
                 self.pred_text.insert(tk.END, "❌ Coordenadas inválidas. Ingresa una latitud entre -90 y 90 y una longitud entre -180 y 180.")
         except ValueError:
@@ -265,13 +419,40 @@ class RouteApp:
 
         self.pred_text.config(state=tk.DISABLED)
 
+    def prediccion_lista(self, lat, lon, troncal, etiquetas):
+        self.pred_btn.config(state=tk.NORMAL)
+        self.pred_text.config(state=tk.NORMAL)
+        self.pred_text.insert(tk.END, f"Predicción de troncal para ({lat}, {lon}):\n")
+        self.pred_text.insert(tk.END, f"➡️ Troncal: {troncal}\n")
+        self.pred_text.insert(tk.END, f"➡️ Etiquetas originales: {etiquetas}\n")
+        self.pred_text.insert(tk.END, "✅ Predicción realizada con éxito.")
+        self.pred_text.config(state=tk.DISABLED)
+
+    def error_prediccion(self, error):
+        self.pred_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"No se pudo predecir la troncal:\n{error}")
+
     def mostrar_arbol_decision(self):
         """
-        Muestra el árbol de decisión en un pop-up.
+        Muestra el árbol de decisión explicativo en un pop-up.
+
+        Se reutiliza la imagen guardada mientras esté vigente; si falta o quedó
+        desactualizada se dibuja en segundo plano (ver `generar_arbol_decision`).
         """
+        self.arbol_btn.config(state=tk.DISABLED)
+        self.tareas.enviar(generar_arbol_decision,
+                           al_terminar=self.abrir_arbol_decision,
+                           al_fallar=self.error_arbol_decision,
+                           descripcion="Generando árbol de decisión")
+
+    def error_arbol_decision(self, error):
+        self.arbol_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"No se pudo cargar el árbol de decisión:\n{error}")
+
+    def abrir_arbol_decision(self, arbol_path):
+        self.arbol_btn.config(state=tk.NORMAL)
         try:
             # Cargar la imagen del árbol de decisión
-            arbol_path = "resources/arbol_decision.png"
             arbol_img = Image.open(arbol_path)
             arbol_img = arbol_img.resize((600, 400), Image.Resampling.LANCZOS)  # Redimensionar si es necesario
             arbol_tk = ImageTk.PhotoImage(arbol_img)
@@ -287,7 +468,9 @@ class RouteApp:
             label.pack()
 
             # Agregar una descripción debajo de la imagen
-            descripcion = tk.Label(arbol_window, text="Este es el árbol de decisión generado por el modelo.",
+            descripcion = tk.Label(arbol_window,
+                                   text="Árbol explicativo: primer árbol de un bosque podado entrenado con las "
+                                        "mismas estaciones.\nNo es el modelo que hace las predicciones.",
                                    font=("Arial", 10))
             descripcion.pack(pady=10)
 
@@ -297,16 +480,27 @@ class RouteApp:
     def mostrar_agrupamiento_kmeans(self):
         """
         Muestra la imagen del agrupamiento KMeans en un pop-up.
+
+        Si la imagen no existe, el agrupamiento se calcula en segundo plano.
         """
+        if os.path.exists(RUTA_AGRUPAMIENTO):
+            self.abrir_agrupamiento_kmeans()
+            return
+        self.kmeans_btn.config(state=tk.DISABLED)
+        self.tareas.enviar(realizar_agrupamiento_kmeans,
+                           al_terminar=lambda _: self.abrir_agrupamiento_kmeans(),
+                           al_fallar=self.error_agrupamiento_kmeans,
+                           descripcion="Calculando agrupamiento KMeans")
+
+    def error_agrupamiento_kmeans(self, error):
+        self.kmeans_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Error", f"No se pudo cargar el agrupamiento KMeans:\n{error}")
+
+    def abrir_agrupamiento_kmeans(self):
+        self.kmeans_btn.config(state=tk.NORMAL)
         try:
-            # Verificar si el archivo existe
-            if not os.path.exists("resources/agrupamiento_kmeans.png"):
-                realizar_agrupamiento_kmeans()
-
-
             # Cargar la imagen del agrupamiento KMeans
-            agrupamiento_path = "resources/agrupamiento_kmeans.png"
-            agrupamiento_img = Image.open(agrupamiento_path)
+            agrupamiento_img = Image.open(RUTA_AGRUPAMIENTO)
             agrupamiento_img = agrupamiento_img.resize((600, 400), Image.Resampling.LANCZOS)  # Redimensionar si es necesario
             agrupamiento_tk = ImageTk.PhotoImage(agrupamiento_img)
 
@@ -333,7 +527,7 @@ class RouteApp:
         self.mapa_text.config(state=tk.NORMAL)
         self.mapa_text.delete(1.0, tk.END)
 
-        estacion = next((e for e in self.estaciones if e["nombre"] == estacion_nombre), None)
+        estacion = self.estaciones.buscar(estacion_nombre)
 
         if not estacion:
             self.mapa_text.insert(tk.END, "No se encontró la estación seleccionada.")
@@ -1,5 +1,89 @@
+import unicodedata
 from tkinter import ttk
 
+RETARDO_FILTRO_MS = 120  # Espera tras la última tecla antes de filtrar
+MAX_RESULTADOS = 200  # Elementos mostrados como máximo en la lista desplegable
+LONGITUD_GRAMA = 3
+
+
+def normalizar_texto(texto):
+    """
+    Pasa el texto a minúsculas y le quita las tildes, para comparar sin acentos.
+
+    Parámetros:
+        - texto (str): Texto a normalizar.
+
+    Retorna:
+        str: Texto normalizado (por ejemplo, "Campín" -> "campin").
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class IndiceBusqueda:
+    """
+    Índice de trigramas para filtrar una lista por subcadena, sin distinguir tildes.
+
+    Se construye una sola vez: cada fragmento de hasta tres caracteres apunta a los
+    elementos que lo contienen. Una consulta solo revisa los elementos del fragmento
+    menos frecuente de la consulta, y si la consulta amplía la anterior (se siguió
+    escribiendo) se filtran únicamente los resultados previos.
+
+    Atributos:
+        elementos (list): Elementos indexados, en el orden en que se devuelven.
+    """
+
+    def __init__(self, elementos):
+        """
+        Parámetros:
+            - elementos (list): Elementos (cadenas) a indexar.
+        """
+        self.elementos = list(elementos)
+        self._normalizados = [normalizar_texto(e) for e in self.elementos]
+        indice = {}
+        for i, texto in enumerate(self._normalizados):
+            gramas = set()
+            for n in range(1, LONGITUD_GRAMA + 1):
+                gramas.update(texto[k:k + n] for k in range(len(texto) - n + 1))
+            for grama in gramas:
+                indice.setdefault(grama, []).append(i)
+        self._indice = indice
+        self._ultima_consulta = ""
+        self._ultimos = range(len(self.elementos))
+
+    def buscar(self, consulta, limite=None):
+        """
+        Filtra los elementos que contienen la consulta (sin tildes ni mayúsculas).
+
+        Parámetros:
+            - consulta (str): Texto a buscar.
+            - limite (int, opcional): Número máximo de resultados.
+
+        Retorna:
+            list: Elementos que coinciden, en el orden original.
+        """
+        consulta = normalizar_texto(consulta.strip())
+        if not consulta:
+            coincidencias = range(len(self.elementos))
+        else:
+            candidatos = self._candidatos(consulta)
+            coincidencias = [i for i in candidatos if consulta in self._normalizados[i]]
+        self._ultima_consulta, self._ultimos = consulta, coincidencias
+        if limite is not None:
+            coincidencias = coincidencias[:limite]
+        return [self.elementos[i] for i in coincidencias]
+
+    def _candidatos(self, consulta):
+        if len(consulta) <= LONGITUD_GRAMA:
+            candidatos = self._indice.get(consulta, [])
+        else:
+            gramas = (consulta[k:k + LONGITUD_GRAMA] for k in range(len(consulta) - LONGITUD_GRAMA + 1))
+            candidatos = min((self._indice.get(g, []) for g in gramas), key=len)
+        # Refinamiento incremental: si se siguió escribiendo, basta con los resultados previos
+        if self._ultima_consulta and self._ultima_consulta in consulta and len(self._ultimos) < len(candidatos):
+            return self._ultimos
+        return candidatos
+
 
 class AutocompleteCombobox(ttk.Combobox):
 
@@ -16,37 +100,48 @@ class AutocompleteCombobox(ttk.Combobox):
         self.handle_focusin = None
         self._completion_list = []
         self._original_values = []
+        self._indice = IndiceBusqueda([])
+        self._filtro_pendiente = None
+        self._ultimo_valor = None
         self.bind('<FocusIn>', self.handle_focusin)
         self.bind('<FocusOut>', self.handle_focusout)
 
     def set_completion_list(self, completion_list):
         """
-        Establece la lista de elementos para autocompletar.
+        Establece la lista de elementos para autocompletar y construye su índice de búsqueda.
 
         Parámetros:
             - completion_list (list): Lista de elementos para autocompletar.
         """
         self._completion_list = sorted(completion_list, key=str.lower)
-        self['values'] = self._completion_list
+        self._indice = IndiceBusqueda(self._completion_list)
+        self._ultimo_valor = None
+        self['values'] = self._completion_list[:MAX_RESULTADOS]
         self.bind('<KeyRelease>', self.handle_keyrelease)
 
     def handle_keyrelease(self, event):
         """
         Maneja el evento de liberación de tecla para actualizar la lista de autocompletar.
 
+        El filtrado se agrupa: solo se ejecuta cuando pasan `RETARDO_FILTRO_MS` sin
+        nuevas teclas.
+
         Parámetros:
             - event (tkinter.Event): Evento de liberación de tecla.
         """
         if event.keysym in ("Left", "Right", "Up", "Down", "Return"):
             return
-        value = self.get().strip().lower()
-        if value == '':
-            data = self._completion_list
-        else:
-            data = [item for item in self._completion_list if value in item.lower()]
+        if self._filtro_pendiente is not None:
+            self.after_cancel(self._filtro_pendiente)
+        self._filtro_pendiente = self.after(RETARDO_FILTRO_MS, self._filtrar)
+
+    def _filtrar(self):
+        self._filtro_pendiente = None
+        value = self.get().strip()
+        if value == self._ultimo_valor:
+            return
+        self._ultimo_valor = value
+        data = self._indice.buscar(value, limite=MAX_RESULTADOS)
         self['values'] = data
         if data:
-            self.after(
-                700,
-                lambda: self.event_generate('<Down>'),
-            )
+            self.event_generate('<Down>')
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+INTERVALO_SONDEO_MS = 16  # ~60 fps: la GUI nunca espera más de un cuadro por un resultado
+
+
+class Tarea:
+    """
+    Trabajo enviado al ejecutor en segundo plano.
+
+    Atributos:
+        descripcion (str): Texto que se muestra mientras la tarea está en curso.
+        cancelada (threading.Event): Se activa al cancelar. Las funciones que reciben
+            la tarea pueden consultarla para detenerse antes de tiempo.
+    """
+
+    def __init__(self, descripcion, al_terminar, al_fallar):
+        self.descripcion = descripcion
+        self.cancelada = threading.Event()
+        self._al_terminar = al_terminar
+        self._al_fallar = al_fallar
+        self._future = None
+
+    def cancelar(self):
+        """Cancela la tarea: si no ha empezado no se ejecuta y su resultado se descarta."""
+        self.cancelada.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def terminada(self):
+        return self._future is not None and self._future.done()
+
+
+class EjecutorTareas:
+    """
+    Ejecuta funciones costosas fuera del hilo de Tkinter.
+
+    Los trabajos corren en un `ThreadPoolExecutor` y sus resultados se revisan con
+    `root.after`, de modo que las funciones `al_terminar` y `al_fallar` siempre se
+    llaman desde el hilo principal, el único que puede tocar los widgets.
+
+    Atributos:
+        root (tk.Tk): Ventana principal de la aplicación.
+        pendientes (list): Tareas enviadas que aún no han entregado su resultado.
+    """
+
+    def __init__(self, root, max_hilos=2, al_cambiar=None):
+        """
+        Parámetros:
+            - root (tk.Tk): Ventana principal de la aplicación.
+            - max_hilos (int): Número máximo de tareas ejecutándose a la vez.
+            - al_cambiar (callable, opcional): Se llama (en el hilo de Tkinter) cada vez
+              que una tarea empieza o termina, para actualizar indicadores de progreso.
+        """
+        self.root = root
+        self.pendientes = []
+        self._al_cambiar = al_cambiar
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="tarea-gui")
+        self._sondeo = None
+        self._cerrado = False
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=None, descripcion="",
+               pasar_tarea=False):
+        """
+        Envía una función para ejecutarla en segundo plano.
+
+        Parámetros:
+            - funcion (callable): Trabajo a ejecutar.
+            - *args: Argumentos posicionales de `funcion`.
+            - al_terminar (callable, opcional): Recibe el resultado de `funcion`.
+            - al_fallar (callable, opcional): Recibe la excepción lanzada por `funcion`.
+            - descripcion (str): Texto descriptivo de la tarea.
+            - pasar_tarea (bool): Si es True, `funcion` recibe la tarea como argumento
+              `tarea=` para poder consultar `tarea.cancelada`.
+
+        Retorna:
+            Tarea: La tarea creada, que puede cancelarse con `tarea.cancelar()`.
+        """
+        if self._cerrado:
+            raise RuntimeError("El ejecutor de tareas ya fue cerrado")
+        tarea = Tarea(descripcion, al_terminar, al_fallar)
+        kwargs = {"tarea": tarea} if pasar_tarea else {}
+        tarea._future = self._pool.submit(funcion, *args, **kwargs)
+        self.pendientes.append(tarea)
+        self._notificar()
+        self._programar_sondeo()
+        return tarea
+
+    def cancelar_todas(self):
+        """Cancela todas las tareas pendientes; sus resultados nunca se entregan."""
+        canceladas, self.pendientes = self.pendientes, []
+        for tarea in canceladas:
+            tarea.cancelar()
+        if canceladas:
+            self._notificar()
+
+    def cerrar(self):
+        """Cancela lo pendiente y libera los hilos sin bloquear la interfaz."""
+        self._cerrado = True
+        self.cancelar_todas()
+        if self._sondeo is not None:
+            try:
+                self.root.after_cancel(self._sondeo)
+            except Exception:
+                pass
+            self._sondeo = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _programar_sondeo(self):
+        if self._sondeo is None and not self._cerrado:
+            self._sondeo = self.root.after(INTERVALO_SONDEO_MS, self._revisar)
+
+    def _revisar(self):
+        self._sondeo = None
+        terminadas = [t for t in self.pendientes if t.terminada or t.cancelada.is_set()]
+        for tarea in terminadas:
+            self.pendientes.remove(tarea)
+        if terminadas:
+            self._notificar()
+        for tarea in terminadas:
+            self._entregar(tarea)
+        if self.pendientes:
+            self._programar_sondeo()
+
+    def _entregar(self, tarea):
+        if tarea.cancelada.is_set():
+            return
+        error = tarea._future.exception()
+        if error is not None:
+            if tarea._al_fallar:
+                tarea._al_fallar(error)
+        elif tarea._al_terminar:
+            tarea._al_terminar(tarea._future.result())
+
+    def _notificar(self):
+        if self._al_cambiar:
+            self._al_cambiar(list(self.pendientes))
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+CAPACIDAD_CACHE_RUTAS = 10000  # Resultados guardados como máximo
+TTL_CACHE_RUTAS_SEGUNDOS = 60 * 60  # Una hora
+
+
+class CacheRutas:
+    """
+    Caché LRU con vencimiento para resultados de búsquedas de rutas.
+
+    Cuando se llena, descarta el resultado usado hace más tiempo; además, un resultado
+    guardado hace más de `ttl_segundos` se trata como ausente. Es segura para varios
+    hilos. Las claves deben incluir la versión del grafo, de modo que un grafo nuevo o
+    modificado nunca reutilice resultados de otro.
+
+    Atributos:
+        capacidad (int): Número máximo de resultados guardados.
+        ttl_segundos (float): Vigencia de cada resultado, o None si no vencen.
+        aciertos (int): Consultas respondidas desde la caché.
+        fallos (int): Consultas que no estaban en la caché (o habían vencido).
+        desalojos (int): Resultados descartados por falta de espacio.
+        vencidos (int): Resultados descartados por vencimiento.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE_RUTAS, ttl_segundos=TTL_CACHE_RUTAS_SEGUNDOS):
+        """
+        Parámetros:
+            - capacidad (int): Número máximo de resultados guardados.
+            - ttl_segundos (float, opcional): Vigencia de cada resultado. None para no vencer.
+
+        Lanza:
+            ValueError: Si la capacidad no es positiva.
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad de la caché debe ser mayor que cero")
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vencidos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    def obtener(self, clave):
+        """
+        Retorna:
+            tuple: (True, valor) si la clave está vigente en la caché, o (False, None).
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                guardado, valor = entrada
+                if self.ttl_segundos is None or time.monotonic() - guardado < self.ttl_segundos:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return True, valor
+                del self._datos[clave]
+                self.vencidos += 1
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def descartar(self, condicion):
+        """
+        Descarta los resultados cuya clave cumple `condicion` (por ejemplo, los de una
+        versión de grafo que ya no se usará).
+
+        Parámetros:
+            - condicion (callable): Recibe una clave y retorna True si hay que descartarla.
+
+        Retorna:
+            int: Número de resultados descartados.
+        """
+        with self._lock:
+            claves = [clave for clave in self._datos if condicion(clave)]
+            for clave in claves:
+                del self._datos[clave]
+            return len(claves)
+
+    def limpiar(self):
+        """Descarta todos los resultados guardados (los contadores se conservan)."""
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        """
+        Retorna:
+            dict: Tamaño, capacidad y contadores de aciertos, fallos, desalojos y vencidos.
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "tamano": len(self._datos),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "vencidos": self.vencidos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
@@ -1,37 +1,447 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.logic.estaciones import StationStore
+from src.utils.archivos import escritura_atomica
+from src.utils.json_stream import iterar_arreglo_json
+from src.utils.perfilado import contar, medir
+
+DIRECTORIO_CACHE = "resources/cache"
+TTL_CACHE_SEGUNDOS = 24 * 60 * 60  # Un día
+TAM_BLOQUE = 64 * 1024  # Bytes leídos por bloque al procesar el GeoJSON en flujo
+TAM_PAGINA = 1000  # Features por página en las capas ArcGIS paginadas
+MAX_CONCURRENCIA = 4  # Páginas descargadas a la vez
+TIEMPO_ESPERA = (5, 30)  # Segundos para conectar y para recibir cada bloque
+REINTENTOS = 3
+FACTOR_ESPERA_REINTENTO = 0.5  # Espera exponencial entre reintentos: 0.5 s, 1 s, 2 s...
+_ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+
+_sesion = None
+_lock_sesion = threading.Lock()
 
 
-def cargar_estaciones_api(url):
+@medir()
+def cargar_estaciones_api(url, usar_cache=True, ttl_segundos=None, directorio_cache=None, tam_pagina=None):
     """
     Carga las estaciones desde una API y las convierte en una lista de diccionarios.
 
+    El GeoJSON se procesa en flujo (ver `iterar_estaciones`), así que nunca se tiene
+    en memoria el documento completo junto con la lista de estaciones.
+
+    Por defecto la respuesta se guarda en una caché local en disco:
+        - Si la copia local tiene menos de `ttl_segundos`, se usa sin tocar la red.
+        - Si está vencida, se revalida con `If-None-Match` / `If-Modified-Since`;
+          ante un 304 se reutiliza la copia local y se renueva su vigencia.
+        - Si la API no responde, se usa la última copia válida guardada.
+
+    Las peticiones usan una sesión HTTP compartida (conexiones reutilizadas, tiempo
+    de espera y reintentos con espera exponencial, ver `obtener_sesion`).
+
     Parámetros:
         - url (str): La URL de la API desde donde se cargarán las estaciones.
+        - usar_cache (bool): Si es False, siempre descarga y no lee ni escribe la caché.
+        - ttl_segundos (float, opcional): Vigencia de la caché. Por defecto se toma de la
+          variable de entorno `CACHE_TTL_ESTACIONES` o, si no existe, un día.
+        - directorio_cache (str, opcional): Carpeta de la caché. Por defecto se toma de la
+          variable de entorno `CACHE_DIR_ESTACIONES` o `resources/cache`.
+        - tam_pagina (int, opcional): Si se indica, la capa se descarga por páginas de
+          ese tamaño en paralelo (ver `descargar_estaciones_paralelo`). En este modo no
+          se revalida con `If-None-Match`, porque cada página es una respuesta distinta.
 
     Retorna:
         list: Una lista de diccionarios con la información de las estaciones.
 
     Lanza:
-        Exception: Si ocurre un error al llamar a la API o al procesar los datos.
+        Exception: Si ocurre un error al llamar a la API o al procesar los datos y no
+        hay una copia local disponible.
     """
+    if not usar_cache:
+        try:
+            if tam_pagina:
+                return descargar_estaciones_paralelo(url, tam_pagina)
+            with _descargar(url, stream=True) as response:
+                return list(_estaciones_de_respuesta(response))
+        except Exception as e:
+            raise Exception(f"Error al llamar a la API: {e}")
+
+    ttl_segundos, directorio_cache = _configuracion_cache(ttl_segundos, directorio_cache)
+    ruta_cache = _ruta_cache(url, directorio_cache)
+    copia = _leer_cache(ruta_cache)
+    if copia and time.time() - copia["guardado"] < ttl_segundos:
+        contar("data.cache_vigente")
+        return copia["estaciones"]
+
+    encabezados = {}
+    if copia and copia.get("etag") and not tam_pagina:
+        encabezados["If-None-Match"] = copia["etag"]
+    if copia and copia.get("last_modified") and not tam_pagina:
+        encabezados["If-Modified-Since"] = copia["last_modified"]
+
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        if tam_pagina:
+            estaciones = descargar_estaciones_paralelo(url, tam_pagina)
+            validadores = {}
+        else:
+            with _descargar(url, encabezados, stream=True) as response:
+                if response.status_code == 304 and copia:
+                    contar("data.cache_revalidada")
+                    copia["guardado"] = time.time()
+                    _guardar_cache(ruta_cache, copia)
+                    return copia["estaciones"]
+                estaciones = list(_estaciones_de_respuesta(response))
+                validadores = response.headers
     except Exception as e:
+        if copia:
+            contar("data.cache_sin_red")
+            print(f"⚠️ Usando la última copia local de estaciones: {e}")
+            return copia["estaciones"]
         raise Exception(f"Error al llamar a la API: {e}")
 
+    _guardar_cache(ruta_cache, {
+        "url": url,
+        "guardado": time.time(),
+        "etag": validadores.get("ETag"),
+        "last_modified": validadores.get("Last-Modified"),
+        "estaciones": estaciones,
+    })
+    return estaciones
+
+
+@medir()
+def cargar_estaciones(url, usar_cache=True, ttl_segundos=None, directorio_cache=None, tam_pagina=None):
+    """
+    Carga las estaciones como `StationStore`, usando un snapshot binario como caché.
+
+    Junto a la caché JSON de `cargar_estaciones_api` se guarda un snapshot binario
+    (ver `StationStore.guardar`). Mientras esté vigente se carga mapeándolo en memoria,
+    sin volver a interpretar JSON; si venció o no existe, se recurre a
+    `cargar_estaciones_api` y se regenera. El snapshot hereda la fecha de la caché
+    JSON, de modo que una copia antigua usada por falta de red no pasa por nueva.
+
+    Parámetros:
+        Los mismos que `cargar_estaciones_api`.
+
+    Retorna:
+        StationStore: Las estaciones indexadas.
+
+    Lanza:
+        Exception: Si ocurre un error al llamar a la API y no hay una copia local disponible.
+    """
+    if not usar_cache:
+        return StationStore(cargar_estaciones_api(url, usar_cache=False, tam_pagina=tam_pagina))
+
+    ttl_segundos, directorio_cache = _configuracion_cache(ttl_segundos, directorio_cache)
+    ruta_snapshot = _ruta_cache(url, directorio_cache, "snap")
+    try:
+        if time.time() - os.path.getmtime(ruta_snapshot) < ttl_segundos:
+            contar("data.snapshot_vigente")
+            return StationStore.cargar(ruta_snapshot)
+    except (OSError, ValueError):
+        pass  # Sin snapshot o ilegible: se regenera
+
+    estaciones = StationStore(cargar_estaciones_api(url, True, ttl_segundos, directorio_cache, tam_pagina))
+    try:
+        estaciones.guardar(ruta_snapshot)
+        guardado = os.path.getmtime(_ruta_cache(url, directorio_cache))
+        os.utime(ruta_snapshot, (guardado, guardado))
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el snapshot de estaciones: {e}")
+    return estaciones
+
+
+def iterar_estaciones(fuente, tam_bloque=TAM_BLOQUE):
+    """
+    Recorre las estaciones de un GeoJSON sin cargar el documento completo en memoria.
+
+    Los features se decodifican uno a uno a medida que llegan los bloques, y cada uno
+    se entrega ya normalizado (nombre, latitud, lon, troncal).
+
+    Parámetros:
+        - fuente (str | file): URL http(s), ruta de un archivo local o archivo abierto.
+        - tam_bloque (int): Tamaño en bytes de cada bloque leído.
+
+    Retorna:
+        generator: Diccionarios con la información de cada estación.
+    """
+    if hasattr(fuente, "read"):
+        yield from _estaciones_de_bloques(iter(lambda: fuente.read(tam_bloque), fuente.read(0)))
+    elif fuente.startswith(("http://", "https://")):
+        with _descargar(fuente, stream=True) as response:
+            yield from _estaciones_de_respuesta(response, tam_bloque)
+    else:
+        with open(fuente, "rb") as archivo:
+            yield from _estaciones_de_bloques(iter(lambda: archivo.read(tam_bloque), b""))
+
+
+def iterar_estaciones_paginadas(url, tam_pagina=TAM_PAGINA):
+    """
+    Recorre las estaciones de una capa ArcGIS FeatureServer página por página.
+
+    Usa los parámetros `resultOffset` y `resultRecordCount` de la consulta, de modo
+    que la memoria queda acotada por el tamaño de página y no por el de la capa.
+    Una página incompleta marca el final de la capa, salvo que el servidor indique
+    `exceededTransferLimit` (recortó la página a su `maxRecordCount`): entonces se
+    sigue pidiendo desde la última estación recibida.
+
+    Parámetros:
+        - url (str): URL de consulta de la capa (con `f=geojson`).
+        - tam_pagina (int): Número de features por página.
+
+    Retorna:
+        generator: Diccionarios con la información de cada estación.
+
+    Lanza:
+        ValueError: Si el servidor no respeta la paginación (ver `_validar_pagina`).
+    """
+    desplazamiento, primera_anterior = 0, None
+    while True:
+        recibidas, otros = 0, {}
+        with _descargar(url_pagina(url, desplazamiento, tam_pagina), stream=True) as response:
+            for estacion in _estaciones_de_respuesta(response, otros=otros):
+                recibidas += 1
+                primera = estacion if recibidas == 1 else None
+                _validar_pagina(recibidas, tam_pagina, primera, primera_anterior)
+                if primera is not None:
+                    primera_anterior = primera
+                yield estacion
+        if recibidas < tam_pagina and not (recibidas and _limite_excedido(otros)):
+            return
+        desplazamiento += recibidas
+
+
+def _validar_pagina(recibidas, tam_pagina, primera=None, primera_anterior=None):
+    """
+    Comprueba que el servidor respete `resultOffset` y `resultRecordCount`.
+
+    Un servidor que los ignora devuelve siempre la misma página (o más features de los
+    pedidos), y la descarga seguiría pidiendo páginas y repitiendo estaciones sin fin.
+
+    Parámetros:
+        - recibidas (int): Estaciones recibidas hasta ahora en la página.
+        - tam_pagina (int): Número de features pedidos por página.
+        - primera (dict, opcional): Primera estación de la página.
+        - primera_anterior (dict, opcional): Primera estación de la página anterior.
+
+    Lanza:
+        ValueError: Si la página trae más de `tam_pagina` features o empieza con la misma
+            estación que la página anterior.
+    """
+    if recibidas > tam_pagina:
+        raise ValueError(f"El servidor devolvió más de {tam_pagina} estaciones en una página: "
+                         "no respeta resultRecordCount")
+    if primera is not None and primera == primera_anterior:
+        raise ValueError("El servidor repitió la página anterior: no respeta resultOffset")
+
+
+@medir()
+def descargar_estaciones_paralelo(url, tam_pagina=TAM_PAGINA, max_concurrencia=MAX_CONCURRENCIA, sesion=None):
+    """
+    Descarga una capa ArcGIS FeatureServer pidiendo varias páginas a la vez.
+
+    Mantiene hasta `max_concurrencia` páginas en vuelo (por `resultOffset`) y las une
+    en orden de desplazamiento, de modo que el resultado es idéntico al de la descarga
+    secuencial sin importar en qué orden respondan. La primera página incompleta marca
+    el final de la capa; las páginas posteriores que ya se habían pedido se descartan.
+
+    `tam_pagina` no debe superar el `maxRecordCount` de la capa: el servidor recortaría
+    las páginas y los desplazamientos ya pedidos dejarían huecos. Si el servidor lo
+    indica con `exceededTransferLimit`, se lanza un error en lugar de devolver una
+    capa incompleta.
+
+    Parámetros:
+        - url (str): URL de consulta de la capa (con `f=geojson`).
+        - tam_pagina (int): Número de features por página.
+        - max_concurrencia (int): Máximo de páginas descargándose a la vez.
+        - sesion (requests.Session, opcional): Sesión a usar; por defecto la compartida.
+
+    Retorna:
+        list: Diccionarios con la información de cada estación, en el orden de la capa.
+
+    Lanza:
+        requests.RequestException: Si alguna página falla tras agotar los reintentos.
+        ValueError: Si el servidor recorta las páginas por superar su `maxRecordCount`
+            o no respeta la paginación (ver `_validar_pagina`).
+    """
+    if tam_pagina < 1 or max_concurrencia < 1:
+        raise ValueError("tam_pagina y max_concurrencia deben ser mayores que cero")
+    sesion = sesion or obtener_sesion()
+
+    def descargar_pagina(desplazamiento):
+        otros = {}
+        with _descargar(url_pagina(url, desplazamiento, tam_pagina), stream=True, sesion=sesion) as response:
+            pagina = list(_estaciones_de_respuesta(response, otros=otros))
+        _validar_pagina(len(pagina), tam_pagina)
+        if len(pagina) < tam_pagina and _limite_excedido(otros):
+            raise ValueError(f"El servidor recortó la página a {len(pagina)} estaciones: "
+                             f"tam_pagina ({tam_pagina}) supera su maxRecordCount")
+        return pagina
+
     estaciones = []
-    for feature in data.get("features", []):
-        props = feature.get("properties", {})
-        nombre = props.get("nombre_estacion", "Desconocida")
-        lat = props.get("latitud_estacion", 0)
-        lon = props.get("longitud_estacion", 0)
-        troncal = props.get("troncal_estacion", "Sin troncal")
-        estaciones.append({
-            "nombre": nombre,
-            "latitud": lat,
-            "lon": lon,
-            "troncal": troncal.strip().upper()
-        })
-    return estaciones
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as pool:
+        pendientes = deque()
+        siguiente, primera_anterior = 0, None
+        try:
+            while True:
+                while len(pendientes) < max_concurrencia:
+                    pendientes.append(pool.submit(descargar_pagina, siguiente))
+                    siguiente += tam_pagina
+                pagina = pendientes.popleft().result()
+                primera = pagina[0] if pagina else None
+                _validar_pagina(len(pagina), tam_pagina, primera, primera_anterior)
+                primera_anterior = primera
+                estaciones.extend(pagina)
+                if len(pagina) < tam_pagina:
+                    return estaciones
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+
+def obtener_sesion():
+    """
+    Sesión HTTP compartida por todas las descargas de estaciones.
+
+    Reutiliza conexiones (keep-alive) y reintenta los errores de conexión y las
+    respuestas 429/5xx con espera exponencial. Se crea en el primer uso.
+
+    Retorna:
+        requests.Session: La sesión compartida.
+    """
+    global _sesion
+    if _sesion is None:
+        with _lock_sesion:
+            if _sesion is None:
+                _sesion = crear_sesion()
+    return _sesion
+
+
+def crear_sesion(reintentos=REINTENTOS, factor_espera=FACTOR_ESPERA_REINTENTO, max_conexiones=MAX_CONCURRENCIA):
+    """
+    Crea una sesión HTTP con reintentos y un grupo de conexiones por servidor.
+
+    Parámetros:
+        - reintentos (int): Reintentos por petición ante fallos transitorios.
+        - factor_espera (float): Base de la espera exponencial entre reintentos.
+        - max_conexiones (int): Conexiones que se mantienen abiertas por servidor.
+
+    Retorna:
+        requests.Session: La sesión configurada.
+    """
+    politica = Retry(
+        total=reintentos,
+        backoff_factor=factor_espera,
+        status_forcelist=_ESTADOS_REINTENTABLES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+    )
+    adaptador = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones, max_retries=politica)
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def url_pagina(url, desplazamiento, tam_pagina):
+    """Agrega (o reemplaza) los parámetros de paginación de ArcGIS en una URL de consulta."""
+    partes = urlsplit(url)
+    params = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+              if k not in ("resultOffset", "resultRecordCount")]
+    params += [("resultOffset", str(desplazamiento)), ("resultRecordCount", str(tam_pagina))]
+    return urlunsplit(partes._replace(query=urlencode(params)))
+
+
+def cargar_estaciones_columnas(fuente, tam_pagina=None):
+    """
+    Carga estaciones en flujo directamente a un `StationStore` (arreglos por columna),
+    sin construir antes una lista de diccionarios.
+
+    Parámetros:
+        - fuente (str | file): URL http(s), ruta de un archivo local o archivo abierto.
+        - tam_pagina (int, opcional): Si se indica, `fuente` se trata como una URL de
+          ArcGIS FeatureServer y se descarga por páginas de ese tamaño.
+
+    Retorna:
+        StationStore: Las estaciones en almacenamiento columnar.
+    """
+    if tam_pagina:
+        return StationStore(iterar_estaciones_paginadas(fuente, tam_pagina))
+    return StationStore(iterar_estaciones(fuente))
+
+
+def _descargar(url, encabezados=None, stream=False, sesion=None):
+    response = (sesion or obtener_sesion()).get(url, headers=encabezados, stream=stream, timeout=TIEMPO_ESPERA)
+    response.raise_for_status()
+    return response
+
+
+def _estaciones_de_respuesta(response, tam_bloque=TAM_BLOQUE, otros=None):
+    return _estaciones_de_bloques(response.iter_content(chunk_size=tam_bloque), otros)
+
+
+def _estaciones_de_bloques(bloques, otros=None):
+    for feature in iterar_arreglo_json(bloques, "features", otros):
+        yield _normalizar_feature(feature)
+
+
+def _limite_excedido(otros):
+    """True si la respuesta indica que el servidor dejó features por fuera (en GeoJSON va en `properties`)."""
+    propiedades = otros.get("properties")
+    return bool(otros.get("exceededTransferLimit")
+                or (isinstance(propiedades, dict) and propiedades.get("exceededTransferLimit")))
+
+
+def _normalizar_feature(feature):
+    props = feature.get("properties", {})
+    nombre = props.get("nombre_estacion", "Desconocida")
+    lat = props.get("latitud_estacion", 0)
+    lon = props.get("longitud_estacion", 0)
+    troncal = props.get("troncal_estacion", "Sin troncal")
+    return {
+        "nombre": nombre,
+        "latitud": lat,
+        "lon": lon,
+        "troncal": troncal.strip().upper()
+    }
+
+
+def _configuracion_cache(ttl_segundos, directorio_cache):
+    if ttl_segundos is None:
+        ttl_segundos = float(os.getenv("CACHE_TTL_ESTACIONES", TTL_CACHE_SEGUNDOS))
+    if directorio_cache is None:
+        directorio_cache = os.getenv("CACHE_DIR_ESTACIONES", DIRECTORIO_CACHE)
+    return ttl_segundos, directorio_cache
+
+
+def _ruta_cache(url, directorio_cache, extension="json"):
+    clave = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directorio_cache, f"estaciones_{clave}.{extension}")
+
+
+def _leer_cache(ruta_cache):
+    try:
+        with open(ruta_cache, "r", encoding="utf-8") as f:
+            copia = json.load(f)
+        if isinstance(copia.get("estaciones"), list) and "guardado" in copia:
+            return copia
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _guardar_cache(ruta_cache, copia):
+    """Escribe la caché de forma atómica para no dejar archivos a medio escribir."""
+    try:
+        with escritura_atomica(ruta_cache) as temporal, open(temporal, "w", encoding="utf-8") as f:
+            json.dump(copia, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la caché de estaciones: {e}")
@@ -0,0 +1,328 @@
+import mmap
+import os
+import struct
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from src.utils.archivos import escritura_atomica
+from src.utils.spatial import IndiceEspacial
+
+CAMPOS = ("nombre", "latitud", "lon", "troncal")
+TOLERANCIA_COORDENADAS_KM = 0.01  # 10 metros
+_TAM_CELDA_KM = 1.0
+
+# Formato binario de `StationStore.guardar` (todos los valores en little-endian):
+#   encabezado de 64 bytes: firma, versión, n.º de estaciones, n.º de troncales,
+#   tamaño de la tabla de nombres y tamaño de la tabla de troncales;
+#   latitudes (f8[n]), longitudes (f8[n]), códigos de troncal (i4[n]),
+#   desplazamientos de nombres (u4[n+1]) y de troncales (u4[t+1]), y las dos
+#   tablas de cadenas en UTF-8. Cada sección empieza alineada a 8 bytes.
+FIRMA_SNAPSHOT = b"ESTACION"
+VERSION_SNAPSHOT = 1
+_ENCABEZADO = struct.Struct("<8sIIIQQ")
+_TAM_ENCABEZADO = 64
+
+
+class Estacion:
+    """
+    Vista de solo lectura de una estación dentro de un `StationStore`.
+
+    No copia los datos: solo guarda el almacén y la posición de la estación. Admite el
+    mismo acceso que los diccionarios de estaciones (`est["nombre"]`, `est.get(...)`,
+    `dict(est)`), por lo que puede usarse donde antes se usaba un diccionario.
+    """
+
+    __slots__ = ("_almacen", "_i")
+
+    def __init__(self, almacen, i):
+        self._almacen = almacen
+        self._i = i
+
+    @property
+    def nombre(self):
+        return self._almacen.nombres[self._i]
+
+    @property
+    def latitud(self):
+        return float(self._almacen.latitudes[self._i])
+
+    @property
+    def lon(self):
+        return float(self._almacen.longitudes[self._i])
+
+    @property
+    def troncal(self):
+        return self._almacen.troncales[self._almacen.codigos_troncal[self._i]]
+
+    def __getitem__(self, clave):
+        if clave not in CAMPOS:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def get(self, clave, defecto=None):
+        return getattr(self, clave) if clave in CAMPOS else defecto
+
+    def keys(self):
+        return CAMPOS
+
+    def __eq__(self, otra):
+        if isinstance(otra, Estacion):
+            return dict(self) == dict(otra)
+        if isinstance(otra, dict):
+            return dict(self) == otra
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Estacion({dict(self)!r})"
+
+
+class StationStore:
+    """
+    Almacén de estaciones en columnas con búsquedas indexadas.
+
+    Reemplaza la lista de diccionarios: las coordenadas se guardan en arreglos float64,
+    las troncales como códigos enteros y los nombres en una lista. Ofrece búsqueda por
+    nombre en O(1) y por coordenadas con tolerancia mediante un índice espacial.
+
+    Se comporta como una secuencia de estaciones (`len`, iteración, índice entero),
+    así que puede pasarse a las funciones que antes recibían la lista de diccionarios.
+
+    Atributos:
+        nombres (list): Nombre de cada estación.
+        latitudes (numpy.ndarray): Latitud de cada estación.
+        longitudes (numpy.ndarray): Longitud de cada estación.
+        codigos_troncal (numpy.ndarray): Código de la troncal de cada estación.
+        troncales (list): Nombre de cada troncal, indexado por código.
+    """
+
+    def __init__(self, estaciones=()):
+        """
+        Parámetros:
+            - estaciones (iterable): Diccionarios (o `Estacion`) con las claves
+              nombre, latitud, lon y troncal. Puede ser un generador: se consume en
+              una sola pasada.
+        """
+        # Las columnas se llenan en arreglos compactos, sin objetos float por estación
+        self.nombres = []
+        latitudes, longitudes, codigos = array("d"), array("d"), array("i")
+        self.troncales = []
+        codigo_de = {}
+        for est in estaciones:
+            self.nombres.append(est["nombre"])
+            latitudes.append(float(est["latitud"]))
+            longitudes.append(float(est["lon"]))
+            troncal = est["troncal"]
+            if troncal not in codigo_de:
+                codigo_de[troncal] = len(self.troncales)
+                self.troncales.append(troncal)
+            codigos.append(codigo_de[troncal])
+        self.latitudes = np.frombuffer(latitudes, dtype=np.float64) if latitudes else np.empty(0)
+        self.longitudes = np.frombuffer(longitudes, dtype=np.float64) if longitudes else np.empty(0)
+        self.codigos_troncal = (np.frombuffer(codigos, dtype=np.intc).astype(np.int32, copy=False)
+                                if codigos else np.empty(0, dtype=np.int32))
+        self._indexar()
+
+    def _indexar(self):
+        self._por_nombre = {}
+        for i, nombre in enumerate(self.nombres):
+            self._por_nombre.setdefault(nombre, i)  # Igual que next(...): gana la primera
+        self._indice = None
+
+    @classmethod
+    def desde_columnas(cls, nombres, latitudes, longitudes, codigos_troncal, troncales):
+        """
+        Crea el almacén directamente a partir de sus columnas, sin copiarlas.
+
+        Parámetros:
+            - nombres (list): Nombre de cada estación.
+            - latitudes (numpy.ndarray): Latitud de cada estación (float64).
+            - longitudes (numpy.ndarray): Longitud de cada estación (float64).
+            - codigos_troncal (numpy.ndarray): Código de troncal de cada estación (int32).
+            - troncales (list): Nombre de cada troncal, indexado por código.
+
+        Lanza:
+            ValueError: Si las columnas no tienen la misma longitud.
+        """
+        if not len(nombres) == len(latitudes) == len(longitudes) == len(codigos_troncal):
+            raise ValueError("Las columnas de estaciones deben tener la misma longitud")
+        almacen = cls.__new__(cls)
+        almacen.nombres = list(nombres)
+        almacen.latitudes = latitudes
+        almacen.longitudes = longitudes
+        almacen.codigos_troncal = codigos_troncal
+        almacen.troncales = list(troncales)
+        almacen._indexar()
+        return almacen
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Crea el almacén a partir de un DataFrame con las columnas nombre, latitud, lon y troncal."""
+        return cls(df[list(CAMPOS)].to_dict("records"))
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __iter__(self):
+        return (Estacion(self, i) for i in range(len(self.nombres)))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Estacion(self, k) for k in range(len(self.nombres))[i]]
+        if i < 0:
+            i += len(self.nombres)
+        if not 0 <= i < len(self.nombres):
+            raise IndexError("Índice de estación fuera de rango")
+        return Estacion(self, i)
+
+    def __contains__(self, nombre):
+        return nombre in self._por_nombre
+
+    def buscar(self, nombre):
+        """
+        Busca una estación por nombre en O(1).
+
+        Retorna:
+            Estacion: La estación, o None si no existe.
+        """
+        i = self._por_nombre.get(nombre)
+        return None if i is None else Estacion(self, i)
+
+    def posicion(self, nombre):
+        """
+        Retorna:
+            int: La posición de la estación en las columnas del almacén, o None si no existe.
+        """
+        return self._por_nombre.get(nombre)
+
+    def buscar_por_coordenadas(self, lat, lon, tolerancia_km=TOLERANCIA_COORDENADAS_KM):
+        """
+        Busca la estación más cercana a una coordenada, dentro de una tolerancia.
+
+        Parámetros:
+            - lat (float): Latitud de la coordenada.
+            - lon (float): Longitud de la coordenada.
+            - tolerancia_km (float): Distancia máxima aceptada (por defecto 10 m).
+
+        Retorna:
+            Estacion: La estación más cercana, o None si ninguna está dentro de la tolerancia.
+        """
+        indices, distancias = self.indice_espacial().consultar_radio(lat, lon, tolerancia_km)
+        if len(indices) == 0:
+            return None
+        return Estacion(self, int(indices[int(np.argmin(distancias))]))
+
+    def indice_espacial(self):
+        """Índice espacial de las estaciones, construido en la primera consulta."""
+        if self._indice is None:
+            self._indice = IndiceEspacial(self.latitudes, self.longitudes, tam_celda_km=_TAM_CELDA_KM)
+        return self._indice
+
+    def guardar(self, ruta_archivo):
+        """
+        Guarda las estaciones en el formato binario versionado (ver `cargar`).
+
+        La escritura es atómica: se escribe un temporal y luego se reemplaza el archivo.
+
+        Parámetros:
+            - ruta_archivo (str): Ruta del archivo de destino.
+        """
+        nombres = [nombre.encode("utf-8") for nombre in self.nombres]
+        troncales = [troncal.encode("utf-8") for troncal in self.troncales]
+        tabla_nombres, tabla_troncales = b"".join(nombres), b"".join(troncales)
+        secciones = [
+            np.ascontiguousarray(self.latitudes, dtype="<f8").tobytes(),
+            np.ascontiguousarray(self.longitudes, dtype="<f8").tobytes(),
+            np.ascontiguousarray(self.codigos_troncal, dtype="<i4").tobytes(),
+            _desplazamientos(nombres).tobytes(),
+            _desplazamientos(troncales).tobytes(),
+            tabla_nombres,
+            tabla_troncales,
+        ]
+        encabezado = _ENCABEZADO.pack(FIRMA_SNAPSHOT, VERSION_SNAPSHOT, len(nombres), len(troncales),
+                                      len(tabla_nombres), len(tabla_troncales))
+        with escritura_atomica(ruta_archivo) as temporal, open(temporal, "wb") as f:
+            f.write(encabezado.ljust(_TAM_ENCABEZADO, b"\0"))
+            for seccion in secciones:
+                f.write(seccion)
+                f.write(b"\0" * (-len(seccion) % 8))
+
+    @classmethod
+    def cargar(cls, ruta_archivo):
+        """
+        Carga estaciones guardadas con `guardar`, mapeando el archivo en memoria.
+
+        Las columnas numéricas son vistas de solo lectura sobre el archivo mapeado (sin
+        copia), así que varios procesos que cargan el mismo archivo comparten las mismas
+        páginas de memoria. Solo los nombres se decodifican a cadenas de Python.
+
+        Parámetros:
+            - ruta_archivo (str): Ruta del archivo guardado.
+
+        Retorna:
+            StationStore: Las estaciones del archivo.
+
+        Lanza:
+            ValueError: Si el archivo no es un snapshot de estaciones, tiene una versión
+            de formato distinta o está truncado.
+        """
+        with open(ruta_archivo, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _TAM_ENCABEZADO:
+                raise ValueError(f"Snapshot de estaciones truncado: {ruta_archivo}")
+            datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        firma, version, n, t, tam_nombres, tam_troncales = _ENCABEZADO.unpack_from(datos)
+        if firma != FIRMA_SNAPSHOT:
+            raise ValueError(f"El archivo no es un snapshot de estaciones: {ruta_archivo}")
+        if version != VERSION_SNAPSHOT:
+            raise ValueError(f"Versión de snapshot de estaciones no soportada: {version}")
+
+        posicion = _TAM_ENCABEZADO
+
+        def seccion(dtype, cantidad):
+            nonlocal posicion
+            tam = np.dtype(dtype).itemsize * cantidad
+            if posicion + tam > len(datos):
+                raise ValueError(f"Snapshot de estaciones truncado: {ruta_archivo}")
+            arreglo = np.frombuffer(datos, dtype=dtype, count=cantidad, offset=posicion)
+            posicion += tam + (-tam % 8)
+            return arreglo
+
+        latitudes = seccion("<f8", n)
+        longitudes = seccion("<f8", n)
+        codigos = seccion("<i4", n)
+        inicio_nombres = seccion("<u4", n + 1).tolist()
+        inicio_troncales = seccion("<u4", t + 1).tolist()
+        tabla_nombres = seccion("u1", tam_nombres).tobytes()
+        tabla_troncales = seccion("u1", tam_troncales).tobytes()
+        nombres = [tabla_nombres[a:b].decode("utf-8") for a, b in zip(inicio_nombres, inicio_nombres[1:])]
+        troncales = [tabla_troncales[a:b].decode("utf-8") for a, b in zip(inicio_troncales, inicio_troncales[1:])]
+        return cls.desde_columnas(nombres, latitudes, longitudes, codigos, troncales)
+
+    def columnas(self):
+        """
+        Retorna:
+            dict: Columnas nombre, latitud, lon y troncal, listas para `pandas.DataFrame`.
+        """
+        return {
+            "nombre": list(self.nombres),
+            "latitud": self.latitudes,
+            "lon": self.longitudes,
+            "troncal": [self.troncales[c] for c in self.codigos_troncal.tolist()],
+        }
+
+
+def _desplazamientos(cadenas):
+    """Posición de inicio de cada cadena en la tabla concatenada, más la posición final."""
+    inicio = np.zeros(len(cadenas) + 1, dtype="<u4")
+    np.cumsum([len(c) for c in cadenas], out=inicio[1:])
+    return inicio
+
+
+def a_dataframe(estaciones):
+    """
+    Convierte estaciones (lista de diccionarios o `StationStore`) en un DataFrame.
+    """
+    if isinstance(estaciones, StationStore):
+        return pd.DataFrame(estaciones.columnas(), columns=list(CAMPOS))
+    return pd.DataFrame(estaciones)
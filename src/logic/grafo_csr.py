@@ -0,0 +1,436 @@
+import hashlib
+import os
+from heapq import heappop, heappush
+from itertools import count
+
+import networkx as nx
+import numpy as np
+
+from src.logic.estaciones import StationStore
+from src.utils.archivos import escritura_atomica
+from src.utils.distance import calcular_distancia, calcular_distancias_pareadas
+
+DIRECTORIO_GRAFOS = "resources/cache"
+VERSION_FORMATO = 1
+
+
+class GrafoCSR:
+    """
+    Grafo de estaciones no dirigido guardado en arreglos CSR (filas comprimidas).
+
+    Las estaciones se identifican por un entero (su posición en `nombres`). Los vecinos
+    de la estación `i` son `vecinos[inicio[i]:inicio[i + 1]]`, con los pesos en la misma
+    posición de `pesos`; cada arista aparece una vez en la fila de cada extremo.
+
+    Además de servir como formato de persistencia, es un motor de búsqueda de rutas
+    alternativo a NetworkX (ver `ruta_mas_corta`): no crea un objeto por estación ni
+    por arista, y las búsquedas recorren directamente los arreglos.
+
+    Atributos:
+        nombres (list): Nombre de cada estación.
+        latitudes (numpy.ndarray): Latitud de cada estación.
+        longitudes (numpy.ndarray): Longitud de cada estación.
+        codigos_troncal (numpy.ndarray): Código de la troncal de cada estación.
+        troncales (list): Nombre de cada troncal, indexado por código.
+        inicio (numpy.ndarray): Posición en `vecinos` donde empieza cada fila (n + 1 valores).
+        vecinos (numpy.ndarray): Estación vecina de cada entrada.
+        pesos (numpy.ndarray): Distancia en kilómetros de cada entrada.
+        huella (str): Huella de los datos de origen (ver `huella_grafo`), o "" si no se conoce.
+    """
+
+    def __init__(self, nombres, latitudes, longitudes, codigos_troncal, troncales,
+                 inicio, vecinos, pesos, huella=""):
+        self.nombres = list(nombres)
+        self.indices = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.codigos_troncal = np.asarray(codigos_troncal, dtype=np.int32)
+        self.troncales = list(troncales)
+        self.inicio = np.asarray(inicio, dtype=np.int64)
+        self.vecinos = np.asarray(vecinos, dtype=np.int32)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.huella = huella
+        self._vistas = None
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self.indices
+
+    def numero_aristas(self):
+        return int(np.count_nonzero(self._filas() <= self.vecinos))
+
+    def ruta_mas_corta(self, origen, destino, metodo="dijkstra"):
+        """
+        Busca la mejor ruta entre dos estaciones con una cola de prioridad sobre los arreglos.
+
+        Los métodos siguen los mismos pasos y desempates que sus equivalentes de NetworkX
+        (`single_source_dijkstra` y `astar_path`), así que encuentran la misma ruta.
+
+        Parámetros:
+            - origen (str): Nombre de la estación de origen.
+            - destino (str): Nombre de la estación de destino.
+            - metodo (str): "dijkstra", "astar" (heurística haversine) o "bidireccional".
+
+        Retorna:
+            tuple: La ruta (lista de nombres) y la distancia total, o (None, None) si
+            las estaciones no están conectadas.
+
+        Lanza:
+            networkx.NodeNotFound: Si alguna estación no está en el grafo. Como en
+            NetworkX, con "dijkstra" un destino desconocido solo significa que no hay ruta.
+            ValueError: Si el método no es válido.
+        """
+        if metodo not in ("dijkstra", "astar", "bidireccional"):
+            raise ValueError(f"Método de búsqueda no válido: {metodo}")
+        if origen not in self.indices:
+            raise nx.NodeNotFound(f"La estación {origen} no está en el grafo")
+        if destino not in self.indices:
+            if metodo == "dijkstra":
+                return None, None
+            raise nx.NodeNotFound(f"La estación {destino} no está en el grafo")
+        s, t = self.indices[origen], self.indices[destino]
+        if metodo == "dijkstra":
+            camino, distancia = self._dijkstra(s, t)
+        elif metodo == "astar":
+            camino, distancia = self._astar(s, t)
+        else:
+            camino, distancia = self._bidireccional(s, t)
+        if camino is None:
+            return None, None
+        return [self.nombres[i] for i in camino], distancia
+
+    def _arreglos(self):
+        """Vistas de memoria de los arreglos: su indexado es mucho más rápido que el de NumPy."""
+        if self._vistas is None:
+            self._vistas = tuple(memoryview(np.ascontiguousarray(a)) for a in
+                                 (self.inicio, self.vecinos, self.pesos, self.latitudes, self.longitudes))
+        return self._vistas
+
+    def _dijkstra(self, s, t):
+        dist, pred = self._explorar(s, t)
+        if t not in dist:
+            return None, None
+        return _camino(pred, t), dist[t]
+
+    def _explorar(self, s, t=None):
+        """
+        Dijkstra desde `s`; se detiene al fijar `t` o, si es None, al agotar la componente.
+
+        Retorna los diccionarios de distancias fijadas y de predecesores (-1 en el origen).
+        Los predecesores de las estaciones ya fijadas no dependen de `t`: la búsqueda
+        completa y la que se detiene en `t` asignan los mismos.
+        """
+        inicio, vecinos, pesos = self._arreglos()[:3]
+        dist, visto, pred = {}, {s: 0}, {s: -1}
+        contador = count()
+        cola = [(0, next(contador), s)]
+        while cola:
+            d, _, v = heappop(cola)
+            if v in dist:
+                continue
+            dist[v] = d
+            if v == t:
+                break
+            a, b = inicio[v], inicio[v + 1]
+            for u, peso in zip(vecinos[a:b], pesos[a:b]):
+                if u in dist:
+                    continue
+                d_u = d + peso
+                if u not in visto or d_u < visto[u]:
+                    visto[u] = d_u
+                    pred[u] = v
+                    heappush(cola, (d_u, next(contador), u))
+        return dist, pred
+
+    def arbol_desde(self, s):
+        """
+        Distancias y predecesores desde la estación `s` hacia todas las demás (una sola búsqueda).
+
+        Parámetros:
+            - s (int): Índice de la estación de origen.
+
+        Retorna:
+            tuple: Arreglo de distancias (inf si no hay ruta) y arreglo de predecesores
+            (-1 en el origen y en las estaciones sin ruta).
+        """
+        dist, pred = self._explorar(s)
+        distancias = np.full(len(self.nombres), np.inf)
+        predecesores = np.full(len(self.nombres), -1, dtype=np.int32)
+        if dist:
+            destinos = np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))
+            distancias[destinos] = np.fromiter(dist.values(), dtype=np.float64, count=len(dist))
+            predecesores[destinos] = [pred[v] for v in dist]
+        return distancias, predecesores
+
+    def _astar(self, s, t):
+        inicio, vecinos, pesos, lats, lons = self._arreglos()
+        lat_t, lon_t = lats[t], lons[t]
+        contador = count()
+        cola = [(0, next(contador), s, 0, -1)]
+        encolado, explorado = {}, {}
+        while cola:
+            _, _, actual, d, padre = heappop(cola)
+            if actual == t:
+                explorado[actual] = padre
+                return _camino(explorado, t), d
+            if actual in explorado:
+                if explorado[actual] == -1:
+                    continue
+                if encolado[actual][0] < d:
+                    continue  # Entrada vieja: ya se encoló un camino mejor
+            explorado[actual] = padre
+            a, b = inicio[actual], inicio[actual + 1]
+            for u, peso in zip(vecinos[a:b], pesos[a:b]):
+                d_u = d + peso
+                if u in encolado:
+                    d_previa, h = encolado[u]
+                    if d_previa <= d_u:
+                        continue
+                else:
+                    h = calcular_distancia(lats[u], lons[u], lat_t, lon_t)
+                encolado[u] = d_u, h
+                heappush(cola, (d_u + h, next(contador), u, d_u, actual))
+        return None, None
+
+    def _bidireccional(self, s, t):
+        if s == t:
+            return [s], 0
+        inicio, vecinos, pesos = self._arreglos()[:3]
+        dist, visto, pred = ({}, {}), ({s: 0}, {t: 0}), ({s: -1}, {t: -1})
+        contador = count()
+        colas = ([(0, next(contador), s)], [(0, next(contador), t)])
+        mejor, encuentro = None, None
+        lado = 1
+        while colas[0] and colas[1]:
+            lado = 1 - lado
+            d, _, v = heappop(colas[lado])
+            if v in dist[lado]:
+                continue
+            dist[lado][v] = d
+            if v in dist[1 - lado]:
+                break  # Ningún camino sin explorar puede mejorar el encuentro actual
+            a, b = inicio[v], inicio[v + 1]
+            for u, peso in zip(vecinos[a:b], pesos[a:b]):
+                if u in dist[lado]:
+                    continue
+                d_u = d + peso
+                if u not in visto[lado] or d_u < visto[lado][u]:
+                    visto[lado][u] = d_u
+                    pred[lado][u] = v
+                    heappush(colas[lado], (d_u, next(contador), u))
+                    if u in visto[1 - lado]:
+                        total = d_u + visto[1 - lado][u]
+                        if mejor is None or total < mejor:
+                            mejor, encuentro = total, u
+        if encuentro is None:
+            return None, None
+        camino = _camino(pred[0], encuentro)
+        camino.extend(reversed(_camino(pred[1], encuentro)[:-1]))
+        return camino, mejor
+
+    def _filas(self):
+        """Estación de origen de cada entrada de `vecinos`."""
+        return np.repeat(np.arange(len(self.nombres), dtype=np.int32), np.diff(self.inicio))
+
+    @classmethod
+    def desde_networkx(cls, grafo, huella=""):
+        """
+        Convierte un grafo de `construir_grafo_estaciones` al formato CSR.
+
+        Cada fila conserva el orden de adyacencia de NetworkX, de modo que `a_networkx`
+        reconstruye el mismo grafo (y los mismos desempates en las búsquedas).
+
+        Parámetros:
+            - grafo (networkx.Graph): Grafo con atributos lat, lon y troncal, y pesos `weight`.
+            - huella (str): Huella de los datos de origen.
+
+        Retorna:
+            GrafoCSR: El grafo en arreglos.
+        """
+        nombres = list(grafo.nodes)
+        indices = {nombre: i for i, nombre in enumerate(nombres)}
+        codigo_de = {}
+        codigos = []
+        for nombre in nombres:
+            codigos.append(codigo_de.setdefault(grafo.nodes[nombre]["troncal"], len(codigo_de)))
+        inicio = np.zeros(len(nombres) + 1, dtype=np.int64)
+        np.cumsum([len(grafo.adj[nombre]) for nombre in nombres], out=inicio[1:])
+        vecinos = np.fromiter((indices[v] for u in nombres for v in grafo.adj[u]),
+                              dtype=np.int32, count=int(inicio[-1]))
+        pesos = np.fromiter((datos.get("weight", 1) for u in nombres for datos in grafo.adj[u].values()),
+                            dtype=np.float64, count=int(inicio[-1]))
+        return cls(nombres,
+                   [grafo.nodes[nombre]["lat"] for nombre in nombres],
+                   [grafo.nodes[nombre]["lon"] for nombre in nombres],
+                   codigos, list(codigo_de), inicio, vecinos, pesos, huella)
+
+    def a_networkx(self):
+        """
+        Reconstruye el grafo de NetworkX con los mismos nodos, atributos y aristas.
+
+        Los nodos se agregan en el orden de las filas y las aristas en un orden que
+        reproduce el orden de adyacencia de cada nodo: una arista (u, v) se agrega
+        cuando es la siguiente pendiente tanto en la fila de u como en la de v. Así
+        los recorridos (y los empates entre rutas) dan lo mismo que en el original.
+
+        Retorna:
+            networkx.Graph: El grafo reconstruido.
+        """
+        nombres, troncales = self.nombres, self.troncales
+        filas = self._filas()
+        vecinos, pesos = self.vecinos.tolist(), self.pesos.tolist()
+        parejas = self._parejas(filas).tolist()
+        siguiente, fin = self.inicio[:-1].tolist(), self.inicio[1:].tolist()
+        orden = []
+        pendientes = list(range(len(nombres)))
+        while pendientes:
+            u = pendientes.pop()
+            entrada = siguiente[u]
+            if entrada == fin[u]:
+                continue
+            v = vecinos[entrada]
+            if siguiente[v] != parejas[entrada]:
+                continue  # La arista aún no es la siguiente de v: se retoma al avanzar v
+            orden.append(entrada)
+            siguiente[u] += 1
+            if v != u:
+                siguiente[v] += 1
+                pendientes.append(v)
+            pendientes.append(u)
+        if siguiente != fin:
+            raise ValueError("El orden de adyacencia del grafo no corresponde a ningún orden de inserción")
+
+        G = nx.Graph()
+        G.add_nodes_from(
+            (nombre, {"lat": lat, "lon": lon, "troncal": troncales[codigo]})
+            for nombre, lat, lon, codigo in zip(nombres, self.latitudes.tolist(),
+                                                 self.longitudes.tolist(), self.codigos_troncal.tolist())
+        )
+        filas = filas.tolist()
+        G.add_weighted_edges_from((nombres[filas[e]], nombres[vecinos[e]], pesos[e]) for e in orden)
+        return G
+
+    def _parejas(self, filas):
+        """Para cada entrada (u, v), la posición de la entrada (v, u)."""
+        n = len(self.nombres)
+        directa = np.argsort(filas.astype(np.int64) * n + self.vecinos, kind="stable")
+        inversa = np.argsort(self.vecinos.astype(np.int64) * n + filas, kind="stable")
+        pareja = np.empty(len(filas), dtype=np.int64)
+        pareja[inversa] = directa
+        return pareja
+
+    def guardar(self, ruta_archivo):
+        """
+        Guarda el grafo en un archivo `.npz` (arreglos planos, sin pickle).
+
+        Parámetros:
+            - ruta_archivo (str): Ruta del archivo de destino.
+        """
+        with escritura_atomica(ruta_archivo, sufijo=".tmp.npz") as temporal:
+            np.savez(
+                temporal,
+                version=np.array(VERSION_FORMATO),
+                huella=np.array(self.huella),
+                nombres=np.array(self.nombres, dtype=str),
+                latitudes=self.latitudes,
+                longitudes=self.longitudes,
+                codigos_troncal=self.codigos_troncal,
+                troncales=np.array(self.troncales, dtype=str),
+                inicio=self.inicio,
+                vecinos=self.vecinos,
+                pesos=self.pesos,
+            )
+
+    @classmethod
+    def cargar(cls, ruta_archivo):
+        """
+        Carga un grafo guardado con `guardar`.
+
+        Lanza:
+            ValueError: Si el archivo tiene una versión de formato distinta.
+        """
+        with np.load(ruta_archivo, allow_pickle=False) as datos:
+            if int(datos["version"]) != VERSION_FORMATO:
+                raise ValueError(f"Versión de grafo no soportada: {int(datos['version'])}")
+            return cls(datos["nombres"].tolist(), datos["latitudes"], datos["longitudes"],
+                       datos["codigos_troncal"], datos["troncales"].tolist(), datos["inicio"],
+                       datos["vecinos"], datos["pesos"], str(datos["huella"]))
+
+
+def _camino(pred, destino):
+    """Reconstruye el camino hasta `destino` siguiendo los predecesores (-1 en el origen)."""
+    camino = [destino]
+    while pred[camino[-1]] != -1:
+        camino.append(pred[camino[-1]])
+    camino.reverse()
+    return camino
+
+
+def distancias_recorridas(distancias, predecesores, latitudes, longitudes):
+    """
+    Distancia recorrida hasta cada estación por las rutas de un árbol de predecesores.
+
+    Suma la longitud de los tramos de cada ruta, así que no incluye las penalizaciones
+    de transbordo que el modelo de líneas agrega a los pesos. Cada ruta se recorre por
+    saltos de puntero (la distancia hasta el predecesor, luego hasta el predecesor del
+    predecesor, etc.): el número de pasos crece con el logaritmo de la longitud de las
+    rutas, no con el número de estaciones.
+
+    Parámetros:
+        - distancias (numpy.ndarray): Costo de la mejor ruta (inf si no hay ruta), con una
+          fila por origen o un solo origen (1-D).
+        - predecesores (numpy.ndarray): Predecesores con la forma de `distancias` (-1 en
+          el origen y en las estaciones sin ruta).
+        - latitudes (numpy.ndarray): Latitud de cada estación (una por columna).
+        - longitudes (numpy.ndarray): Longitud de cada estación.
+
+    Retorna:
+        numpy.ndarray: Distancias recorridas en kilómetros, con la forma de `distancias`
+        (inf si no hay ruta).
+    """
+    distancias = np.asarray(distancias, dtype=np.float64)
+    columnas = np.arange(distancias.shape[-1])
+    padre = np.atleast_2d(np.where(predecesores >= 0, predecesores, columnas).astype(np.int64))
+    latitudes, longitudes = np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)
+    tramo = calcular_distancias_pareadas(latitudes[padre], longitudes[padre],
+                                         np.broadcast_to(latitudes, padre.shape),
+                                         np.broadcast_to(longitudes, padre.shape))
+    while True:
+        abuelo = np.take_along_axis(padre, padre, axis=1)
+        if np.array_equal(abuelo, padre):
+            break
+        tramo += np.take_along_axis(tramo, padre, axis=1)
+        padre = abuelo
+    return np.where(np.isinf(distancias), np.inf, tramo.reshape(distancias.shape))
+
+
+def huella_grafo(estaciones, umbral_km, *parametros):
+    """
+    Huella de las estaciones (nombres, coordenadas y troncales) y del umbral de conexión.
+
+    Dos conjuntos de estaciones con la misma huella producen el mismo grafo, por lo que
+    sirve como clave del grafo guardado en disco.
+
+    Parámetros:
+        - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
+        - umbral_km (float): Distancia máxima para conectar dos estaciones.
+        - parametros: Otros parámetros de construcción del grafo (modelo, radios, etc.).
+
+    Retorna:
+        str: Huella SHA-256 en hexadecimal.
+    """
+    if not isinstance(estaciones, StationStore):
+        estaciones = StationStore(estaciones)
+    h = hashlib.sha256()
+    h.update(f"v{VERSION_FORMATO}\0{float(umbral_km)!r}\0{len(estaciones)}\0".encode("utf-8"))
+    if parametros:
+        h.update(("\1".join(repr(p) for p in parametros) + "\1").encode("utf-8"))
+    h.update("\0".join(estaciones.nombres).encode("utf-8"))
+    h.update(b"\1")
+    h.update("\0".join(estaciones.troncales).encode("utf-8"))
+    h.update(np.ascontiguousarray(estaciones.latitudes, dtype="<f8").tobytes())
+    h.update(np.ascontiguousarray(estaciones.longitudes, dtype="<f8").tobytes())
+    h.update(np.ascontiguousarray(estaciones.codigos_troncal, dtype="<i4").tobytes())
+    return h.hexdigest()
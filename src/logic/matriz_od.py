@@ -0,0 +1,215 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+from src.logic.grafo_csr import distancias_recorridas
+from src.logic.routing import obtener_grafo_csr
+
+TAM_LOTE = 32  # Orígenes por tarea enviada a un proceso
+ARCHIVO_DISTANCIAS = "distancias.npy"
+ARCHIVO_PREDECESORES = "predecesores.npy"
+ARCHIVO_ESTACIONES = "estaciones.json"
+_ARREGLOS_GRAFO = ("inicio", "vecinos", "pesos", "latitudes", "longitudes", "codigos_troncal")
+
+# Estado de cada proceso trabajador (ver `_iniciar_trabajador`)
+_grafo_trabajador = None
+_salida_trabajador = None
+
+
+def resolver_matriz_od(grafo, directorio_salida, origenes=None, destinos=None, con_rutas=False,
+                       procesos=None, tam_lote=TAM_LOTE):
+    """
+    Calcula la matriz origen-destino de distancias mínimas en varios procesos.
+
+    Se hace una sola búsqueda de Dijkstra por origen (no una por par), y los orígenes
+    se reparten en lotes entre los procesos. El grafo no se envía con cada tarea: se
+    guarda una vez en disco y cada proceso lo abre mapeado en memoria, de modo que
+    todos comparten las mismas páginas. Cada proceso escribe sus filas directamente en
+    la matriz de salida (un `.npy` mapeado), así que la memoria no crece con el número
+    de orígenes y las filas quedan en disco a medida que se calculan.
+
+    Con el modelo de líneas (`construir_grafo_lineas`) las rutas se eligen por costo,
+    pero la matriz guarda la distancia recorrida, sin las penalizaciones de transbordo,
+    igual que `buscar_mejor_ruta_estaciones`.
+
+    La salida queda en `directorio_salida`:
+        - `distancias.npy`: matriz float64 (orígenes x destinos); inf si no hay ruta.
+        - `predecesores.npy` (si `con_rutas`): matriz int32 (orígenes x estaciones) con
+          la estación anterior en la mejor ruta, de la que se reconstruyen las rutas.
+        - `estaciones.json`: nombres de las estaciones, orígenes y destinos.
+    Se lee con `MatrizOD.cargar`.
+
+    Parámetros:
+        - grafo (networkx.Graph | GrafoCSR): Grafo de estaciones. Un `GrafoCSR` no guarda
+          el modelo del grafo: sus pesos se toman como distancias.
+        - directorio_salida (str): Carpeta donde se escriben los resultados.
+        - origenes (list, opcional): Estaciones de origen; por defecto todas.
+        - destinos (list, opcional): Estaciones de destino; por defecto todas.
+        - con_rutas (bool): Si es True, guarda también los predecesores.
+        - procesos (int, opcional): Procesos a usar; por defecto uno por núcleo.
+          Con 1 se calcula en el proceso actual.
+        - tam_lote (int): Orígenes por tarea.
+
+    Retorna:
+        MatrizOD: La matriz calculada (mapeada desde el disco).
+
+    Lanza:
+        KeyError: Si alguna estación de origen o destino no está en el grafo.
+    """
+    grafo_csr = obtener_grafo_csr(grafo)
+    origenes = list(grafo_csr.nombres if origenes is None else origenes)
+    destinos = list(grafo_csr.nombres if destinos is None else destinos)
+    faltantes = [nombre for nombre in origenes + destinos if nombre not in grafo_csr]
+    if faltantes:
+        raise KeyError(f"Estaciones no encontradas en el grafo: {', '.join(sorted(set(faltantes))[:10])}")
+    procesos = procesos or os.cpu_count() or 1
+
+    os.makedirs(directorio_salida, exist_ok=True)
+    with open(os.path.join(directorio_salida, ARCHIVO_ESTACIONES), "w", encoding="utf-8") as f:
+        json.dump({"nombres": grafo_csr.nombres, "origenes": origenes, "destinos": destinos}, f, ensure_ascii=False)
+    salida = {
+        "distancias": os.path.join(directorio_salida, ARCHIVO_DISTANCIAS),
+        "predecesores": os.path.join(directorio_salida, ARCHIVO_PREDECESORES) if con_rutas else None,
+        "columnas": [grafo_csr.indices[nombre] for nombre in destinos],
+        "recorrido": isinstance(grafo, nx.Graph) and grafo.graph.get("modelo") == "lineas",
+    }
+    np.lib.format.open_memmap(salida["distancias"], mode="w+", dtype=np.float64,
+                              shape=(len(origenes), len(destinos))).flush()
+    if con_rutas:
+        np.lib.format.open_memmap(salida["predecesores"], mode="w+", dtype=np.int32,
+                                  shape=(len(origenes), len(grafo_csr))).flush()
+
+    # Lotes de (fila de salida, índice de la estación de origen)
+    filas = [(fila, grafo_csr.indices[nombre]) for fila, nombre in enumerate(origenes)]
+    lotes = [filas[k:k + tam_lote] for k in range(0, len(filas), tam_lote)]
+    if procesos == 1 or len(lotes) <= 1:
+        _iniciar(grafo_csr, salida)
+        for lote in lotes:
+            _resolver_lote(lote)
+    else:
+        directorio_grafo = tempfile.mkdtemp(prefix="grafo_od_")
+        try:
+            _publicar_grafo(grafo_csr, directorio_grafo)
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                     initargs=(directorio_grafo, salida)) as pool:
+                # Pocas tareas en vuelo: la cola no acumula lotes sin procesar
+                pendientes = deque()
+                for lote in lotes:
+                    if len(pendientes) >= 2 * procesos:
+                        pendientes.popleft().result()
+                    pendientes.append(pool.submit(_resolver_lote, lote))
+                for futuro in pendientes:
+                    futuro.result()
+        finally:
+            shutil.rmtree(directorio_grafo, ignore_errors=True)
+    return MatrizOD.cargar(directorio_salida)
+
+
+class MatrizOD:
+    """
+    Resultado de `resolver_matriz_od`, leído desde el disco sin cargarlo en memoria.
+
+    Atributos:
+        nombres (list): Nombres de todas las estaciones del grafo.
+        origenes (list): Estaciones de origen, en el orden de las filas.
+        destinos (list): Estaciones de destino, en el orden de las columnas.
+        distancias (numpy.ndarray): Matriz de distancias (mapeada en memoria).
+        predecesores (numpy.ndarray): Matriz de predecesores, o None si no se guardó.
+    """
+
+    def __init__(self, nombres, origenes, destinos, distancias, predecesores=None):
+        self.nombres = nombres
+        self.origenes = origenes
+        self.destinos = destinos
+        self.distancias = distancias
+        self.predecesores = predecesores
+        self._fila = {nombre: i for i, nombre in enumerate(origenes)}
+        self._columna = {nombre: j for j, nombre in enumerate(destinos)}
+        self._indice = {nombre: i for i, nombre in enumerate(nombres)}
+
+    @classmethod
+    def cargar(cls, directorio):
+        with open(os.path.join(directorio, ARCHIVO_ESTACIONES), "r", encoding="utf-8") as f:
+            estaciones = json.load(f)
+        distancias = np.load(os.path.join(directorio, ARCHIVO_DISTANCIAS), mmap_mode="r")
+        ruta_predecesores = os.path.join(directorio, ARCHIVO_PREDECESORES)
+        predecesores = np.load(ruta_predecesores, mmap_mode="r") if os.path.exists(ruta_predecesores) else None
+        return cls(estaciones["nombres"], estaciones["origenes"], estaciones["destinos"], distancias, predecesores)
+
+    def distancia(self, origen, destino):
+        """
+        Retorna:
+            float: Distancia de la mejor ruta, o None si no hay ruta.
+        """
+        distancia = float(self.distancias[self._fila[origen], self._columna[destino]])
+        return None if np.isinf(distancia) else distancia
+
+    def ruta(self, origen, destino):
+        """
+        Reconstruye la mejor ruta a partir de los predecesores.
+
+        Retorna:
+            tuple: La ruta (lista de nombres) y la distancia, o (None, None) si no hay ruta.
+
+        Lanza:
+            ValueError: Si la matriz se calculó sin `con_rutas`.
+        """
+        if self.predecesores is None:
+            raise ValueError("La matriz se calculó sin rutas (con_rutas=False)")
+        distancia = self.distancia(origen, destino)
+        if distancia is None:
+            return None, None
+        fila_pred = self.predecesores[self._fila[origen]]
+        camino = [self._indice[destino]]
+        while fila_pred[camino[-1]] != -1:
+            camino.append(int(fila_pred[camino[-1]]))
+        camino.reverse()
+        return [self.nombres[i] for i in camino], distancia
+
+
+def _publicar_grafo(grafo_csr, directorio):
+    """Guarda los arreglos del grafo como `.npy` sueltos para abrirlos con `mmap_mode`."""
+    for nombre in _ARREGLOS_GRAFO:
+        np.save(os.path.join(directorio, f"{nombre}.npy"), getattr(grafo_csr, nombre))
+    with open(os.path.join(directorio, "nombres.json"), "w", encoding="utf-8") as f:
+        json.dump({"nombres": grafo_csr.nombres, "troncales": grafo_csr.troncales}, f, ensure_ascii=False)
+
+
+def _iniciar_trabajador(directorio_grafo, salida):
+    from src.logic.grafo_csr import GrafoCSR
+
+    arreglos = {nombre: np.load(os.path.join(directorio_grafo, f"{nombre}.npy"), mmap_mode="r")
+                for nombre in _ARREGLOS_GRAFO}
+    with open(os.path.join(directorio_grafo, "nombres.json"), "r", encoding="utf-8") as f:
+        textos = json.load(f)
+    _iniciar(GrafoCSR(textos["nombres"], troncales=textos["troncales"], **arreglos), salida)
+
+
+def _iniciar(grafo_csr, salida):
+    global _grafo_trabajador, _salida_trabajador
+    _grafo_trabajador = grafo_csr
+    _salida_trabajador = salida
+
+
+def _resolver_lote(lote):
+    grafo_csr, salida = _grafo_trabajador, _salida_trabajador
+    distancias = np.load(salida["distancias"], mmap_mode="r+")
+    predecesores = np.load(salida["predecesores"], mmap_mode="r+") if salida["predecesores"] else None
+    columnas = salida["columnas"]
+    for fila, origen in lote:
+        dist, pred = grafo_csr.arbol_desde(origen)
+        if salida["recorrido"]:
+            dist = distancias_recorridas(dist, pred, grafo_csr.latitudes, grafo_csr.longitudes)
+        distancias[fila] = dist[columnas]
+        if predecesores is not None:
+            predecesores[fila] = pred
+    distancias.flush()
+    if predecesores is not None:
+        predecesores.flush()
+    return len(lote)
@@ -1,69 +1,393 @@
+import json
 import os
+import statistics
+import tempfile
+import threading
+import time
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
-from matplotlib import pyplot as plt
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
 import joblib
-from sklearn.tree import plot_tree
 
-from src.logic.data import cargar_estaciones_api
+from src.logic.data import cargar_estaciones
+from src.logic.estaciones import StationStore, a_dataframe
+from src.utils.archivos import escritura_atomica
+from src.utils.perfilado import medir, seccion
 
+RUTA_MODELO = "resources/modelo_troncal.pkl"
+RUTA_ENCODER = "resources/label_encoder_troncal.pkl"
+RUTA_ARBOL = "resources/arbol_decision.png"
+RUTA_CSV_ESTACIONES = "resources/estaciones_transmilenio.csv"
+RUTA_SNAPSHOT_ESTACIONES = "resources/estaciones_transmilenio.snap"
+RUTA_INFORME_MODELO = "resources/modelo_troncal.json"  # Variante servida y métricas de todas
 
-load_dotenv()  # Carga desde .env
+VARIANTES_MODELO = ("bosque", "bosque_podado", "knn")
+FORMATOS_ARTEFACTO = ("pickle", "comprimido", "mmap")
+VARIANTE_ARBOL = "bosque_podado"  # Bosque del que se dibuja el árbol explicativo (ver `generar_arbol_decision`)
+TOLERANCIA_PRECISION = 0.01  # Variantes con esta diferencia de precisión se consideran empatadas
+PLIEGUES_VALIDACION = 5
+SEMILLA = 42
 
-API_URL = os.getenv("API_TRANSMILENIO")
+# Modelo y codificador cargados bajo demanda (ver `cargar_modelo`)
+_modelo = None
+_encoder = None
+_lock_modelo = threading.Lock()
+_lock_arbol = threading.Lock()
 
-if not API_URL:
-    raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
 
+def crear_modelo(variante):
+    """
+    Crea (sin entrenar) una de las variantes del modelo de predicción de troncal.
+
+    Parámetros:
+        - variante (str): Variante del modelo:
+            - "bosque": bosque aleatorio de 100 árboles de profundidad 5 (el original).
+            - "bosque_podado": 25 árboles podados por costo-complejidad.
+            - "knn": troncal de la estación más cercana, con un BallTree y la
+              distancia haversine sobre las coordenadas en radianes.
+
+    Retorna:
+        sklearn.base.ClassifierMixin: El modelo sin entrenar.
+
+    Lanza:
+        ValueError: Si la variante no es válida.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import FunctionTransformer
+
+    if variante == "bosque":
+        return RandomForestClassifier(n_estimators=100, max_depth=5, random_state=SEMILLA)
+    if variante == "bosque_podado":
+        return RandomForestClassifier(n_estimators=25, ccp_alpha=0.005, random_state=SEMILLA)
+    if variante == "knn":
+        return make_pipeline(FunctionTransformer(np.radians),
+                             KNeighborsClassifier(n_neighbors=1, algorithm="ball_tree", metric="haversine"))
+    raise ValueError(f"Variante de modelo no válida: {variante}")
+
+
+@medir()
+def evaluar_variantes(X, y, variantes=VARIANTES_MODELO, formatos=FORMATOS_ARTEFACTO, consultas=200,
+                      filas_lote=10_000):
+    """
+    Compara las variantes del modelo y los formatos en que puede guardarse.
+
+    Para cada variante mide la precisión con validación cruzada, la latencia de una
+    predicción individual, el rendimiento prediciendo lotes de coordenadas al azar y,
+    para cada formato de `joblib` (pickle, comprimido o para abrir mapeado en memoria
+    con `mmap_mode`), el tamaño del archivo y el tiempo de carga.
+
+    Parámetros:
+        - X (numpy.ndarray): Coordenadas (latitud, longitud) de las estaciones.
+        - y (numpy.ndarray): Troncal codificada de cada estación.
+        - variantes (iterable): Variantes a comparar (ver `crear_modelo`).
+        - formatos (iterable): Formatos de artefacto a comparar.
+        - consultas (int): Predicciones individuales para medir la latencia.
+        - filas_lote (int): Coordenadas del lote para medir el rendimiento.
+
+    Retorna:
+        dict: Métricas de cada variante, por nombre.
+    """
+    from sklearn.model_selection import KFold, cross_val_score
+
+    aleatorio = np.random.default_rng(SEMILLA)
+    minimos, maximos = X.min(axis=0), X.max(axis=0)
+    lote = aleatorio.uniform(minimos, maximos, size=(filas_lote, 2))
+    individuales = lote[:consultas]
+    validacion = KFold(PLIEGUES_VALIDACION, shuffle=True, random_state=SEMILLA)
+    informe = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for variante in variantes:
+            precision = cross_val_score(crear_modelo(variante), X, y, cv=validacion).mean()
+            modelo = crear_modelo(variante).fit(X, y)
+            tiempos = []
+            for fila in individuales:
+                inicio = time.perf_counter()
+                _predecir(modelo, fila[np.newaxis])
+                tiempos.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            _predecir(modelo, lote)
+            segundos_lote = time.perf_counter() - inicio
+            metricas = {
+                "precision": float(precision),
+                "latencia_ms": 1000 * statistics.median(tiempos),
+                "filas_por_segundo": filas_lote / segundos_lote,
+                "formatos": {},
+            }
+            for formato in formatos:
+                ruta = os.path.join(directorio, f"{variante}_{formato}.pkl")
+                _guardar_artefacto(modelo, ruta, formato)
+                cargas = []
+                for _ in range(5):
+                    inicio = time.perf_counter()
+                    _cargar_artefacto(ruta, formato)
+                    cargas.append(time.perf_counter() - inicio)
+                metricas["formatos"][formato] = {"bytes": os.path.getsize(ruta),
+                                                 "carga_ms": 1000 * statistics.median(cargas)}
+            informe[variante] = metricas
+    return informe
+
+
+def elegir_variante(informe):
+    """
+    Elige la variante a servir y su formato a partir de `evaluar_variantes`.
+
+    Entre las variantes a `TOLERANCIA_PRECISION` o menos de la más precisa se elige la
+    de menor latencia, y para ella el formato que carga más rápido.
+
+    Retorna:
+        tuple: El nombre de la variante y el del formato.
+    """
+    mejor_precision = max(metricas["precision"] for metricas in informe.values())
+    empatadas = [v for v, metricas in informe.items()
+                 if metricas["precision"] >= mejor_precision - TOLERANCIA_PRECISION]
+    variante = min(empatadas, key=lambda v: informe[v]["latencia_ms"])
+    formatos = informe[variante]["formatos"]
+    formato = min(formatos, key=lambda f: formatos[f]["carga_ms"])
+    return variante, formato
+
+
+@medir()
+def entrenar_modelo(estaciones=None, exportar_csv=True, variante=None, formato="pickle"):
+    """
+    Entrena el modelo de predicción de troncal y lo guarda en `resources/`.
+
+    Este proceso es costoso (descarga de estaciones y ajuste de los modelos),
+    por eso no se ejecuta al importar el módulo sino como comando explícito:
+
+        python -m src.logic.modelo_ml
+
+    Si no se indica la variante, se comparan todas (ver `evaluar_variantes`) y se
+    sirve la mejor con su formato más rápido de cargar. La variante, el formato y las
+    métricas quedan en `RUTA_INFORME_MODELO`, de donde los lee `cargar_modelo`.
+
+    Parámetros:
+        - estaciones (list | StationStore, opcional): Estaciones de entrenamiento.
+          Si se omite, se cargan desde la API definida en `API_TRANSMILENIO`.
+        - exportar_csv (bool): Si es True, además del snapshot binario de estaciones
+          (`RUTA_SNAPSHOT_ESTACIONES`) se exporta el CSV `RUTA_CSV_ESTACIONES`.
+        - variante (str, opcional): Variante a entrenar sin comparar (ver `crear_modelo`).
+        - formato (str): Formato del artefacto cuando se indica la variante.
+
+    Retorna:
+        tuple: El modelo entrenado y el codificador de etiquetas de troncal.
+
+    Lanza:
+        ValueError: Si no se entregan estaciones y no existe la variable API_TRANSMILENIO,
+            o si la variante o el formato no son válidos.
+    """
+    global _modelo, _encoder
+
+    if formato not in FORMATOS_ARTEFACTO:
+        raise ValueError(f"Formato de artefacto no válido: {formato}")
+
+    # 1. Obtener datos desde la API
+    if estaciones is None:
+        load_dotenv()  # Carga desde .env
+        api_url = os.getenv("API_TRANSMILENIO")
+        if not api_url:
+            raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
+        estaciones = cargar_estaciones(api_url)
+
+    # 2. Coordenadas y etiquetas de troncal codificadas
+    X, y, le = _datos_entrenamiento(estaciones)
+
+    # 3. Comparación de variantes y entrenamiento de la elegida
+    informe = {}
+    if variante is None:
+        informe = evaluar_variantes(X, y)
+        variante, formato = elegir_variante(informe)
+        for nombre, metricas in informe.items():
+            print(f"📊 {nombre}: precisión {metricas['precision']:.3f}, "
+                  f"latencia {metricas['latencia_ms']:.3f} ms, {metricas['filas_por_segundo']:.0f} filas/s")
+    modelo = crear_modelo(variante).fit(X, y)
+
+    # 4. Guardado del modelo, el codificador y el informe
+    _guardar_artefacto(modelo, RUTA_MODELO, formato)
+    joblib.dump(le, RUTA_ENCODER)
+    with open(RUTA_INFORME_MODELO, "w", encoding="utf-8") as f:
+        json.dump({"variante": variante, "formato": formato, "variantes": informe}, f, indent=2, ensure_ascii=False)
+
+    with _lock_modelo:
+        _modelo, _encoder = modelo, le
+
+    print(f"✅ Modelo entrenado correctamente con datos de la API (variante {variante}, formato {formato}).")
+
+    # 5. Artefactos derivados de las estaciones de entrenamiento
+    if not isinstance(estaciones, StationStore):
+        estaciones = StationStore(estaciones)
+    estaciones.guardar(RUTA_SNAPSHOT_ESTACIONES)
+    if exportar_csv:
+        exportar_estaciones_csv(estaciones, RUTA_CSV_ESTACIONES)
+    generar_arbol_decision(forzar=True, estaciones=estaciones)
+    return modelo, le
 
-# 1. Obtener datos desde la API
-estaciones = cargar_estaciones_api(API_URL)
 
-# 2. Crear DataFrame
-df = pd.DataFrame(estaciones)
-df = df[(df['latitud'] != 0) & (df['lon'] != 0)]
+def _datos_entrenamiento(estaciones):
+    """Coordenadas (sin las de valor 0), troncales codificadas y el codificador de un conjunto de estaciones."""
+    from sklearn.preprocessing import LabelEncoder
 
-# 3. Codificar etiquetas de troncal
-le = LabelEncoder()
-df['troncal_id'] = le.fit_transform(df['troncal'])
+    df = a_dataframe(estaciones)
+    df = df[(df['latitud'] != 0) & (df['lon'] != 0)]
+    le = LabelEncoder()
+    y = le.fit_transform(df['troncal'])
+    return df[['latitud', 'lon']].to_numpy(dtype=np.float64), y, le
 
-# 4. Entrenamiento del modelo
-X = df[['latitud', 'lon']]
-y = df['troncal_id']
-modelo = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
-modelo.fit(X, y)
 
-# 5. Guardado del modelo y el codificador
-joblib.dump(modelo, "resources/modelo_troncal.pkl")
-joblib.dump(le, "resources/label_encoder_troncal.pkl")
+def _guardar_artefacto(modelo, ruta, formato):
+    if formato == "comprimido":
+        joblib.dump(modelo, ruta, compress=3)
+    else:
+        joblib.dump(modelo, ruta)  # "pickle" y "mmap" se guardan igual; cambia cómo se cargan
 
-print("\u2705 Modelo entrenado correctamente con datos de la API.")
 
-# Cargar modelo y encoder para predicción posterior
-modelo = joblib.load("resources/modelo_troncal.pkl")
-encoder = joblib.load("resources/label_encoder_troncal.pkl")
+def _cargar_artefacto(ruta, formato):
+    return joblib.load(ruta, mmap_mode="r" if formato == "mmap" else None)
 
+
+def _predecir(modelo, coords):
+    """Predice con arreglos; con un DataFrame solo si el modelo se entrenó con nombres de columnas."""
+    if getattr(modelo, "feature_names_in_", None) is not None:
+        coords = pd.DataFrame(coords, columns=['latitud', 'lon'])
+    return modelo.predict(coords)
+
+
+def cargar_modelo():
+    """
+    Devuelve el modelo y el codificador de troncales, cargándolos desde disco solo
+    la primera vez. Las llamadas siguientes reutilizan la misma instancia.
+
+    Retorna:
+        tuple: El modelo de predicción y el codificador de etiquetas de troncal.
+
+    Lanza:
+        FileNotFoundError: Si el modelo no ha sido entrenado todavía.
+    """
+    global _modelo, _encoder
+    if _modelo is None:
+        with _lock_modelo:
+            if _modelo is None:
+                if not (os.path.exists(RUTA_MODELO) and os.path.exists(RUTA_ENCODER)):
+                    raise FileNotFoundError(
+                        "No se encontró el modelo entrenado. Ejecuta: python -m src.logic.modelo_ml")
+                with seccion("modelo_ml.carga_modelo"):
+                    _encoder = joblib.load(RUTA_ENCODER)
+                    _modelo = _cargar_artefacto(RUTA_MODELO, _formato_servido())
+    return _modelo, _encoder
+
+
+def _formato_servido():
+    """Formato del modelo guardado según `RUTA_INFORME_MODELO` ("pickle" si no hay informe)."""
+    try:
+        with open(RUTA_INFORME_MODELO, "r", encoding="utf-8") as f:
+            return json.load(f).get("formato", "pickle")
+    except (OSError, ValueError):
+        return "pickle"
+
+
+@medir()
 def predecir_troncal_por_coords(lat, lon):
-    df_input = pd.DataFrame([[lat, lon]], columns=['latitud', 'lon'])
-    pred_code = modelo.predict(df_input)[0]
-    troncal = encoder.inverse_transform([pred_code])[0]
+    """
+    Predice la troncal más probable para una coordenada.
+
+    Parámetros:
+        - lat (float): Latitud del punto.
+        - lon (float): Longitud del punto.
+
+    Retorna:
+        str: Nombre de la troncal predicha.
+    """
+    return predecir_troncales([[lat, lon]])[0]
+
+
+@medir()
+def predecir_troncales(coords):
+    """
+    Predice la troncal de muchas coordenadas en una sola llamada al modelo.
+
+    Parámetros:
+        - coords (array-like): Arreglo de forma (n, 2) con pares (latitud, longitud).
+
+    Retorna:
+        numpy.ndarray: Arreglo de n nombres de troncal, en el mismo orden de `coords`.
+
+    Lanza:
+        ValueError: Si `coords` no tiene forma (n, 2).
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError("Las coordenadas deben tener forma (n, 2) con (latitud, longitud)")
+    modelo, encoder = cargar_modelo()
+    if len(coords) == 0:
+        return np.empty(0, dtype=encoder.classes_.dtype)
+    return encoder.inverse_transform(_predecir(modelo, coords))
+
+
+def obtener_troncales():
+    """
+    Retorna:
+        list: Etiquetas originales (troncales) que conoce el modelo.
+    """
+    _, encoder = cargar_modelo()
+    return list(encoder.classes_)
+
+
+@medir()
+def generar_arbol_decision(ruta_imagen=RUTA_ARBOL, forzar=False, estaciones=None):
+    """
+    Dibuja un árbol de decisión que explica cómo se separan las troncales por coordenadas.
+
+    El modelo servido puede no ser un bosque (p. ej. el k-NN), así que el árbol no sale
+    de él: se entrena un bosque podado (variante `VARIANTE_ARBOL`) con las mismas
+    estaciones y se dibuja su primer árbol. `entrenar_modelo` lo dibuja al terminar; en
+    las demás llamadas la imagen se reutiliza mientras sea más reciente que el modelo y
+    el snapshot de estaciones, y solo se vuelve a dibujar si falta o quedó desactualizada.
+
+    Parámetros:
+        - ruta_imagen (str): Ruta del PNG del árbol de decisión.
+        - forzar (bool): Si es True, la dibuja aunque esté vigente.
+        - estaciones (list | StationStore, opcional): Estaciones de entrenamiento. Por
+          defecto, el snapshot `RUTA_SNAPSHOT_ESTACIONES`.
+
+    Retorna:
+        str: Ruta de la imagen del árbol de decisión.
+    """
+    with _lock_arbol:  # Dos pedidos simultáneos dibujan el árbol una sola vez
+        if not forzar and _arbol_vigente(ruta_imagen):
+            return ruta_imagen
+
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from sklearn.tree import plot_tree
+
+        if estaciones is None:
+            estaciones = StationStore.cargar(RUTA_SNAPSHOT_ESTACIONES)
+        X, y, encoder = _datos_entrenamiento(estaciones)
+        bosque = crear_modelo(VARIANTE_ARBOL).fit(X, y)
+        estimator = bosque.estimators_[0]  # Obtener el primer árbol del bosque
+        troncales = [str(troncal) for troncal in encoder.classes_[bosque.classes_]]
 
-    print(type(modelo)) # Verificar el tipo de modelo
-    # Cargar el codificador para ver las etiquetas originales
-    print(encoder.classes_)  # Ver las etiquetas originales (troncales)
+        # Visualizar el árbol y guardarlo como imagen
+        with seccion("modelo_ml.dibujo_arbol"):
+            # Figure sin pyplot: se puede dibujar desde un hilo secundario de la GUI
+            fig = Figure(figsize=(20, 10))
+            FigureCanvasAgg(fig)  # plot_tree necesita el renderizador del lienzo para medir los textos
+            plot_tree(estimator, feature_names=["latitud", "lon"], class_names=troncales, filled=True,
+                      ax=fig.subplots())
+            with escritura_atomica(ruta_imagen, sufijo=".tmp.png") as temporal:
+                fig.savefig(temporal)
+    print(f"Árbol de decisión guardado como '{ruta_imagen}'.")
+    return ruta_imagen
 
-    estimator = modelo.estimators_[0]  # Obtener el primer árbol del bosque
 
-    # Visualizar el árbol y guardarlo como imagen
-    plt.figure(figsize=(20, 10))
-    plot_tree(estimator, feature_names=["latitud", "lon"], filled=True)
-    plt.savefig("resources/arbol_decision.png")  # Guardar el árbol como imagen
-    plt.close()
-    print("Árbol de decisión guardado como 'resources/arbol_decision.png'.")
-    return troncal
+def _arbol_vigente(ruta_imagen):
+    """True si la imagen existe y es más reciente que el modelo y el snapshot de estaciones."""
+    if not os.path.exists(ruta_imagen):
+        return False
+    fuentes = [os.path.getmtime(ruta) for ruta in (RUTA_MODELO, RUTA_SNAPSHOT_ESTACIONES) if os.path.exists(ruta)]
+    return os.path.getmtime(ruta_imagen) >= max(fuentes, default=0)
 
 
 def exportar_estaciones_csv(estaciones, ruta_csv):
@@ -71,9 +395,13 @@ def exportar_estaciones_csv(estaciones, ruta_csv):
     Exporta la lista de estaciones a un archivo CSV.
 
     Parámetros:
-        estaciones (list): Lista de diccionarios con datos de estaciones.
+        estaciones (list | StationStore): Estaciones a exportar.
         ruta_csv (str): Ruta donde guardar el archivo CSV.
     """
-    df = pd.DataFrame(estaciones)
+    df = a_dataframe(estaciones)
     df.to_csv(ruta_csv, index=False, encoding='utf-8')
-    print(f"✅ Datos exportados a {ruta_csv}")
\ No newline at end of file
+    print(f"✅ Datos exportados a {ruta_csv}")
+
+
+if __name__ == "__main__":
+    entrenar_modelo()
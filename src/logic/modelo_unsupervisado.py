@@ -1,55 +1,319 @@
+import hashlib
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+import shutil
+import threading
+import zipfile
+
+import numpy as np
 from dotenv import load_dotenv
-from src.logic.data import cargar_estaciones_api
+from src.logic.data import DIRECTORIO_CACHE, cargar_estaciones
+from src.logic.estaciones import a_dataframe
+from src.utils.archivos import escritura_atomica
+from src.utils.perfilado import contar, medir
 
 # Cargar la URL desde .env
 load_dotenv()
 API_URL = os.getenv("API_TRANSMILENIO")
 
-def realizar_agrupamiento_kmeans():
-    if not API_URL:
-        raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
+RUTA_AGRUPAMIENTO = "resources/agrupamiento_kmeans.png"
+RUTA_CSV_AGRUPAMIENTO = "resources/estaciones_clusterizadas.csv"
+CANDIDATOS_K = tuple(range(2, 11))  # Números de clústeres evaluados al elegir k
+CRITERIOS_K = ("silhouette", "inercia")
+UMBRAL_MINIBATCH = 10_000  # Desde este número de estaciones se usa MiniBatchKMeans
+TAM_LOTE_MINIBATCH = 4096
+MUESTRA_SILHOUETTE = 5000  # Puntos usados para estimar el silhouette en conjuntos grandes
+SEMILLA = 42
+VERSION_AGRUPAMIENTO = 1  # Cambia si cambia el algoritmo: invalida los resultados guardados
+
+# Resultados ya calculados en este proceso, por huella (ver `huella_agrupamiento`)
+_resultados = {}
+_lock_resultados = threading.Lock()
+
+
+class ResultadoAgrupamiento:
+    """
+    Resultado de `agrupar_estaciones`.
+
+    Atributos:
+        huella (str): Huella de los datos y parámetros que lo produjeron.
+        k (int): Número de clústeres.
+        etiquetas (numpy.ndarray): Clúster de cada estación.
+        centros (numpy.ndarray): Centro (latitud, longitud) de cada clúster.
+        criterio (str): Criterio con que se eligió k, o None si se fijó.
+        puntajes (dict): Puntaje de cada k evaluado (silhouette o inercia).
+    """
+
+    __slots__ = ("huella", "k", "etiquetas", "centros", "criterio", "puntajes")
+
+    def __init__(self, huella, k, etiquetas, centros, criterio=None, puntajes=None):
+        self.huella = huella
+        self.k = k
+        self.etiquetas = etiquetas
+        self.centros = centros
+        self.criterio = criterio
+        self.puntajes = puntajes or {}
+
+    def guardar(self, ruta_archivo):
+        """Guarda el resultado en un `.npz` (escritura atómica)."""
+        with escritura_atomica(ruta_archivo, sufijo=".tmp.npz") as temporal:
+            np.savez(temporal, huella=np.array(self.huella), k=np.array(self.k),
+                     etiquetas=self.etiquetas, centros=self.centros, criterio=np.array(self.criterio or ""),
+                     candidatos=np.array(list(self.puntajes), dtype=np.int64),
+                     puntajes=np.array(list(self.puntajes.values()), dtype=np.float64))
+
+    @classmethod
+    def cargar(cls, ruta_archivo):
+        with np.load(ruta_archivo, allow_pickle=False) as datos:
+            return cls(str(datos["huella"]), int(datos["k"]), datos["etiquetas"], datos["centros"],
+                       str(datos["criterio"]) or None,
+                       dict(zip(datos["candidatos"].tolist(), datos["puntajes"].tolist())))
+
+
+def huella_agrupamiento(X, n_clusters=None, candidatos=CANDIDATOS_K, criterio="inercia"):
+    """
+    Huella de las coordenadas y de los parámetros del agrupamiento.
+
+    Retorna:
+        str: Huella SHA-256 en hexadecimal.
+    """
+    h = hashlib.sha256()
+    h.update(f"v{VERSION_AGRUPAMIENTO}\0{n_clusters}\0{tuple(candidatos)}\0{criterio}\0{SEMILLA}\0".encode("utf-8"))
+    h.update(np.ascontiguousarray(X, dtype="<f8").tobytes())
+    return h.hexdigest()
+
+
+@medir()
+def ajustar_kmeans(X, k, semilla=SEMILLA):
+    """
+    Ajusta KMeans con `k` clústeres; MiniBatchKMeans si hay muchas estaciones.
+
+    Retorna:
+        sklearn.cluster.KMeans | sklearn.cluster.MiniBatchKMeans: El modelo ajustado.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    if len(X) >= UMBRAL_MINIBATCH:
+        modelo = MiniBatchKMeans(n_clusters=k, batch_size=TAM_LOTE_MINIBATCH, n_init=3, random_state=semilla)
+    else:
+        modelo = KMeans(n_clusters=k, n_init=10, random_state=semilla)
+    return modelo.fit(X)
+
+
+@medir()
+def seleccionar_k(X, candidatos=CANDIDATOS_K, criterio="inercia", hilos=None):
+    """
+    Elige el número de clústeres evaluando los candidatos en paralelo.
+
+    Parámetros:
+        - X (numpy.ndarray): Coordenadas (latitud, longitud) de las estaciones.
+        - candidatos (iterable): Valores de k a evaluar.
+        - criterio (str): Cómo se elige k:
+            - "silhouette": el de mayor coeficiente silhouette (estimado sobre una
+              muestra de `MUESTRA_SILHOUETTE` puntos en conjuntos grandes).
+            - "inercia": el codo de la curva de inercia (el punto más alejado de la
+              recta entre el primer y el último candidato).
+        - hilos (int, opcional): Ajustes simultáneos; por defecto uno por núcleo.
+
+    Retorna:
+        tuple: El k elegido, su modelo ajustado y un diccionario con el puntaje de cada k.
+
+    Lanza:
+        ValueError: Si el criterio no es válido o no hay candidatos posibles.
+    """
+    from joblib import Parallel, delayed
+    from threadpoolctl import threadpool_limits
+
+    if criterio not in CRITERIOS_K:
+        raise ValueError(f"Criterio de selección de k no válido: {criterio}")
+    candidatos = sorted({k for k in candidatos if 2 <= k < len(X)})
+    if not candidatos:
+        raise ValueError("No hay suficientes estaciones para evaluar ningún número de clústeres")
+    # KMeans libera el GIL: los hilos evitan copiar los datos a otros procesos. Cada ajuste
+    # ya usa un hilo de OpenMP por núcleo; con varios ajustes simultáneos se limita a uno
+    # para no tener (núcleos x núcleos) hilos compitiendo por los mismos núcleos
+    hilos = hilos or os.cpu_count() or 1
+    with threadpool_limits(limits=1 if hilos > 1 else None):
+        modelos = Parallel(n_jobs=hilos, prefer="threads")(
+            delayed(_evaluar_k)(X, k, criterio) for k in candidatos)
+    puntajes = {k: puntaje for k, (_, puntaje) in zip(candidatos, modelos)}
+    if criterio == "silhouette":
+        posicion = max(range(len(candidatos)), key=lambda i: modelos[i][1])
+    else:
+        posicion = _codo(candidatos, [puntaje for _, puntaje in modelos])
+    return candidatos[posicion], modelos[posicion][0], puntajes
 
-    # 1. Cargar estaciones desde la API
-    estaciones = cargar_estaciones_api(API_URL)
 
-    # 2. Crear DataFrame
-    estaciones_df = pd.DataFrame(estaciones)
+def _evaluar_k(X, k, criterio):
+    from sklearn.metrics import silhouette_score
 
-    # 3. Eliminar entradas sin coordenadas válidas
+    modelo = ajustar_kmeans(X, k)
+    if criterio == "inercia":
+        return modelo, float(modelo.inertia_)
+    muestra = MUESTRA_SILHOUETTE if len(X) > MUESTRA_SILHOUETTE else None
+    return modelo, float(silhouette_score(X, modelo.labels_, sample_size=muestra, random_state=SEMILLA))
+
+
+def _codo(candidatos, inercias):
+    """Posición del punto de la curva más alejado de la recta entre sus extremos."""
+    if len(candidatos) < 3:
+        return 0
+    x = np.asarray(candidatos, dtype=np.float64)
+    y = np.asarray(inercias, dtype=np.float64)
+    # Se normalizan ambos ejes para que la escala de la inercia no domine
+    x = (x - x[0]) / (x[-1] - x[0])
+    rango = y[0] - y[-1]
+    y = (y - y[-1]) / rango if rango else np.zeros_like(y)
+    # Recta de (0, 1) a (1, 0): distancia proporcional a |x + y - 1|
+    return int(np.argmax(np.abs(x + y - 1)))
+
+
+@medir()
+def agrupar_estaciones(X, n_clusters=None, candidatos=CANDIDATOS_K, criterio="inercia", hilos=None,
+                       directorio_cache=DIRECTORIO_CACHE):
+    """
+    Agrupa coordenadas con KMeans, reutilizando resultados de los mismos datos.
+
+    El resultado se guarda en memoria y en `directorio_cache` con la huella de las
+    coordenadas y los parámetros (ver `huella_agrupamiento`), de modo que repetir el
+    agrupamiento de los mismos datos no vuelve a ajustar ningún modelo.
+
+    Parámetros:
+        - X (array-like): Coordenadas (latitud, longitud), de forma (n, 2).
+        - n_clusters (int, opcional): Número de clústeres. Si se omite, se elige entre
+          `candidatos` con `seleccionar_k`.
+        - candidatos (iterable): Valores de k a evaluar.
+        - criterio (str): Criterio de selección de k (ver `seleccionar_k`).
+        - hilos (int, opcional): Ajustes simultáneos al evaluar los candidatos.
+        - directorio_cache (str, opcional): Carpeta de los resultados guardados. Si es
+          None solo se guardan en memoria.
+
+    Retorna:
+        ResultadoAgrupamiento: Clúster de cada estación, centros y puntajes.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    huella = huella_agrupamiento(X, n_clusters, candidatos, criterio)
+    with _lock_resultados:
+        resultado = _resultados.get(huella)
+    if resultado is not None:
+        contar("modelo_unsupervisado.resultado_en_memoria")
+        return resultado
+    ruta_archivo = _ruta_resultado(directorio_cache, huella, "npz")
+    if ruta_archivo and os.path.exists(ruta_archivo):
+        try:
+            resultado = ResultadoAgrupamiento.cargar(ruta_archivo)
+            contar("modelo_unsupervisado.resultado_en_disco")
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            print(f"⚠️ No se pudo leer el agrupamiento guardado: {e}")
+    if resultado is None or resultado.huella != huella:
+        if n_clusters is None:
+            k, modelo, puntajes = seleccionar_k(X, candidatos, criterio, hilos)
+            resultado = ResultadoAgrupamiento(huella, k, modelo.labels_, modelo.cluster_centers_, criterio, puntajes)
+        else:
+            modelo = ajustar_kmeans(X, n_clusters)
+            resultado = ResultadoAgrupamiento(huella, n_clusters, modelo.labels_, modelo.cluster_centers_)
+        if ruta_archivo:
+            try:
+                resultado.guardar(ruta_archivo)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el agrupamiento: {e}")
+    with _lock_resultados:
+        _resultados[huella] = resultado
+    return resultado
+
+
+@medir()
+def graficar_agrupamiento(X, resultado, ruta_imagen=RUTA_AGRUPAMIENTO):
+    """
+    Dibuja las estaciones coloreadas por clúster y guarda la imagen.
+
+    Los colores salen de un mapa de colores con tantos tonos como clústeres, así que
+    funciona con cualquier k.
+    """
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    # Figure sin pyplot: se puede dibujar desde un hilo secundario de la GUI
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    nombre_mapa = "tab10" if resultado.k <= 10 else "tab20" if resultado.k <= 20 else "turbo"
+    colores = matplotlib.colormaps[nombre_mapa].resampled(resultado.k)
+    for i in range(resultado.k):
+        puntos = X[resultado.etiquetas == i]
+        ax.scatter(puntos[:, 1], puntos[:, 0], color=colores(i), label=f'Cluster {i}', alpha=0.6)
+    titulo = 'Agrupación de Estaciones TransMilenio (KMeans)'
+    if resultado.criterio:
+        titulo += f' - k={resultado.k} elegido por {resultado.criterio}'
+    ax.set_title(titulo)
+    ax.set_xlabel('Longitud')
+    ax.set_ylabel('Latitud')
+    ax.legend(ncol=1 if resultado.k <= 10 else 2, fontsize="small")
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(ruta_imagen)
+    return ruta_imagen
+
+
+@medir()
+def realizar_agrupamiento_kmeans(estaciones=None, n_clusters=None, candidatos=CANDIDATOS_K, criterio="inercia",
+                                 hilos=None, directorio_cache=DIRECTORIO_CACHE):
+    """
+    Agrupa las estaciones con KMeans, guarda el gráfico y exporta el CSV con el clúster.
+
+    Si las mismas estaciones ya se agruparon con los mismos parámetros, se reutilizan
+    tanto el ajuste como el gráfico (ver `agrupar_estaciones`).
+
+    Parámetros:
+        - estaciones (list | StationStore, opcional): Estaciones a agrupar. Si se omite,
+          se cargan desde la API definida en `API_TRANSMILENIO`.
+        - n_clusters (int, opcional): Número de clústeres; por defecto se elige
+          automáticamente entre `candidatos`.
+        - candidatos (iterable): Valores de k a evaluar.
+        - criterio (str): "silhouette" o "inercia" (ver `seleccionar_k`).
+        - hilos (int, opcional): Ajustes simultáneos al evaluar los candidatos.
+        - directorio_cache (str, opcional): Carpeta de los resultados guardados.
+
+    Retorna:
+        ResultadoAgrupamiento: El agrupamiento calculado o reutilizado.
+
+    Lanza:
+        ValueError: Si no se entregan estaciones y no existe la variable API_TRANSMILENIO.
+    """
+    # 1. Cargar estaciones desde la API
+    if estaciones is None:
+        if not API_URL:
+            raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
+        estaciones = cargar_estaciones(API_URL)
+
+    # 2. Crear DataFrame y eliminar entradas sin coordenadas válidas
+    estaciones_df = a_dataframe(estaciones)
     estaciones_df = estaciones_df[(estaciones_df['latitud'] != 0) & (estaciones_df['lon'] != 0)]
 
-    # 4. Seleccionar características (latitud y longitud)
-    X = estaciones_df[['latitud', 'lon']]
-
-    # 5. Aplicar KMeans con 5 clústeres (puedes ajustar el número de clústeres según el análisis)
-    kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
-    estaciones_df['cluster'] = kmeans.fit_predict(X)
-
-    # 6. Graficar agrupaciones
-    plt.figure(figsize=(10, 6))
-    colors = ['red', 'green', 'blue', 'purple', 'orange']
-    for i in range(5):
-        cluster_points = estaciones_df[estaciones_df['cluster'] == i]
-        plt.scatter(cluster_points['lon'], cluster_points['latitud'],
-                    c=colors[i], label=f'Cluster {i}', alpha=0.6)
-
-    plt.title('Agrupación de Estaciones TransMilenio (KMeans)')
-    plt.xlabel('Longitud')
-    plt.ylabel('Latitud')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-
-    # 7. Guardar resultado
-    output_path = "resources/agrupamiento_kmeans.png"
-    plt.savefig(output_path)
-    print(f"✅ Clustering realizado y gráfico guardado en: {output_path}")
-
-    # 8. Exportar CSV con cluster asignado
-    csv_path = "resources/estaciones_clusterizadas.csv"
-    estaciones_df.to_csv(csv_path, index=False, encoding='utf-8')
-    print(f"✅ Estaciones exportadas con clúster a: {csv_path}")
+    # 3. Agrupar por latitud y longitud (o reutilizar el resultado de los mismos datos)
+    X = estaciones_df[['latitud', 'lon']].to_numpy(dtype=np.float64)
+    resultado = agrupar_estaciones(X, n_clusters, candidatos, criterio, hilos, directorio_cache)
+    estaciones_df = estaciones_df.assign(cluster=resultado.etiquetas)
+
+    # 4. Gráfico: se copia el ya dibujado para estos datos, si existe
+    imagen_guardada = _ruta_resultado(directorio_cache, resultado.huella, "png")
+    if imagen_guardada and os.path.exists(imagen_guardada):
+        contar("modelo_unsupervisado.grafico_reutilizado")
+        shutil.copyfile(imagen_guardada, RUTA_AGRUPAMIENTO)
+    else:
+        graficar_agrupamiento(X, resultado, RUTA_AGRUPAMIENTO)
+        if imagen_guardada:
+            try:
+                shutil.copyfile(RUTA_AGRUPAMIENTO, imagen_guardada)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el gráfico del agrupamiento: {e}")
+    print(f"✅ Clustering realizado (k={resultado.k}) y gráfico guardado en: {RUTA_AGRUPAMIENTO}")
+
+    # 5. Exportar CSV con cluster asignado
+    estaciones_df.to_csv(RUTA_CSV_AGRUPAMIENTO, index=False, encoding='utf-8')
+    print(f"✅ Estaciones exportadas con clúster a: {RUTA_CSV_AGRUPAMIENTO}")
+    return resultado
+
+
+def _ruta_resultado(directorio_cache, huella, extension):
+    if not directorio_cache:
+        return None
+    return os.path.join(directorio_cache, f"agrupamiento_{huella[:16]}.{extension}")
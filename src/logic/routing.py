@@ -1,86 +1,721 @@
+import functools
+import glob
+import itertools
+import os
+import weakref
+import zipfile
+
 import networkx as nx
+import numpy as np
+from src.logic.cache_rutas import CacheRutas
+from src.logic.estaciones import StationStore
+from src.logic.grafo_csr import DIRECTORIO_GRAFOS, GrafoCSR, huella_grafo
 from src.utils.distance import calcular_distancia
+from src.utils.perfilado import contar, medir, seccion
+from src.utils.spatial import IndiceEspacial
+
+MODOS_GRAFO = ("rejilla", "referencia")
+MODELOS_GRAFO = ("distancia", "lineas")
+METODOS_BUSQUEDA = ("dijkstra", "astar", "bidireccional")
+MOTORES = ("networkx", "csr")
+_TAM_CELDA_MIN_KM = 1e-6  # Evita celdas de tamaño cero cuando umbral_km es 0
+_TAM_CELDA_ALTERNATIVAS_KM = 1.0
+
+# Modelo de líneas (ver `construir_grafo_lineas`)
+TRAMO_MAX_KM = 2.5  # Distancia máxima entre dos estaciones consecutivas de una troncal
+RADIO_TRANSBORDO_KM = 0.8  # Distancia máxima a pie para cambiar de troncal
+PENALIZACION_TRANSBORDO_KM = 1.0  # Costo de cada transbordo, en kilómetros equivalentes
+
+# Índices de alternativas y copias CSR por grafo; se liberan junto con el grafo
+_INDICES_ALTERNATIVAS = weakref.WeakKeyDictionary()
+_GRAFOS_CSR = weakref.WeakKeyDictionary()
+
+# Resultados de búsquedas recientes, por versión de grafo (ver `version_grafo`)
+CACHE_RUTAS = CacheRutas()
+_VERSIONES = itertools.count(1)
 
 
-def construir_grafo_estaciones(estaciones, umbral_km=1.0):
+@medir()
+def construir_grafo_estaciones(estaciones, umbral_km=1.0, modo="rejilla"):
     """
     Construye un grafo de estaciones basado en la distancia entre ellas.
 
     Parámetros:
-        - estaciones (list): Lista de diccionarios con información de las estaciones.
+        - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
         - umbral_km (float): Distancia máxima en kilómetros para conectar dos estaciones.
+        - modo (str): Estrategia para encontrar los pares cercanos:
+            - "rejilla": usa un índice espacial y solo calcula la distancia entre
+              estaciones de celdas vecinas (por defecto).
+            - "referencia": compara todos los pares de estaciones (O(n²)).
 
     Retorna:
         networkx.Graph: Grafo con las estaciones como nodos y las conexiones como aristas.
+
+    Lanza:
+        ValueError: Si el modo no es válido.
     """
-    G = nx.Graph()
+    if modo not in MODOS_GRAFO:
+        raise ValueError(f"Modo de construcción no válido: {modo}")
+    G = nx.Graph(modelo="distancia", umbral_km=umbral_km)
     for est in estaciones:
         G.add_node(est["nombre"], lat=est["latitud"], lon=est["lon"], troncal=est["troncal"])
-    for i, est1 in enumerate(estaciones):
-        for est2 in estaciones[i + 1:]:
-            dist = calcular_distancia(est1["latitud"], est1["lon"], est2["latitud"], est2["lon"])
-            if dist <= umbral_km:
-                G.add_edge(est1["nombre"], est2["nombre"], weight=dist)
+    if modo == "referencia":
+        for i, est1 in enumerate(estaciones):
+            for est2 in estaciones[i + 1:]:
+                dist = calcular_distancia(est1["latitud"], est1["lon"], est2["latitud"], est2["lon"])
+                if dist <= umbral_km:
+                    G.add_edge(est1["nombre"], est2["nombre"], weight=dist)
+    elif len(estaciones) and umbral_km >= 0:
+        if isinstance(estaciones, StationStore):
+            nombres, lats, lons = estaciones.nombres, estaciones.latitudes, estaciones.longitudes
+        else:
+            nombres = [est["nombre"] for est in estaciones]
+            lats = [est["latitud"] for est in estaciones]
+            lons = [est["lon"] for est in estaciones]
+        indice = IndiceEspacial(lats, lons, tam_celda_km=max(umbral_km, _TAM_CELDA_MIN_KM))
+        pares_i, pares_j, distancias = indice.pares_en_radio(umbral_km)
+        for i, j, dist in zip(pares_i.tolist(), pares_j.tolist(), distancias.tolist()):
+            G.add_edge(nombres[i], nombres[j], weight=dist)
+    nueva_version_grafo(G)
     return G
 
 
-def buscar_mejor_ruta_estaciones(grafo, origen, destino):
+@medir()
+def construir_grafo_lineas(estaciones, tramo_max_km=TRAMO_MAX_KM, radio_transbordo_km=RADIO_TRANSBORDO_KM,
+                           penalizacion_km=PENALIZACION_TRANSBORDO_KM):
     """
-    Busca la mejor ruta entre dos estaciones en el grafo usando el algoritmo de Dijkstra.
+    Construye un grafo de estaciones que sigue las troncales y modela los transbordos.
+
+    En lugar de conectar todas las estaciones cercanas, cada troncal se recorre en
+    secuencia: sus estaciones se unen con el árbol de expansión mínima de las
+    distancias entre ellas (en una troncal, la cadena de estaciones consecutivas),
+    sin tramos de más de `tramo_max_km`. Además, cada estación se conecta con la
+    estación más cercana de cada otra troncal a `radio_transbordo_km` o menos; esas
+    aristas de transbordo cuestan su distancia más `penalizacion_km`, de modo que las
+    rutas evitan cambiar de troncal sin necesidad. El grafo resultante tiene muchas
+    menos aristas que el de `construir_grafo_estaciones` y las búsquedas son más rápidas.
+
+    El peso (`weight`) de cada arista es su costo. El grafo se marca con
+    `graph["modelo"] = "lineas"`, y `buscar_mejor_ruta_estaciones` informa la distancia
+    recorrida sin las penalizaciones (ver también `contar_transbordos`).
 
     Parámetros:
-        - grafo (networkx.Graph): Grafo de estaciones.
+        - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
+        - tramo_max_km (float): Distancia máxima entre dos estaciones consecutivas de una troncal.
+        - radio_transbordo_km (float): Distancia máxima para conectar estaciones de troncales distintas.
+        - penalizacion_km (float): Costo adicional de cada transbordo, en kilómetros.
+
+    Retorna:
+        networkx.Graph: Grafo con las estaciones como nodos y los tramos y transbordos como aristas.
+    """
+    if not isinstance(estaciones, StationStore):
+        estaciones = StationStore(estaciones)
+    G = nx.Graph(modelo="lineas", tramo_max_km=tramo_max_km, radio_transbordo_km=radio_transbordo_km,
+                 penalizacion_km=penalizacion_km)
+    for est in estaciones:
+        G.add_node(est["nombre"], lat=est["latitud"], lon=est["lon"], troncal=est["troncal"])
+    if not len(estaciones):
+        nueva_version_grafo(G)
+        return G
+    nombres = estaciones.nombres
+    lats = np.asarray(estaciones.latitudes, dtype=np.float64)
+    lons = np.asarray(estaciones.longitudes, dtype=np.float64)
+    codigos = np.asarray(estaciones.codigos_troncal, dtype=np.int64)
+
+    for codigo in np.unique(codigos).tolist():
+        _unir_tramos(G, nombres, lats, lons, np.flatnonzero(codigos == codigo), tramo_max_km)
+
+    # Transbordos: de cada estación a la más cercana de cada otra troncal
+    indice = IndiceEspacial(lats, lons, tam_celda_km=max(radio_transbordo_km, _TAM_CELDA_MIN_KM))
+    pares_i, pares_j, distancias = indice.pares_en_radio(radio_transbordo_km)
+    distinta = codigos[pares_i] != codigos[pares_j]
+    pares_i, pares_j, distancias = pares_i[distinta], pares_j[distinta], distancias[distinta]
+    desde = np.concatenate([pares_i, pares_j])
+    hacia = np.concatenate([pares_j, pares_i])
+    dist = np.concatenate([distancias, distancias])
+    grupo = desde * (int(codigos.max()) + 1) + codigos[hacia]
+    orden = np.lexsort((hacia, dist, grupo))
+    primero = np.ones(len(orden), dtype=bool)
+    primero[1:] = grupo[orden][1:] != grupo[orden][:-1]
+    elegidos = orden[primero]
+    for i, j, d in zip(desde[elegidos].tolist(), hacia[elegidos].tolist(), dist[elegidos].tolist()):
+        if not G.has_edge(nombres[i], nombres[j]):
+            G.add_edge(nombres[i], nombres[j], weight=d + penalizacion_km)
+    nueva_version_grafo(G)
+    return G
+
+
+def _unir_tramos(G, nombres, lats, lons, miembros, tramo_max_km):
+    """Une las estaciones `miembros` de una troncal con su árbol de expansión mínima (Kruskal)."""
+    if len(miembros) < 2:
+        return
+    indice = IndiceEspacial(lats[miembros], lons[miembros], tam_celda_km=max(tramo_max_km, _TAM_CELDA_MIN_KM))
+    pares_i, pares_j, distancias = indice.pares_en_radio(tramo_max_km)
+    orden = np.argsort(distancias, kind="stable")
+    conjuntos = _Conjuntos(len(miembros))
+    faltantes = len(miembros) - 1
+    for i, j, dist in zip(pares_i[orden].tolist(), pares_j[orden].tolist(), distancias[orden].tolist()):
+        if conjuntos.unir(i, j):
+            G.add_edge(nombres[miembros[i]], nombres[miembros[j]], weight=dist)
+            faltantes -= 1
+            if not faltantes:
+                break
+
+
+class _Conjuntos:
+    """Conjuntos disjuntos (unión por tamaño con compresión de caminos)."""
+
+    __slots__ = ("padre", "tamano")
+
+    def __init__(self, n):
+        self.padre = list(range(n))
+        self.tamano = [1] * n
+
+    def raiz(self, x):
+        padre = self.padre
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a, b):
+        """Une los conjuntos de `a` y `b`. Retorna False si ya estaban unidos."""
+        a, b = self.raiz(a), self.raiz(b)
+        if a == b:
+            return False
+        if self.tamano[a] < self.tamano[b]:
+            a, b = b, a
+        self.padre[b] = a
+        self.tamano[a] += self.tamano[b]
+        return True
+
+
+@medir()
+def obtener_grafo_estaciones(estaciones, umbral_km=1.0, directorio_cache=DIRECTORIO_GRAFOS, modelo="distancia"):
+    """
+    Igual que `construir_grafo_estaciones`, pero reutiliza el grafo guardado en disco.
+
+    El grafo se guarda en formato CSR (ver `GrafoCSR`) con el nombre de la huella de
+    las estaciones y del umbral (ver `huella_grafo`): si las estaciones o el umbral
+    cambian, la huella también, y el grafo se vuelve a construir. Solo se conserva el
+    último grafo guardado de cada modelo.
+
+    Parámetros:
+        - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
+        - umbral_km (float): Distancia máxima en kilómetros para conectar dos estaciones.
+          No se usa en el modelo "lineas".
+        - directorio_cache (str, opcional): Carpeta del grafo guardado. Si es None no se persiste.
+        - modelo (str): Modelo del grafo:
+            - "distancia": conecta las estaciones a `umbral_km` o menos
+              (`construir_grafo_estaciones`, por defecto).
+            - "lineas": sigue las troncales y modela los transbordos (`construir_grafo_lineas`).
+
+    Retorna:
+        networkx.Graph: Grafo con las estaciones como nodos y las conexiones como aristas.
+
+    Lanza:
+        ValueError: Si el modelo no es válido.
+    """
+    if modelo not in MODELOS_GRAFO:
+        raise ValueError(f"Modelo de grafo no válido: {modelo}")
+    if modelo == "lineas":
+        parametros = {"tramo_max_km": TRAMO_MAX_KM, "radio_transbordo_km": RADIO_TRANSBORDO_KM,
+                      "penalizacion_km": PENALIZACION_TRANSBORDO_KM}
+        construir = functools.partial(construir_grafo_lineas, **parametros)
+        huella = huella_grafo(estaciones, TRAMO_MAX_KM, modelo, RADIO_TRANSBORDO_KM, PENALIZACION_TRANSBORDO_KM)
+        prefijo = "grafo_lineas_"
+    else:
+        parametros = {"umbral_km": umbral_km}
+        construir = functools.partial(construir_grafo_estaciones, **parametros)
+        huella = huella_grafo(estaciones, umbral_km)
+        prefijo = "grafo_"
+    if not directorio_cache:
+        return construir(estaciones)
+    ruta_archivo = os.path.join(directorio_cache, f"{prefijo}{huella[:16]}.npz")
+    if os.path.exists(ruta_archivo):
+        try:
+            guardado = GrafoCSR.cargar(ruta_archivo)
+            if guardado.huella == huella:
+                contar("routing.grafo_desde_disco")
+                grafo = guardado.a_networkx()
+                grafo.graph.update(modelo=modelo, **parametros)
+                nueva_version_grafo(grafo)
+                _registrar_csr(grafo, guardado)
+                return grafo
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            print(f"⚠️ No se pudo leer el grafo guardado: {e}")
+
+    grafo = construir(estaciones)
+    grafo_csr = _registrar_csr(grafo, GrafoCSR.desde_networkx(grafo, huella))
+    try:
+        grafo_csr.guardar(ruta_archivo)
+        for anterior in glob.glob(os.path.join(directorio_cache, f"{prefijo}{'?' * 16}.npz")):
+            if anterior != ruta_archivo:
+                os.remove(anterior)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el grafo: {e}")
+    return grafo
+
+
+class CambiosEstaciones:
+    """
+    Diferencias entre dos versiones de las estaciones (ver `comparar_estaciones`).
+
+    Atributos:
+        agregadas (list): Nombres de las estaciones nuevas.
+        eliminadas (list): Nombres de las estaciones que ya no están.
+        modificadas (list): Nombres de las estaciones con otras coordenadas o troncal.
+    """
+
+    __slots__ = ("agregadas", "eliminadas", "modificadas")
+
+    def __init__(self, agregadas, eliminadas, modificadas):
+        self.agregadas = agregadas
+        self.eliminadas = eliminadas
+        self.modificadas = modificadas
+
+    def __bool__(self):
+        return bool(self.agregadas or self.eliminadas or self.modificadas)
+
+    def __repr__(self):
+        return (f"CambiosEstaciones(agregadas={len(self.agregadas)}, eliminadas={len(self.eliminadas)}, "
+                f"modificadas={len(self.modificadas)})")
+
+
+def comparar_estaciones(anteriores, nuevas):
+    """
+    Compara dos versiones de las estaciones por nombre.
+
+    Parámetros:
+        - anteriores (list | StationStore): Estaciones anteriores.
+        - nuevas (list | StationStore): Estaciones nuevas.
+
+    Retorna:
+        CambiosEstaciones: Estaciones agregadas, eliminadas y modificadas.
+    """
+    previas, actuales = _datos_por_nombre(anteriores), _datos_por_nombre(nuevas)
+    return CambiosEstaciones(
+        [nombre for nombre in actuales if nombre not in previas],
+        [nombre for nombre in previas if nombre not in actuales],
+        [nombre for nombre, datos in actuales.items() if nombre in previas and previas[nombre] != datos],
+    )
+
+
+def _datos_por_nombre(estaciones):
+    if isinstance(estaciones, StationStore):
+        troncales = estaciones.troncales
+        return {nombre: (lat, lon, troncales[codigo]) for nombre, lat, lon, codigo in zip(
+            estaciones.nombres, estaciones.latitudes.tolist(), estaciones.longitudes.tolist(),
+            estaciones.codigos_troncal.tolist())}
+    return {est["nombre"]: (est["latitud"], est["lon"], est["troncal"]) for est in estaciones}
+
+
+@medir()
+def actualizar_grafo_estaciones(grafo, anteriores, nuevas):
+    """
+    Ajusta un grafo a una nueva versión de las estaciones sin reconstruirlo.
+
+    Solo se tocan las aristas cercanas a las estaciones que cambiaron: las estaciones
+    eliminadas se quitan con sus aristas, las modificadas pierden las suyas, y las
+    agregadas o modificadas se conectan con las estaciones a `umbral_km` o menos,
+    consultando un índice espacial de las estaciones nuevas. En el modelo de líneas
+    se recalculan los tramos de las troncales afectadas y los transbordos de las
+    estaciones a `radio_transbordo_km` de algún cambio. El resultado tiene las mismas
+    aristas y pesos que construir el grafo de nuevo con `nuevas`.
+
+    Si hubo cambios, el grafo recibe una versión nueva (ver `nueva_version_grafo`),
+    con lo que se descartan las rutas guardadas y las copias derivadas del grafo.
+    El grafo se modifica en el lugar: no debe consultarse mientras se actualiza.
+
+    Parámetros:
+        - grafo (networkx.Graph): Grafo construido con `anteriores` por
+          `construir_grafo_estaciones`, `construir_grafo_lineas` u `obtener_grafo_estaciones`.
+        - anteriores (list | StationStore): Estaciones con las que se construyó el grafo.
+        - nuevas (list | StationStore): Nueva versión de las estaciones.
+
+    Retorna:
+        CambiosEstaciones: Los cambios aplicados.
+
+    Lanza:
+        ValueError: Si el grafo no registra el modelo y los parámetros con que se construyó.
+    """
+    modelo = grafo.graph.get("modelo")
+    parametros = ("tramo_max_km", "radio_transbordo_km", "penalizacion_km") if modelo == "lineas" else ("umbral_km",)
+    if modelo not in MODELOS_GRAFO or any(p not in grafo.graph for p in parametros):
+        raise ValueError("El grafo no registra el modelo ni los parámetros con que se construyó")
+    cambios = comparar_estaciones(anteriores, nuevas)
+    if not cambios:
+        return cambios
+    if not isinstance(nuevas, StationStore):
+        nuevas = StationStore(nuevas)
+    nodos = grafo.nodes
+    troncales_previas = {nodos[nombre]['troncal'] for nombre in cambios.eliminadas + cambios.modificadas}
+    posiciones_previas = [(nodos[nombre]['lat'], nodos[nombre]['lon'])
+                          for nombre in cambios.eliminadas + cambios.modificadas]
+    grafo.remove_nodes_from(cambios.eliminadas)
+    for nombre in cambios.modificadas:
+        grafo.remove_edges_from(list(grafo.edges(nombre)))
+    for nombre in cambios.agregadas + cambios.modificadas:
+        est = nuevas.buscar(nombre)
+        grafo.add_node(nombre, lat=est["latitud"], lon=est["lon"], troncal=est["troncal"])
+
+    nombres = nuevas.nombres
+    lats = np.asarray(nuevas.latitudes, dtype=np.float64)
+    lons = np.asarray(nuevas.longitudes, dtype=np.float64)
+    indices = [nuevas.posicion(nombre) for nombre in cambios.agregadas + cambios.modificadas]
+    if modelo == "lineas":
+        _actualizar_lineas(grafo, nuevas, lats, lons, indices, troncales_previas, posiciones_previas)
+    else:
+        umbral_km = grafo.graph["umbral_km"]
+        indice = IndiceEspacial(lats, lons, tam_celda_km=max(umbral_km, _TAM_CELDA_MIN_KM))
+        for i in indices:
+            vecinos, distancias = indice.consultar_radio(lats[i], lons[i], umbral_km)
+            for j, dist in zip(vecinos.tolist(), distancias.tolist()):
+                if j != i:
+                    grafo.add_edge(nombres[i], nombres[j], weight=dist)
+    nueva_version_grafo(grafo)
+    return cambios
+
+
+def _actualizar_lineas(grafo, nuevas, lats, lons, indices, troncales_previas, posiciones_previas):
+    nombres = nuevas.nombres
+    codigos = np.asarray(nuevas.codigos_troncal, dtype=np.int64)
+    nodos = grafo.nodes
+
+    # Tramos: se recalcula el árbol de cada troncal afectada
+    afectadas = set(troncales_previas) | {nuevas.troncales[codigos[i]] for i in indices}
+    for codigo, troncal in enumerate(nuevas.troncales):
+        if troncal not in afectadas:
+            continue
+        miembros = np.flatnonzero(codigos == codigo)
+        grafo.remove_edges_from([(nombres[u], v) for u in miembros.tolist() for v in grafo[nombres[u]]
+                                 if nodos[v]['troncal'] == troncal])
+        _unir_tramos(grafo, nombres, lats, lons, miembros, grafo.graph["tramo_max_km"])
+
+    # Transbordos: solo cambian los de las estaciones a `radio` de algún cambio (A);
+    # también se recalculan los de sus vecinos por transbordo, cuyas aristas se quitan.
+    radio = grafo.graph["radio_transbordo_km"]
+    indice = IndiceEspacial(lats, lons, tam_celda_km=max(radio, _TAM_CELDA_MIN_KM))
+    cercanas = set(indices)
+    for lat, lon in posiciones_previas + [(lats[i], lons[i]) for i in indices]:
+        cercanas.update(indice.consultar_radio(lat, lon, radio)[0].tolist())
+    recalcular = set(cercanas)
+    quitar = []
+    for i in cercanas:
+        nombre = nombres[i]
+        for vecino in grafo[nombre]:
+            if nodos[vecino]['troncal'] != nodos[nombre]['troncal']:
+                recalcular.add(nuevas.posicion(vecino))
+                quitar.append((nombre, vecino))
+    grafo.remove_edges_from(quitar)
+    penalizacion_km = grafo.graph["penalizacion_km"]
+    for i in sorted(recalcular):
+        vecinos, distancias = indice.consultar_radio(lats[i], lons[i], radio)
+        mejores = {}
+        for j, dist in zip(vecinos.tolist(), distancias.tolist()):
+            codigo = codigos[j]
+            if codigo != codigos[i] and (codigo not in mejores or dist < mejores[codigo][1]):
+                mejores[codigo] = (j, dist)
+        for j, dist in mejores.values():
+            if not grafo.has_edge(nombres[i], nombres[j]):
+                grafo.add_edge(nombres[i], nombres[j], weight=dist + penalizacion_km)
+
+
+def version_grafo(grafo):
+    """
+    Versión de un grafo, guardada en `grafo.graph["version"]`.
+
+    Cada grafo construido (o cargado) recibe una versión nueva, que también debe
+    cambiar si se modifica (ver `nueva_version_grafo`). Retorna None si el grafo
+    no tiene versión; sus resultados no se guardan en `CACHE_RUTAS`.
+    """
+    return grafo.graph.get("version") if isinstance(grafo, nx.Graph) else None
+
+
+def nueva_version_grafo(grafo):
+    """
+    Asigna una versión nueva al grafo.
+
+    Se llama al construir o cargar un grafo, y debe llamarse tras modificarlo. Los
+    resultados de la versión anterior de este grafo ya no se usarían, así que se
+    descartan de `CACHE_RUTAS`; los de otros grafos se conservan (los de grafos que ya
+    no se usan salen de la caché por antigüedad o vencimiento).
+
+    Retorna:
+        int: La versión asignada.
+    """
+    anterior = grafo.graph.get("version")
+    grafo.graph["version"] = next(_VERSIONES)
+    if anterior is not None:
+        CACHE_RUTAS.descartar(lambda clave: clave[1] == anterior)
+    return grafo.graph["version"]
+
+
+@medir()
+def buscar_mejor_ruta_estaciones(grafo, origen, destino, metodo="dijkstra", tabla=None, motor="networkx",
+                                 usar_cache=True):
+    """
+    Busca la mejor ruta entre dos estaciones en el grafo.
+
+    La ruta y su distancia se obtienen en una sola búsqueda. Los resultados se
+    guardan en `CACHE_RUTAS` con la versión del grafo, así que repetir una consulta
+    no vuelve a buscar mientras el grafo no cambie.
+
+    Parámetros:
+        - grafo (networkx.Graph | GrafoCSR): Grafo de estaciones.
         - origen (str): Nombre de la estación de origen.
         - destino (str): Nombre de la estación de destino.
+        - metodo (str): Algoritmo de búsqueda:
+            - "dijkstra": Dijkstra desde el origen (por defecto).
+            - "astar": A* con la distancia haversine al destino como heurística.
+              Es admisible porque ningún tramo del grafo es más corto que la
+              distancia en línea recta entre sus extremos.
+            - "bidireccional": Dijkstra simultáneo desde el origen y el destino,
+              conveniente para trayectos largos.
+        - tabla (TablaRutas, opcional): Tabla precalculada del mismo grafo. Si se
+          entrega, la ruta se lee de la tabla en lugar de buscarla.
+        - motor (str): Implementación de la búsqueda:
+            - "networkx": los algoritmos de NetworkX sobre el grafo (por defecto).
+            - "csr": la copia del grafo en arreglos (ver `GrafoCSR`), más liviana y
+              rápida; encuentra las mismas rutas. Se usa siempre si `grafo` ya es un
+              `GrafoCSR`.
+        - usar_cache (bool): Si es False, no se lee ni se escribe `CACHE_RUTAS`.
 
     Retorna:
         tuple: Una tupla con la ruta (lista de nombres de estaciones) y la distancia total.
+
+    Lanza:
+        ValueError: Si el método o el motor no son válidos.
     """
+    if metodo not in METODOS_BUSQUEDA:
+        raise ValueError(f"Método de búsqueda no válido: {metodo}")
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de búsqueda no válido: {motor}")
+    if tabla is not None:
+        ruta, distancia = tabla.ruta(origen, destino)
+        return ruta, _distancia_recorrida(grafo, ruta, distancia)
+    clave = ("ruta", version_grafo(grafo), origen, destino, metodo, motor)
+    if not usar_cache or clave[1] is None:
+        return _buscar_ruta(grafo, origen, destino, metodo, motor)
+    encontrado, resultado = CACHE_RUTAS.obtener(clave)
+    if not encontrado:
+        ruta, distancia = _buscar_ruta(grafo, origen, destino, metodo, motor)
+        resultado = (tuple(ruta) if ruta is not None else None, distancia)
+        CACHE_RUTAS.guardar(clave, resultado)
+    ruta, distancia = resultado
+    # Se entrega una lista nueva para que quien la modifique no altere la caché
+    return (list(ruta) if ruta is not None else None), distancia
+
+
+def _buscar_ruta(grafo, origen, destino, metodo, motor):
+    if motor == "csr" or isinstance(grafo, GrafoCSR):
+        ruta, distancia = obtener_grafo_csr(grafo).ruta_mas_corta(origen, destino, metodo)
+        return ruta, _distancia_recorrida(grafo, ruta, distancia)
     try:
-        ruta = nx.dijkstra_path(grafo, source=origen, target=destino, weight='weight')
-        distancia = nx.dijkstra_path_length(grafo, source=origen, target=destino, weight='weight')
-        return ruta, distancia
+        if metodo == "astar":
+            ruta = nx.astar_path(grafo, origen, destino,
+                                 heuristic=_heuristica_haversine(grafo), weight='weight')
+            distancia = nx.path_weight(grafo, ruta, weight='weight')
+        elif metodo == "bidireccional":
+            distancia, ruta = nx.bidirectional_dijkstra(grafo, origen, destino, weight='weight')
+        else:
+            distancia, ruta = nx.single_source_dijkstra(grafo, origen, destino, weight='weight')
+        return ruta, _distancia_recorrida(grafo, ruta, distancia)
     except nx.NetworkXNoPath:
         return None, None
 
 
-def buscar_ruta_alternativa(grafo, estaciones, origen, destino):
+def _distancia_recorrida(grafo, ruta, costo):
+    """En el modelo de líneas, la distancia de la ruta sin las penalizaciones de transbordo."""
+    if not ruta or not isinstance(grafo, nx.Graph) or grafo.graph.get("modelo") != "lineas":
+        return costo
+    nodos = grafo.nodes
+    total = 0.0
+    for a, b in zip(ruta, ruta[1:]):
+        total += calcular_distancia(nodos[a]['lat'], nodos[a]['lon'], nodos[b]['lat'], nodos[b]['lon'])
+    return total
+
+
+def contar_transbordos(grafo, ruta):
+    """
+    Cuenta los cambios de troncal a lo largo de una ruta.
+
+    Parámetros:
+        - grafo (networkx.Graph): Grafo de estaciones.
+        - ruta (list): Nombres de las estaciones de la ruta.
+
+    Retorna:
+        int: Número de transbordos (0 si la ruta está vacía o es None).
+    """
+    if not ruta:
+        return 0
+    nodos = grafo.nodes
+    return sum(nodos[a]['troncal'] != nodos[b]['troncal'] for a, b in zip(ruta, ruta[1:]))
+
+
+def _heuristica_haversine(grafo):
+    nodos = grafo.nodes
+
+    def heuristica(nodo, destino):
+        a, b = nodos[nodo], nodos[destino]
+        return calcular_distancia(a['lat'], a['lon'], b['lat'], b['lon'])
+
+    return heuristica
+
+
+@medir()
+def buscar_ruta_alternativa(grafo, estaciones, origen, destino, metodo="dijkstra", tabla=None, motor="networkx",
+                            usar_cache=True):
     """
     Busca una ruta alternativa entre dos estaciones en el grafo.
 
     Parámetros:
         - grafo (networkx.Graph): Grafo de estaciones.
-        - estaciones (list): Lista de diccionarios con información de las estaciones.
+        - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
         - origen (str): Nombre de la estación de origen.
         - destino (str): Nombre de la estación de destino.
+        - metodo (str): Algoritmo de búsqueda (ver `buscar_mejor_ruta_estaciones`).
+        - tabla (TablaRutas, opcional): Tabla precalculada del mismo grafo.
+        - motor (str): Implementación de la búsqueda (ver `buscar_mejor_ruta_estaciones`).
+        - usar_cache (bool): Si es False, no se lee ni se escribe `CACHE_RUTAS`.
 
     Retorna:
         tuple: Una tupla con la ruta alternativa (lista de nombres de estaciones),
                la distancia de la ruta alternativa, la distancia mínima a la estación destino,
                y el nombre de la mejor estación alternativa.
     """
-    est_dest = next((est for est in estaciones if est["nombre"] == destino), None)
-    if not est_dest:
-        return None, None, None, None
-
-    dest_troncal = est_dest["troncal"]
-    componente = nx.node_connected_component(grafo, origen)
-
-    candidatos = [n for n in componente if grafo.nodes[n]['troncal'] == dest_troncal]
-    if not candidatos:
-        candidatos = list(componente)
-
-    mejor_estacion = None
-    min_dist = float('inf')
-    for nodo in candidatos:
-        nodo_data = grafo.nodes[nodo]
-        dist = calcular_distancia(nodo_data['lat'],
-                                  nodo_data['lon'],
-                                  est_dest["latitud"],
-                                  est_dest["lon"])
-        if dist < min_dist:
-            min_dist = dist
-            mejor_estacion = nodo
-
-    ruta_alternativa, dist_ruta = buscar_mejor_ruta_estaciones(grafo, origen, mejor_estacion)
+    # Si el destino no está en el grafo, el resultado depende de `estaciones`: no se guarda
+    version = version_grafo(grafo) if usar_cache and tabla is None and destino in grafo else None
+    if version is not None:
+        clave = ("alternativa", version, origen, destino, metodo, motor)
+        encontrado, resultado = CACHE_RUTAS.obtener(clave)
+        if encontrado:
+            ruta, dist_ruta, min_dist, mejor_estacion = resultado
+            return (list(ruta) if ruta is not None else None), dist_ruta, min_dist, mejor_estacion
+    if destino in grafo:
+        datos_dest = grafo.nodes[destino]
+        dest_lat, dest_lon, dest_troncal = datos_dest['lat'], datos_dest['lon'], datos_dest['troncal']
+    else:
+        if isinstance(estaciones, StationStore):
+            est_dest = estaciones.buscar(destino)
+        else:
+            est_dest = next((est for est in estaciones if est["nombre"] == destino), None)
+        if not est_dest:
+            return None, None, None, None
+        dest_lat, dest_lon, dest_troncal = est_dest["latitud"], est_dest["lon"], est_dest["troncal"]
+
+    indice = obtener_indice_alternativas(grafo)
+    mejor_estacion, min_dist = indice.mas_cercana(origen, dest_troncal, dest_lat, dest_lon)
+
+    ruta_alternativa, dist_ruta = buscar_mejor_ruta_estaciones(grafo, origen, mejor_estacion, metodo, tabla, motor,
+                                                               usar_cache)
+    if version is not None:
+        CACHE_RUTAS.guardar(clave, (tuple(ruta_alternativa) if ruta_alternativa is not None else None,
+                                    dist_ruta, min_dist, mejor_estacion))
     return ruta_alternativa, dist_ruta, min_dist, mejor_estacion
+
+
+class IndiceAlternativas:
+    """
+    Índices precalculados de un grafo para `buscar_ruta_alternativa`.
+
+    Guarda la componente conexa de cada estación y, por cada componente, un índice
+    espacial de todas sus estaciones y uno por troncal. Así, la estación de la
+    componente del origen más cercana al destino se obtiene con una consulta de
+    vecino más cercano en lugar de recorrer toda la componente.
+
+    Atributos:
+        componente (dict): Número de componente conexa de cada estación.
+    """
+
+    def __init__(self, grafo):
+        """
+        Parámetros:
+            - grafo (networkx.Graph): Grafo de estaciones con atributos lat, lon y troncal.
+        """
+        self.componente = {}
+        self._grupos = {}
+        nodos = grafo.nodes
+        for c, miembros in enumerate(nx.connected_components(grafo)):
+            por_troncal = {}
+            for nombre in miembros:
+                self.componente[nombre] = c
+                por_troncal.setdefault(nodos[nombre]['troncal'], []).append(nombre)
+            self._grupos[(c, None)] = _GrupoEspacial(grafo, list(miembros))
+            for troncal, nombres in por_troncal.items():
+                self._grupos[(c, troncal)] = _GrupoEspacial(grafo, nombres)
+
+    def mas_cercana(self, origen, troncal, lat, lon):
+        """
+        Busca, en la componente del origen, la estación más cercana a una coordenada.
+
+        Se prefieren las estaciones de la troncal indicada; si la componente no tiene
+        ninguna, se consideran todas sus estaciones.
+
+        Parámetros:
+            - origen (str): Estación que define la componente conexa.
+            - troncal (str): Troncal preferida.
+            - lat (float): Latitud de la coordenada objetivo.
+            - lon (float): Longitud de la coordenada objetivo.
+
+        Retorna:
+            tuple: El nombre de la estación más cercana y su distancia en kilómetros.
+
+        Lanza:
+            KeyError: Si el origen no está en el grafo.
+        """
+        c = self.componente[origen]
+        grupo = self._grupos.get((c, troncal)) or self._grupos[(c, None)]
+        return grupo.mas_cercana(lat, lon)
+
+
+class _GrupoEspacial:
+    __slots__ = ("nombres", "indice")
+
+    def __init__(self, grafo, nombres):
+        self.nombres = nombres
+        self.indice = IndiceEspacial([grafo.nodes[n]['lat'] for n in nombres],
+                                     [grafo.nodes[n]['lon'] for n in nombres],
+                                     tam_celda_km=_TAM_CELDA_ALTERNATIVAS_KM)
+
+    def mas_cercana(self, lat, lon):
+        posicion, distancia = self.indice.mas_cercano(lat, lon)
+        return self.nombres[posicion], distancia
+
+
+def obtener_indice_alternativas(grafo):
+    """
+    Retorna el `IndiceAlternativas` del grafo, construyéndolo solo la primera vez.
+
+    El índice se reconstruye si cambia la versión del grafo (ver `version_grafo`) o su
+    número de estaciones o de conexiones.
+    """
+    firma = (version_grafo(grafo), grafo.number_of_nodes(), grafo.number_of_edges())
+    guardado = _INDICES_ALTERNATIVAS.get(grafo)
+    if guardado is None or guardado[0] != firma:
+        with seccion("routing.indice_alternativas"):
+            guardado = (firma, IndiceAlternativas(grafo))
+        _INDICES_ALTERNATIVAS[grafo] = guardado
+    return guardado[1]
+
+
+def obtener_grafo_csr(grafo):
+    """
+    Retorna la copia en arreglos (`GrafoCSR`) de un grafo, convirtiéndolo solo la primera vez.
+
+    La copia se regenera si cambia la versión del grafo (ver `version_grafo`) o su
+    número de estaciones o de conexiones.
+    """
+    if isinstance(grafo, GrafoCSR):
+        return grafo
+    firma = (version_grafo(grafo), grafo.number_of_nodes(), grafo.number_of_edges())
+    guardado = _GRAFOS_CSR.get(grafo)
+    if guardado is None or guardado[0] != firma:
+        with seccion("routing.conversion_csr"):
+            return _registrar_csr(grafo, GrafoCSR.desde_networkx(grafo))
+    return guardado[1]
+
+
+def _registrar_csr(grafo, grafo_csr):
+    _GRAFOS_CSR[grafo] = ((version_grafo(grafo), grafo.number_of_nodes(), grafo.number_of_edges()), grafo_csr)
+    return grafo_csr
@@ -0,0 +1,161 @@
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.logic.data import cargar_estaciones
+from src.logic.estaciones import StationStore
+from src.logic.routing import (
+    MODELOS_GRAFO,
+    MOTORES,
+    actualizar_grafo_estaciones,
+    contar_transbordos,
+    obtener_grafo_estaciones,
+    buscar_mejor_ruta_estaciones,
+    buscar_ruta_alternativa
+)
+from src.logic.tabla_rutas import RUTA_TABLA, TablaRutas
+
+
+class ServicioRutas:
+    """
+    Motor de rutas sin interfaz gráfica.
+
+    Carga las estaciones y construye el grafo una sola vez; después responde tantas
+    consultas origen/destino como se necesite. Las consultas solo leen el grafo, por
+    lo que una misma instancia puede atender varios hilos a la vez.
+
+    Atributos:
+        estaciones (StationStore): Estaciones indexadas por nombre y coordenadas.
+        grafo (networkx.Graph): Grafo de estaciones.
+        umbral_km (float): Distancia máxima usada para conectar estaciones.
+        tabla (TablaRutas): Tabla de rutas precalculada, o None si no se usa.
+        motor (str): Motor de búsqueda de rutas ("networkx" o "csr").
+        modelo (str): Modelo del grafo ("distancia" o "lineas").
+    """
+
+    def __init__(self, estaciones, umbral_km=1.0, precalcular=False, ruta_tabla=RUTA_TABLA, motor="networkx",
+                 modelo="distancia"):
+        """
+        Parámetros:
+            - estaciones (list | StationStore): Estaciones (diccionarios o almacén indexado).
+            - umbral_km (float): Distancia máxima en kilómetros para conectar dos estaciones.
+            - precalcular (bool): Si es True, responde desde una tabla de rutas de todos
+              los pares (ver `TablaRutas`), guardada en `ruta_tabla` entre sesiones.
+            - ruta_tabla (str, opcional): Archivo de la tabla. Si es None no se persiste.
+            - motor (str): Motor de búsqueda (ver `buscar_mejor_ruta_estaciones`).
+            - modelo (str): Modelo del grafo (ver `obtener_grafo_estaciones`).
+
+        Lanza:
+            ValueError: Si el motor o el modelo no son válidos.
+        """
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de búsqueda no válido: {motor}")
+        if modelo not in MODELOS_GRAFO:
+            raise ValueError(f"Modelo de grafo no válido: {modelo}")
+        self.estaciones = estaciones if isinstance(estaciones, StationStore) else StationStore(estaciones)
+        self.umbral_km = umbral_km
+        self.modelo = modelo
+        self.grafo = obtener_grafo_estaciones(self.estaciones, umbral_km=umbral_km, modelo=modelo)
+        self.tabla = TablaRutas.para_grafo(self.grafo, ruta_tabla) if precalcular else None
+        self.motor = motor
+
+    @classmethod
+    def desde_api(cls, url=None, umbral_km=1.0, **kwargs):
+        """
+        Crea el servicio con las estaciones de la API (variable `API_TRANSMILENIO` por defecto).
+
+        Lanza:
+            ValueError: Si no se entrega `url` y no existe la variable API_TRANSMILENIO.
+        """
+        if url is None:
+            load_dotenv()  # Carga desde .env
+            url = os.getenv("API_TRANSMILENIO")
+            if not url:
+                raise ValueError("No se encontró la variable API_TRANSMILENIO en el archivo .env")
+        return cls(cargar_estaciones(url), umbral_km=umbral_km, **kwargs)
+
+    @classmethod
+    def desde_csv(cls, ruta_csv, umbral_km=1.0, **kwargs):
+        """
+        Crea el servicio a partir de un CSV exportado (columnas nombre, latitud, lon, troncal).
+        """
+        df = pd.read_csv(ruta_csv, encoding="utf-8")
+        return cls(StationStore.desde_dataframe(df), umbral_km=umbral_km, **kwargs)
+
+    @classmethod
+    def desde_snapshot(cls, ruta_snapshot, umbral_km=1.0, **kwargs):
+        """
+        Crea el servicio a partir de un snapshot binario de estaciones (ver `StationStore.guardar`).
+        """
+        return cls(StationStore.cargar(ruta_snapshot), umbral_km=umbral_km, **kwargs)
+
+    def actualizar_estaciones(self, estaciones):
+        """
+        Aplica una nueva versión de las estaciones (por ejemplo, al consultar de nuevo la API).
+
+        El grafo se ajusta solo alrededor de las estaciones que cambiaron (ver
+        `actualizar_grafo_estaciones`) y la tabla precalculada, si se usa, solo recalcula
+        las componentes afectadas. No debe llamarse mientras se atienden consultas.
+
+        Parámetros:
+            - estaciones (list | StationStore): Nueva versión de las estaciones.
+
+        Retorna:
+            CambiosEstaciones: Estaciones agregadas, eliminadas y modificadas.
+        """
+        nuevas = estaciones if isinstance(estaciones, StationStore) else StationStore(estaciones)
+        cambios = actualizar_grafo_estaciones(self.grafo, self.estaciones, nuevas)
+        self.estaciones = nuevas
+        if cambios and self.tabla is not None:
+            self.tabla.actualizar(self.grafo)
+        return cambios
+
+    def nombres_estaciones(self):
+        """
+        Retorna:
+            list: Nombres de las estaciones ordenados alfabéticamente.
+        """
+        return sorted(self.grafo.nodes)
+
+    def consultar(self, origen, destino):
+        """
+        Busca la mejor ruta entre dos estaciones o, si no existe, una ruta alternativa.
+
+        Sigue la misma lógica que la pestaña de rutas de la aplicación.
+
+        Parámetros:
+            - origen (str): Nombre de la estación de origen.
+            - destino (str): Nombre de la estación de destino.
+
+        Retorna:
+            dict: Resultado serializable a JSON con las claves `origen`, `destino`,
+            `ruta`, `distancia_km`, `transbordos` y `alternativa` (o `error` si alguna
+            estación no existe).
+        """
+        resultado = {"origen": origen, "destino": destino}
+        desconocidas = [nombre for nombre in (origen, destino) if nombre not in self.grafo]
+        if desconocidas:
+            resultado["error"] = f"Estación no encontrada: {', '.join(desconocidas)}"
+            return resultado
+
+        ruta, dist_ruta = buscar_mejor_ruta_estaciones(self.grafo, origen, destino,
+                                                       tabla=self.tabla, motor=self.motor)
+        resultado["ruta"] = ruta
+        resultado["distancia_km"] = dist_ruta
+        resultado["transbordos"] = contar_transbordos(self.grafo, ruta)
+        resultado["alternativa"] = None
+        if ruta:
+            return resultado
+
+        ruta_alt, dist_alt, dist_restante, estacion_candidata = buscar_ruta_alternativa(
+            self.grafo, self.estaciones, origen, destino, tabla=self.tabla, motor=self.motor)
+        if ruta_alt:
+            resultado["alternativa"] = {
+                "ruta": ruta_alt,
+                "distancia_km": dist_alt,
+                "transbordos": contar_transbordos(self.grafo, ruta_alt),
+                "estacion_final": estacion_candidata,
+                "distancia_restante_km": dist_restante,
+            }
+        return resultado
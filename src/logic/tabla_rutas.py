@@ -0,0 +1,288 @@
+import hashlib
+import os
+import zipfile
+
+import networkx as nx
+import numpy as np
+
+from src.logic.grafo_csr import distancias_recorridas
+from src.utils.archivos import escritura_atomica
+
+RUTA_TABLA = "resources/cache/tabla_rutas.npz"
+VERSION_FORMATO = 2
+SIN_PREDECESOR = -1
+
+
+class _Componente:
+    """
+    Distancias y predecesores de todos los pares de una componente conexa.
+
+    `recorrido` es la distancia recorrida de cada par cuando difiere del costo (modelo
+    de líneas, con transbordos penalizados), o None si es el mismo `dist`.
+    """
+
+    __slots__ = ("nombres", "indices", "dist", "pred", "firma", "recorrido")
+
+    def __init__(self, nombres, dist, pred, firma, recorrido=None):
+        self.nombres = list(nombres)
+        self.indices = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.dist = dist
+        self.pred = pred
+        self.firma = firma
+        self.recorrido = recorrido
+
+    def distancias(self):
+        """Matriz de distancias recorridas (sin penalizaciones de transbordo)."""
+        return self.dist if self.recorrido is None else self.recorrido
+
+
+class TablaRutas:
+    """
+    Tabla precalculada de rutas entre todos los pares de estaciones.
+
+    Por cada componente conexa del grafo guarda una matriz de distancias (float64) y
+    una matriz de predecesores (int32): `pred[s, t]` es la estación anterior a `t` en
+    la mejor ruta desde `s`. Así, una consulta se resuelve recorriendo los predecesores,
+    en tiempo proporcional a la longitud de la ruta y sin volver a buscar en el grafo.
+
+    Está pensada para redes pequeñas como la troncal de TransMilenio: la memoria crece
+    con el cuadrado del tamaño de cada componente.
+
+    Con el modelo de líneas (`construir_grafo_lineas`) las rutas se eligen por costo,
+    pero las distancias que se informan son las recorridas, sin las penalizaciones de
+    transbordo; para eso se guarda además una matriz de distancias recorridas.
+
+    Atributos:
+        componentes (list): Componentes conexas con sus matrices.
+    """
+
+    def __init__(self, componentes=()):
+        self.componentes = []
+        self._ubicacion = {}
+        for componente in componentes:
+            self._agregar(componente)
+
+    def _agregar(self, componente):
+        c = len(self.componentes)
+        self.componentes.append(componente)
+        for i, nombre in enumerate(componente.nombres):
+            self._ubicacion[nombre] = (c, i)
+
+    def __contains__(self, nombre):
+        return nombre in self._ubicacion
+
+    def __len__(self):
+        return len(self._ubicacion)
+
+    @classmethod
+    def construir(cls, grafo):
+        """
+        Calcula la tabla completa de un grafo.
+
+        Parámetros:
+            - grafo (networkx.Graph): Grafo de estaciones con pesos `weight`.
+
+        Retorna:
+            TablaRutas: La tabla de rutas del grafo.
+        """
+        tabla = cls()
+        tabla.actualizar(grafo)
+        return tabla
+
+    def actualizar(self, grafo):
+        """
+        Ajusta la tabla a un grafo nuevo recalculando solo las componentes que cambiaron.
+
+        Una componente se reutiliza si sus estaciones, aristas y pesos son idénticos a
+        los de alguna componente ya calculada.
+
+        Parámetros:
+            - grafo (networkx.Graph): Grafo de estaciones con pesos `weight`.
+
+        Retorna:
+            int: Número de componentes recalculadas.
+        """
+        anteriores = {componente.firma: componente for componente in self.componentes}
+        self.componentes = []
+        self._ubicacion = {}
+        recalculadas = 0
+        for nodos in nx.connected_components(grafo):
+            subgrafo = grafo.subgraph(nodos)
+            firma = _firma_componente(subgrafo)
+            componente = anteriores.get(firma)
+            if componente is None:
+                componente = _calcular_componente(subgrafo, firma)
+                recalculadas += 1
+            self._agregar(componente)
+        return recalculadas
+
+    def distancia(self, origen, destino):
+        """
+        Retorna:
+            float: Distancia recorrida por la mejor ruta, o None si no hay ruta.
+
+        Lanza:
+            networkx.NodeNotFound: Si alguna estación no está en la tabla.
+        """
+        (c_origen, i), (c_destino, j) = self._ubicar(origen), self._ubicar(destino)
+        if c_origen != c_destino:
+            return None
+        return float(self.componentes[c_origen].distancias()[i, j])
+
+    def ruta(self, origen, destino):
+        """
+        Reconstruye la mejor ruta entre dos estaciones a partir de los predecesores.
+
+        Parámetros:
+            - origen (str): Nombre de la estación de origen.
+            - destino (str): Nombre de la estación de destino.
+
+        Retorna:
+            tuple: La ruta (lista de nombres) y la distancia recorrida, o (None, None)
+            si las estaciones no están conectadas.
+
+        Lanza:
+            networkx.NodeNotFound: Si alguna estación no está en la tabla.
+        """
+        (c_origen, i), (c_destino, j) = self._ubicar(origen), self._ubicar(destino)
+        if c_origen != c_destino:
+            return None, None
+        componente = self.componentes[c_origen]
+        fila_pred = componente.pred[i]
+        camino = [j]
+        while camino[-1] != i:
+            camino.append(int(fila_pred[camino[-1]]))
+        camino.reverse()
+        return [componente.nombres[k] for k in camino], float(componente.distancias()[i, j])
+
+    def _ubicar(self, nombre):
+        try:
+            return self._ubicacion[nombre]
+        except KeyError:
+            raise nx.NodeNotFound(f"La estación {nombre} no está en la tabla de rutas")
+
+    def guardar(self, ruta_archivo=RUTA_TABLA):
+        """
+        Guarda la tabla en un archivo `.npz` (arreglos planos, sin pickle).
+
+        Parámetros:
+            - ruta_archivo (str): Ruta del archivo de destino.
+        """
+        tamanos = [len(c.nombres) for c in self.componentes]
+        inicio_nombres = np.concatenate(([0], np.cumsum(tamanos))).astype(np.int64)
+        inicio_matrices = np.concatenate(([0], np.cumsum([t * t for t in tamanos]))).astype(np.int64)
+        nombres = [nombre for c in self.componentes for nombre in c.nombres]
+        con_recorrido = [c.recorrido is not None for c in self.componentes]
+        with escritura_atomica(ruta_archivo, sufijo=".tmp.npz") as temporal:
+            np.savez(
+                temporal,
+                version=np.array(VERSION_FORMATO),
+                nombres=np.array(nombres, dtype=str),
+                firmas=np.array([c.firma for c in self.componentes], dtype=str),
+                inicio_nombres=inicio_nombres,
+                inicio_matrices=inicio_matrices,
+                dist=_concatenar([c.dist.ravel() for c in self.componentes], np.float64),
+                pred=_concatenar([c.pred.ravel() for c in self.componentes], np.int32),
+                con_recorrido=np.array(con_recorrido, dtype=bool),
+                recorrido=_concatenar([c.recorrido.ravel() for c in self.componentes if c.recorrido is not None],
+                                      np.float64),
+            )
+
+    @classmethod
+    def cargar(cls, ruta_archivo=RUTA_TABLA):
+        """
+        Carga una tabla guardada con `guardar`.
+
+        Lanza:
+            ValueError: Si el archivo tiene una versión de formato distinta.
+        """
+        with np.load(ruta_archivo, allow_pickle=False) as datos:
+            if int(datos["version"]) != VERSION_FORMATO:
+                raise ValueError(f"Versión de tabla de rutas no soportada: {int(datos['version'])}")
+            nombres = datos["nombres"].tolist()
+            firmas = datos["firmas"].tolist()
+            inicio_nombres = datos["inicio_nombres"]
+            inicio_matrices = datos["inicio_matrices"]
+            dist, pred = datos["dist"], datos["pred"]
+            con_recorrido, recorrido = datos["con_recorrido"].tolist(), datos["recorrido"]
+        componentes = []
+        k = 0  # Posición en `recorrido`, que solo tiene las componentes que lo guardan
+        for c, firma in enumerate(firmas):
+            a, b = int(inicio_nombres[c]), int(inicio_nombres[c + 1])
+            m, n = int(inicio_matrices[c]), int(inicio_matrices[c + 1])
+            tamano = b - a
+            recorrido_c = None
+            if con_recorrido[c]:
+                recorrido_c = recorrido[k:k + n - m].reshape(tamano, tamano)
+                k += n - m
+            componentes.append(_Componente(nombres[a:b], dist[m:n].reshape(tamano, tamano),
+                                           pred[m:n].reshape(tamano, tamano), firma, recorrido_c))
+        return cls(componentes)
+
+    @classmethod
+    def para_grafo(cls, grafo, ruta_archivo=RUTA_TABLA):
+        """
+        Obtiene la tabla de un grafo reutilizando la guardada en disco.
+
+        Carga la tabla persistida (si existe), recalcula solo las componentes que
+        cambiaron respecto al grafo y, si hubo cambios, la vuelve a guardar.
+
+        Parámetros:
+            - grafo (networkx.Graph): Grafo de estaciones con pesos `weight`.
+            - ruta_archivo (str, opcional): Archivo de la tabla. Si es None no se persiste.
+
+        Retorna:
+            TablaRutas: La tabla de rutas del grafo.
+        """
+        tabla = cls()
+        if ruta_archivo and os.path.exists(ruta_archivo):
+            try:
+                tabla = cls.cargar(ruta_archivo)
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+                print(f"⚠️ No se pudo leer la tabla de rutas guardada: {e}")
+        cantidad_anterior = len(tabla.componentes)
+        recalculadas = tabla.actualizar(grafo)
+        if ruta_archivo and (recalculadas or len(tabla.componentes) != cantidad_anterior):
+            try:
+                tabla.guardar(ruta_archivo)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar la tabla de rutas: {e}")
+        return tabla
+
+
+def _firma_componente(subgrafo):
+    """Huella de las estaciones, aristas y pesos de una componente."""
+    h = hashlib.sha256()
+    for nombre in sorted(subgrafo.nodes):
+        h.update(f"n\0{nombre}\0".encode("utf-8"))
+    aristas = sorted((min(u, v), max(u, v), repr(float(datos.get("weight", 1))))
+                     for u, v, datos in subgrafo.edges(data=True))
+    for u, v, peso in aristas:
+        h.update(f"e\0{u}\0{v}\0{peso}\0".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _calcular_componente(subgrafo, firma):
+    nombres = list(subgrafo.nodes)
+    indices = {nombre: i for i, nombre in enumerate(nombres)}
+    n = len(nombres)
+    dist = np.full((n, n), np.inf, dtype=np.float64)
+    pred = np.full((n, n), SIN_PREDECESOR, dtype=np.int32)
+    for i, origen in enumerate(nombres):
+        predecesores, distancias = nx.dijkstra_predecessor_and_distance(subgrafo, origen, weight="weight")
+        for nombre, d in distancias.items():
+            j = indices[nombre]
+            dist[i, j] = d
+            # El primer predecesor es el mismo que usa nx.single_source_dijkstra
+            if predecesores[nombre]:
+                pred[i, j] = indices[predecesores[nombre][0]]
+    recorrido = None
+    if subgrafo.graph.get("modelo") == "lineas":
+        nodos = subgrafo.nodes
+        recorrido = distancias_recorridas(dist, pred, [nodos[nombre]["lat"] for nombre in nombres],
+                                          [nodos[nombre]["lon"] for nombre in nombres])
+    return _Componente(nombres, dist, pred, firma, recorrido)
+
+
+def _concatenar(arreglos, dtype):
+    return np.concatenate(arreglos).astype(dtype) if arreglos else np.empty(0, dtype=dtype)
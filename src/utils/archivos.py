@@ -0,0 +1,36 @@
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def escritura_atomica(ruta_archivo, sufijo=".tmp"):
+    """
+    Ruta temporal para escribir `ruta_archivo` sin dejarlo nunca a medio escribir.
+
+    El temporal tiene un nombre único en la misma carpeta, así que dos hilos o procesos
+    que guardan el mismo archivo no se pisan. Al salir del bloque sin errores reemplaza
+    a `ruta_archivo` con `os.replace`; si hay un error, se borra y el archivo anterior
+    queda intacto.
+
+    Parámetros:
+        - ruta_archivo (str): Ruta del archivo de destino; su carpeta se crea si no existe.
+        - sufijo (str): Terminación del temporal (p. ej. ".tmp.npz", porque `np.savez`
+          agrega ".npz" si falta).
+
+    Retorna:
+        Un context manager que entrega la ruta del temporal.
+    """
+    directorio = os.path.dirname(ruta_archivo) or "."
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(prefix=f"{os.path.basename(ruta_archivo)}.", suffix=sufijo,
+                                            dir=directorio)
+    os.close(descriptor)
+    os.chmod(temporal, 0o644)  # mkstemp lo crea solo legible por el dueño
+    try:
+        yield temporal
+        os.replace(temporal, ruta_archivo)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporal)
+        raise
@@ -1,5 +1,9 @@
 import math
 
+import numpy as np
+
+R_TIERRA_KM = 6371  # Radio de la Tierra en km
+
 
 def calcular_distancia(lat1, lon1, lat2, lon2):
     """
@@ -28,10 +32,83 @@ def calcular_distancia(lat1, lon1, lat2, lon2):
     Retorna:
     float: Distancia entre los dos puntos en kilómetros.
     """
-    R = 6371  # Radio de la Tierra en km
+    R = R_TIERRA_KM
     d_lat = math.radians(lat2 - lat1)
     d_lon = math.radians(lon2 - lon1)
     a = (math.sin(d_lat / 2) ** 2 +
          math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2)
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Núcleo vectorizado del haversine sobre arreglos de NumPy (en grados)."""
+    d_lat = np.radians(lat2 - lat1)
+    d_lon = np.radians(lon2 - lon1)
+    a = (np.sin(d_lat / 2) ** 2 +
+         np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(d_lon / 2) ** 2)
+    a = np.clip(a, 0.0, 1.0)
+    return R_TIERRA_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _como_arreglo(valores):
+    return np.asarray(valores, dtype=np.float64)
+
+
+def calcular_distancias_desde(lat, lon, lats, lons):
+    """
+    Calcula la distancia de un punto a muchos otros puntos (uno a muchos).
+
+    Parámetros:
+        - lat (float): Latitud del punto de referencia.
+        - lon (float): Longitud del punto de referencia.
+        - lats (array-like): Latitudes de los puntos destino.
+        - lons (array-like): Longitudes de los puntos destino.
+
+    Retorna:
+        numpy.ndarray: Arreglo de distancias en kilómetros con la forma de `lats`.
+    """
+    return _haversine(float(lat), float(lon), _como_arreglo(lats), _como_arreglo(lons))
+
+
+def calcular_distancias_pareadas(lats1, lons1, lats2, lons2):
+    """
+    Calcula la distancia fila a fila entre dos conjuntos de puntos del mismo tamaño.
+
+    Parámetros:
+        - lats1, lons1 (array-like): Coordenadas del primer conjunto de puntos.
+        - lats2, lons2 (array-like): Coordenadas del segundo conjunto de puntos.
+
+    Retorna:
+        numpy.ndarray: Arreglo donde el elemento `k` es la distancia en kilómetros
+        entre el punto `k` del primer conjunto y el punto `k` del segundo.
+
+    Lanza:
+        ValueError: Si los conjuntos no tienen la misma forma.
+    """
+    lats1, lons1 = _como_arreglo(lats1), _como_arreglo(lons1)
+    lats2, lons2 = _como_arreglo(lats2), _como_arreglo(lons2)
+    if lats1.shape != lats2.shape or lons1.shape != lons2.shape or lats1.shape != lons1.shape:
+        raise ValueError("Los conjuntos de coordenadas deben tener la misma forma")
+    return _haversine(lats1, lons1, lats2, lons2)
+
+
+def matriz_distancias(lats1, lons1, lats2=None, lons2=None):
+    """
+    Calcula la matriz de distancias entre todos los puntos de dos conjuntos (muchos a muchos).
+
+    Parámetros:
+        - lats1, lons1 (array-like): Coordenadas de los puntos de las filas.
+        - lats2, lons2 (array-like, opcional): Coordenadas de los puntos de las columnas.
+          Si se omiten, se usa el primer conjunto (matriz simétrica).
+
+    Retorna:
+        numpy.ndarray: Matriz de forma (len(lats1), len(lats2)) con distancias en kilómetros.
+    """
+    lats1, lons1 = _como_arreglo(lats1).ravel(), _como_arreglo(lons1).ravel()
+    if lats2 is None or lons2 is None:
+        lats2, lons2 = lats1, lons1
+    else:
+        lats2, lons2 = _como_arreglo(lats2).ravel(), _como_arreglo(lons2).ravel()
+    return _haversine(lats1[:, np.newaxis], lons1[:, np.newaxis],
+                      lats2[np.newaxis, :], lons2[np.newaxis, :])
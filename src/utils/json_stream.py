@@ -0,0 +1,124 @@
+import codecs
+import json
+import re
+
+_ESPACIOS = " \t\n\r"
+_RESTO_NUMERO = re.compile(r"[.eE][0-9eE+-]*\Z")  # Fracción o exponente cortados al final del búfer
+_DECODIFICADOR = json.JSONDecoder()
+
+
+class _Lector:
+    """Búfer de texto sobre un iterador de bloques que descarta lo ya consumido."""
+
+    def __init__(self, bloques):
+        self._bloques = iter(bloques)
+        self._decodificador = codecs.getincrementaldecoder("utf-8")()
+        self.texto = ""
+        self.pos = 0
+        self.agotado = False
+
+    def leer_mas(self):
+        """Agrega el siguiente bloque al búfer. Retorna False si ya no hay más datos."""
+        if self.agotado:
+            return False
+        # Se descarta lo consumido para que la memoria no crezca con el documento
+        self.texto = self.texto[self.pos:]
+        self.pos = 0
+        for bloque in self._bloques:
+            if isinstance(bloque, bytes):
+                bloque = self._decodificador.decode(bloque)
+            if bloque:
+                self.texto += bloque
+                return True
+        self.texto += self._decodificador.decode(b"", final=True)
+        self.agotado = True
+        return False
+
+    def saltar_espacios(self):
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in _ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.texto) or not self.leer_mas():
+                return
+
+    def caracter(self):
+        """Retorna el siguiente carácter significativo sin consumirlo ('' al final)."""
+        self.saltar_espacios()
+        return self.texto[self.pos] if self.pos < len(self.texto) else ""
+
+    def esperar(self, caracteres):
+        c = self.caracter()
+        if c not in caracteres or not c:
+            raise ValueError(f"JSON inválido: se esperaba {caracteres!r} y se encontró {c!r}")
+        self.pos += 1
+        return c
+
+    def valor(self):
+        """Decodifica el siguiente valor JSON completo, leyendo más bloques si hace falta."""
+        self.saltar_espacios()
+        while True:
+            try:
+                valor, fin = _DECODIFICADOR.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if self.leer_mas():
+                    continue
+                raise
+            # Un número o literal que termina justo al final del búfer podría seguir
+            # en el próximo bloque ("12" de "123"), igual que uno seguido solo de un
+            # resto incompleto ("5." o "5e" de "5.25e1"): se lee más y se vuelve a intentar.
+            if (fin == len(self.texto) or _numero_incompleto(valor, self.texto, fin)) \
+                    and not self.agotado and self.leer_mas():
+                continue
+            self.pos = fin
+            return valor
+
+
+def _numero_incompleto(valor, texto, fin):
+    """True si tras el número decodificado solo queda, hasta el final del búfer, un posible resto suyo."""
+    return (isinstance(valor, (int, float)) and not isinstance(valor, bool)
+            and _RESTO_NUMERO.match(texto, fin) is not None)
+
+
+def iterar_arreglo_json(bloques, clave, otros=None):
+    """
+    Recorre incrementalmente los elementos de un arreglo dentro de un objeto JSON.
+
+    Solo mantiene en memoria el bloque actual y el elemento que se está decodificando,
+    de modo que documentos grandes (por ejemplo, un FeatureCollection con `clave`
+    igual a "features") se procesan con memoria acotada.
+
+    Parámetros:
+        - bloques (iterable): Bloques de texto o bytes UTF-8 del documento.
+        - clave (str): Clave de primer nivel que contiene el arreglo.
+        - otros (dict, opcional): Si se indica, recibe los demás campos de primer nivel
+          (por ejemplo, `exceededTransferLimit`). Los que siguen al arreglo solo están
+          disponibles al terminar de recorrerlo.
+
+    Retorna:
+        generator: Los elementos del arreglo, ya decodificados.
+
+    Lanza:
+        ValueError: Si el documento no es un objeto JSON válido.
+    """
+    lector = _Lector(bloques)
+    lector.esperar("{")
+    if lector.caracter() == "}":
+        return
+    while True:
+        nombre = lector.valor()
+        lector.esperar(":")
+        if nombre == clave and lector.caracter() == "[":
+            lector.esperar("[")
+            if lector.caracter() == "]":
+                lector.pos += 1
+            else:
+                while True:
+                    yield lector.valor()
+                    if lector.esperar(",]") == "]":
+                        break
+        else:
+            valor = lector.valor()  # Otros campos de primer nivel: se guardan solo si se piden
+            if otros is not None:
+                otros[nombre] = valor
+        if lector.esperar(",}") == "}":
+            return
@@ -0,0 +1,302 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+DIRECTORIO_PERFILADO = "resources/cache/perfilado"
+LIMITES_HISTOGRAMA_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+MUESTRAS_MAX = 2048  # Últimas latencias guardadas por operación, para los percentiles
+LINEAS_PERFIL = 40  # Funciones listadas en el resumen de cProfile
+LINEAS_MEMORIA = 25  # Líneas listadas en el resumen de tracemalloc
+
+_activo = False
+_detallado = False
+_lock = threading.Lock()
+_operaciones = {}
+_contadores = {}
+_perfiles = []
+_local = threading.local()
+_NULO = contextlib.nullcontext()
+
+
+class _Operacion:
+    """Latencias acumuladas de una operación medida."""
+
+    __slots__ = ("llamadas", "total_s", "maximo_s", "histograma", "muestras")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total_s = 0.0
+        self.maximo_s = 0.0
+        self.histograma = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        self.muestras = deque(maxlen=MUESTRAS_MAX)
+
+    def registrar(self, segundos):
+        self.llamadas += 1
+        self.total_s += segundos
+        self.maximo_s = max(self.maximo_s, segundos)
+        milisegundos = 1000 * segundos
+        cubeta = next((i for i, limite in enumerate(LIMITES_HISTOGRAMA_MS) if milisegundos < limite),
+                      len(LIMITES_HISTOGRAMA_MS))
+        self.histograma[cubeta] += 1
+        self.muestras.append(milisegundos)
+
+    def resumen(self):
+        ordenadas = sorted(self.muestras)
+        etiquetas = [f"<{limite}ms" for limite in LIMITES_HISTOGRAMA_MS] + [f">={LIMITES_HISTOGRAMA_MS[-1]}ms"]
+        return {
+            "llamadas": self.llamadas,
+            "total_ms": 1000 * self.total_s,
+            "media_ms": 1000 * self.total_s / self.llamadas,
+            "p50_ms": _percentil(ordenadas, 0.50),
+            "p95_ms": _percentil(ordenadas, 0.95),
+            "maximo_ms": 1000 * self.maximo_s,
+            "histograma": {e: n for e, n in zip(etiquetas, self.histograma) if n},
+        }
+
+
+def _percentil(ordenadas, fraccion):
+    return ordenadas[min(len(ordenadas) - 1, int(fraccion * len(ordenadas)))]
+
+
+def activar(detallado=False):
+    """
+    Activa la medición de las operaciones marcadas con `medir` y `seccion`.
+
+    También se activa al importar el módulo si la variable de entorno `PERFILADO`
+    vale "1" (o "detallado" para el modo detallado).
+
+    Parámetros:
+        - detallado (bool): Si es True, perfila además las llamadas medidas con cProfile
+          y sigue las asignaciones de memoria con tracemalloc (mucho más costoso).
+    """
+    global _activo, _detallado
+    if detallado and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _detallado = detallado
+    _activo = True
+
+
+def desactivar():
+    """Desactiva la medición; lo ya registrado se conserva hasta `reiniciar`."""
+    global _activo, _detallado
+    _activo = _detallado = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def activo():
+    """True si la medición está activada."""
+    return _activo
+
+
+def reiniciar():
+    """Descarta las latencias, los contadores y los perfiles registrados."""
+    with _lock:
+        _operaciones.clear()
+        _contadores.clear()
+        for perfil in _perfiles:
+            perfil.clear()
+
+
+def registrar(nombre, segundos):
+    """
+    Registra una llamada a la operación `nombre` que tardó `segundos`.
+
+    Parámetros:
+        - nombre (str): Nombre de la operación (por ejemplo, "routing.buscar_mejor_ruta_estaciones").
+        - segundos (float): Duración de la llamada.
+    """
+    with _lock:
+        operacion = _operaciones.get(nombre)
+        if operacion is None:
+            operacion = _operaciones[nombre] = _Operacion()
+        operacion.registrar(segundos)
+
+
+def contar(nombre, cantidad=1):
+    """
+    Suma `cantidad` al contador `nombre` (por ejemplo, aciertos de una caché).
+    No hace nada si la medición está desactivada.
+    """
+    if not _activo:
+        return
+    with _lock:
+        _contadores[nombre] = _contadores.get(nombre, 0) + cantidad
+
+
+def medir(nombre=None):
+    """
+    Decorador que mide cada llamada a la función cuando la medición está activada.
+
+    Mientras está desactivada, cada llamada solo agrega la comprobación de una variable
+    global, así que puede usarse en funciones que se llaman muchas veces.
+
+    Parámetros:
+        - nombre (str, opcional): Nombre de la operación. Por defecto, "<módulo>.<función>"
+          (por ejemplo, "routing.construir_grafo_estaciones").
+
+    Retorna:
+        function: Decorador de la función.
+    """
+    def decorador(funcion):
+        etiqueta = nombre or f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__qualname__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activo:
+                return funcion(*args, **kwargs)
+            with _Seccion(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def seccion(nombre):
+    """
+    Context manager que mide un bloque de código cuando la medición está activada.
+
+    Parámetros:
+        - nombre (str): Nombre de la operación.
+
+    Retorna:
+        Un context manager (uno vacío y compartido si la medición está desactivada).
+    """
+    return _Seccion(nombre) if _activo else _NULO
+
+
+class _Seccion:
+    """Mide un bloque y, en modo detallado, lo perfila si no hay otro perfil activo en el hilo."""
+
+    __slots__ = ("nombre", "inicio", "perfil")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.perfil = None
+
+    def __enter__(self):
+        if _detallado and not getattr(_local, "perfilando", False):
+            perfil = _perfil_del_hilo()
+            try:
+                perfil.enable()
+            except ValueError:  # Desde Python 3.12 solo un hilo a la vez puede usar cProfile
+                pass
+            else:
+                self.perfil = perfil
+                _local.perfilando = True
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.nombre, time.perf_counter() - self.inicio)
+        if self.perfil is not None:
+            self.perfil.disable()
+            _local.perfilando = False
+        return False
+
+
+def _perfil_del_hilo():
+    """El perfil de cProfile del hilo actual (cProfile solo ve el hilo donde se activa)."""
+    perfil = getattr(_local, "perfil", None)
+    if perfil is None:
+        perfil = _local.perfil = cProfile.Profile()
+        with _lock:
+            _perfiles.append(perfil)
+    return perfil
+
+
+def resumen():
+    """
+    Retorna las mediciones registradas hasta el momento.
+
+    Retorna:
+        dict: "operaciones" (por nombre: llamadas, total, media, p50, p95, máximo e
+              histograma, en ms) y "contadores".
+    """
+    with _lock:
+        operaciones = {nombre: op.resumen() for nombre, op in sorted(_operaciones.items())}
+        contadores = dict(sorted(_contadores.items()))
+    return {"activo": _activo, "detallado": _detallado, "operaciones": operaciones, "contadores": contadores}
+
+
+def informe():
+    """
+    Retorna las mediciones como una tabla de texto, ordenada por tiempo total.
+
+    Retorna:
+        str: Tabla con una fila por operación y los contadores al final.
+    """
+    datos = resumen()
+    if not datos["operaciones"] and not datos["contadores"]:
+        estado = "activada" if datos["activo"] else "desactivada"
+        return f"Sin mediciones (la medición está {estado})."
+    lineas = [f"{'Operación':<44}{'Llamadas':>9}{'Total ms':>11}{'Media':>9}{'p50':>9}{'p95':>9}{'Máx':>9}"]
+    for nombre, op in sorted(datos["operaciones"].items(), key=lambda par: -par[1]["total_ms"]):
+        lineas.append(f"{nombre:<44}{op['llamadas']:>9}{op['total_ms']:>11.1f}{op['media_ms']:>9.2f}"
+                      f"{op['p50_ms']:>9.2f}{op['p95_ms']:>9.2f}{op['maximo_ms']:>9.2f}")
+    if datos["contadores"]:
+        lineas.append("")
+        lineas.extend(f"{nombre:<44}{valor:>9}" for nombre, valor in datos["contadores"].items())
+    return "\n".join(lineas)
+
+
+def volcar(directorio=DIRECTORIO_PERFILADO):
+    """
+    Escribe las mediciones en disco.
+
+    Siempre se escribe `latencias.json` (ver `resumen`). En modo detallado se agregan
+    `perfil.prof` (cargable con `pstats` o snakeviz), `perfil.txt` con las funciones de
+    mayor tiempo acumulado y `memoria.txt` con las líneas que más memoria asignaron.
+
+    Parámetros:
+        - directorio (str): Carpeta de salida; se crea si no existe.
+
+    Retorna:
+        list: Rutas de los archivos escritos.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rutas = [os.path.join(directorio, "latencias.json")]
+    with open(rutas[0], "w", encoding="utf-8") as f:
+        json.dump(resumen(), f, indent=2, ensure_ascii=False)
+
+    with _lock:
+        perfiles = [perfil for perfil in _perfiles if perfil.getstats()]
+    if perfiles:
+        estadisticas = pstats.Stats(perfiles[0])
+        for perfil in perfiles[1:]:
+            estadisticas.add(perfil)
+        rutas.append(os.path.join(directorio, "perfil.prof"))
+        estadisticas.dump_stats(rutas[-1])
+        texto = io.StringIO()
+        pstats.Stats(rutas[-1], stream=texto).sort_stats("cumulative").print_stats(LINEAS_PERFIL)
+        rutas.append(os.path.join(directorio, "perfil.txt"))
+        with open(rutas[-1], "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+
+    if tracemalloc.is_tracing():
+        instantanea = tracemalloc.take_snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+        rutas.append(os.path.join(directorio, "memoria.txt"))
+        with open(rutas[-1], "w", encoding="utf-8") as f:
+            f.write(f"Memoria actual: {actual / 1e6:.1f} MB, pico: {pico / 1e6:.1f} MB\n\n")
+            for estadistica in instantanea.statistics("lineno")[:LINEAS_MEMORIA]:
+                f.write(f"{estadistica}\n")
+    return rutas
+
+
+def _configurar_desde_entorno():
+    valor = os.environ.get("PERFILADO", "").strip().lower()
+    if valor in ("1", "si", "sí", "true"):
+        activar()
+    elif valor == "detallado":
+        activar(detallado=True)
+
+
+_configurar_desde_entorno()
@@ -0,0 +1,205 @@
+import math
+
+import numpy as np
+
+from src.utils.distance import R_TIERRA_KM, calcular_distancias_desde, calcular_distancias_pareadas
+
+_HOLGURA = 1 + 1e-9  # Margen frente a errores de redondeo en los bordes de celda
+_MEDIA_CIRCUNFERENCIA_KM = math.pi * R_TIERRA_KM  # Distancia máxima entre dos puntos
+
+
+class IndiceEspacial:
+    """
+    Índice espacial de rejilla uniforme sobre latitud y longitud.
+
+    Cada punto se asigna a una celda cuyo alto y ancho (en grados) garantizan que
+    dos puntos a una distancia menor o igual a `tam_celda_km` siempre quedan en la
+    misma celda o en celdas vecinas. Así, las búsquedas por radio solo calculan el
+    haversine sobre los candidatos de la vecindad y no sobre todos los pares.
+    La rejilla no da la vuelta en el antimeridiano (longitud ±180), algo que no
+    afecta a los datos de Bogotá.
+
+    Atributos:
+        lats (numpy.ndarray): Latitudes de los puntos indexados.
+        lons (numpy.ndarray): Longitudes de los puntos indexados.
+        tam_celda_km (float): Tamaño mínimo de la celda en kilómetros.
+        alto_celda (float): Alto de la celda en grados de latitud.
+        ancho_celda (float): Ancho de la celda en grados de longitud.
+    """
+
+    def __init__(self, lats, lons, tam_celda_km):
+        """
+        Construye la rejilla a partir de las coordenadas de los puntos.
+
+        Parámetros:
+            - lats (array-like): Latitudes de los puntos.
+            - lons (array-like): Longitudes de los puntos.
+            - tam_celda_km (float): Tamaño mínimo de la celda en kilómetros.
+
+        Lanza:
+            ValueError: Si `tam_celda_km` no es positivo.
+        """
+        if tam_celda_km <= 0:
+            raise ValueError("El tamaño de celda debe ser mayor que cero")
+        self.lats = np.asarray(lats, dtype=np.float64).ravel()
+        self.lons = np.asarray(lons, dtype=np.float64).ravel()
+        self.tam_celda_km = tam_celda_km
+        self._lat_max = float(np.abs(self.lats).max()) if len(self.lats) else 0.0
+        self.alto_celda = _delta_lat_max(tam_celda_km) * _HOLGURA
+        self.ancho_celda = _delta_lon_max(tam_celda_km, self._lat_max) * _HOLGURA
+
+        # Las celdas se codifican como un entero (fila * columnas + columna) y los
+        # puntos se ordenan por celda para ubicar cada celda con una búsqueda binaria.
+        filas = np.floor(self.lats / self.alto_celda).astype(np.int64)
+        cols = np.floor(self.lons / self.ancho_celda).astype(np.int64)
+        self._fila_min = int(filas.min()) - 1 if len(filas) else 0
+        self._col_min = int(cols.min()) - 1 if len(cols) else 0
+        self._n_cols = (int(cols.max()) - self._col_min + 2) if len(cols) else 1
+        self._filas = filas - self._fila_min
+        self._n_filas = int(self._filas.max()) + 2 if len(filas) else 1
+        self._cols = cols - self._col_min
+        claves = self._filas * self._n_cols + self._cols
+        self._orden = np.argsort(claves, kind="stable")
+        self._claves_ordenadas = claves[self._orden]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _rango_celdas(self, claves):
+        """Devuelve los límites [inicio, fin) de cada celda en el orden por celda."""
+        inicio = np.searchsorted(self._claves_ordenadas, claves, side="left")
+        fin = np.searchsorted(self._claves_ordenadas, claves, side="right")
+        return inicio, fin
+
+    def pares_en_radio(self, radio_km):
+        """
+        Encuentra todos los pares de puntos separados por `radio_km` o menos.
+
+        Parámetros:
+            - radio_km (float): Distancia máxima en kilómetros. No puede superar el
+              tamaño de celda del índice.
+
+        Retorna:
+            tuple: Tres arreglos `(i, j, distancia)` con `i < j`, ordenados por `(i, j)`.
+
+        Lanza:
+            ValueError: Si `radio_km` es mayor que el tamaño de celda.
+        """
+        if radio_km > self.tam_celda_km:
+            raise ValueError("El radio no puede superar el tamaño de celda del índice")
+        n = len(self)
+        puntos = np.arange(n)
+        bloques_i, bloques_j, bloques_d = [], [], []
+        for d_fila in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                claves = (self._filas + d_fila) * self._n_cols + (self._cols + d_col)
+                inicio, fin = self._rango_celdas(claves)
+                cantidad = fin - inicio
+                total = int(cantidad.sum())
+                if total == 0:
+                    continue
+                # Expande cada rango [inicio, fin) en posiciones individuales.
+                i = np.repeat(puntos, cantidad)
+                desplazamiento = np.arange(total) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+                j = self._orden[np.repeat(inicio, cantidad) + desplazamiento]
+                mascara = j > i
+                i, j = i[mascara], j[mascara]
+                dist = calcular_distancias_pareadas(self.lats[i], self.lons[i],
+                                                    self.lats[j], self.lons[j])
+                cerca = dist <= radio_km
+                bloques_i.append(i[cerca])
+                bloques_j.append(j[cerca])
+                bloques_d.append(dist[cerca])
+        if not bloques_i:
+            vacio = np.empty(0, dtype=np.int64)
+            return vacio, vacio.copy(), np.empty(0, dtype=np.float64)
+        i = np.concatenate(bloques_i)
+        j = np.concatenate(bloques_j)
+        dist = np.concatenate(bloques_d)
+        orden = np.lexsort((j, i))
+        return i[orden], j[orden], dist[orden]
+
+    def consultar_radio(self, lat, lon, radio_km):
+        """
+        Encuentra los puntos a `radio_km` o menos de una coordenada.
+
+        Parámetros:
+            - lat (float): Latitud del punto de consulta.
+            - lon (float): Longitud del punto de consulta.
+            - radio_km (float): Distancia máxima en kilómetros.
+
+        Retorna:
+            tuple: Dos arreglos `(indices, distancias)`, ordenados por índice.
+        """
+        lat_max = max(self._lat_max, abs(lat))
+        d_lat = _delta_lat_max(radio_km) * _HOLGURA
+        d_lon = _delta_lon_max(radio_km, lat_max) * _HOLGURA
+        fila_ini = max(math.floor((lat - d_lat) / self.alto_celda) - self._fila_min, 0)
+        fila_fin = min(math.floor((lat + d_lat) / self.alto_celda) - self._fila_min, self._n_filas - 1)
+        col_ini = max(math.floor((lon - d_lon) / self.ancho_celda) - self._col_min, 0)
+        col_fin = min(math.floor((lon + d_lon) / self.ancho_celda) - self._col_min, self._n_cols - 1)
+
+        if fila_ini > fila_fin or col_ini > col_fin:
+            candidatos = np.empty(0, dtype=np.int64)
+        elif fila_fin - fila_ini + 1 > len(self):
+            # La ventana abarca más filas que puntos: es más barato revisarlos todos.
+            candidatos = np.arange(len(self))
+        else:
+            # Las celdas de una misma fila son contiguas en el orden por celda.
+            filas = np.arange(fila_ini, fila_fin + 1)
+            inicio, _ = self._rango_celdas(filas * self._n_cols + col_ini)
+            _, fin = self._rango_celdas(filas * self._n_cols + col_fin)
+            candidatos = np.sort(np.concatenate(
+                [self._orden[a:b] for a, b in zip(inicio.tolist(), fin.tolist()) if b > a]
+                or [np.empty(0, dtype=np.int64)]))
+
+        dist = calcular_distancias_desde(lat, lon, self.lats[candidatos], self.lons[candidatos])
+        cerca = dist <= radio_km
+        return candidatos[cerca], dist[cerca]
+
+    def mas_cercano(self, lat, lon):
+        """
+        Encuentra el punto más cercano a una coordenada.
+
+        Busca en radios crecientes a partir del tamaño de celda; el primer radio con
+        algún punto contiene necesariamente al más cercano. En caso de empate se
+        retorna el de menor índice.
+
+        Parámetros:
+            - lat (float): Latitud del punto de consulta.
+            - lon (float): Longitud del punto de consulta.
+
+        Retorna:
+            tuple: El índice del punto más cercano y su distancia en kilómetros,
+            o (None, None) si el índice está vacío.
+        """
+        if len(self) == 0:
+            return None, None
+        radio = self.tam_celda_km
+        while radio < _MEDIA_CIRCUNFERENCIA_KM:
+            indices, dist = self.consultar_radio(lat, lon, radio)
+            if len(indices):
+                mejor = int(np.argmin(dist))
+                return int(indices[mejor]), float(dist[mejor])
+            radio *= 2
+        dist = calcular_distancias_desde(lat, lon, self.lats, self.lons)
+        mejor = int(np.argmin(dist))
+        return mejor, float(dist[mejor])
+
+
+def _delta_lat_max(dist_km):
+    """Máxima diferencia de latitud (grados) entre dos puntos a `dist_km` o menos."""
+    return math.degrees(min(dist_km / R_TIERRA_KM, math.pi))
+
+
+def _delta_lon_max(dist_km, lat_max):
+    """
+    Máxima diferencia de longitud (grados) entre dos puntos a `dist_km` o menos
+    cuando ambos tienen |latitud| <= `lat_max`. Se deduce de la fórmula del haversine:
+    sin(Δlon/2) <= sin(d/2R) / cos(lat_max).
+    """
+    cos_lat = math.cos(math.radians(lat_max))
+    seno = math.sin(min(dist_km / (2 * R_TIERRA_KM), math.pi / 2))
+    if cos_lat <= 0 or seno >= cos_lat:
+        return 360.0
+    return math.degrees(2 * math.asin(seno / cos_lat))
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from src.logic.estaciones import StationStore
+from src.logic.routing import (
+    actualizar_grafo_estaciones,
+    buscar_mejor_ruta_estaciones,
+    construir_grafo_estaciones,
+    construir_grafo_lineas,
+    version_grafo
+)
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+CONSTRUCTORES = {"distancia": construir_grafo_estaciones, "lineas": construir_grafo_lineas}
+PRUEBAS = 15
+
+
+@pytest.fixture(scope="module")
+def estaciones():
+    return [dict(est) for est in StationStore.cargar(RUTA_SNAPSHOT)]
+
+
+def _aristas(grafo):
+    return {frozenset((u, v)): round(peso, 9) for u, v, peso in grafo.edges(data="weight")}
+
+
+def _nodos(grafo):
+    return dict(grafo.nodes(data=True))
+
+
+def _variar(estaciones, aleatorio, agregar=0, eliminar=0, mover=0):
+    """Copia de las estaciones con algunas agregadas, eliminadas y movidas (o cambiadas de troncal)."""
+    nuevas = [dict(est) for est in estaciones]
+    for _ in range(eliminar):
+        nuevas.pop(aleatorio.randrange(len(nuevas)))
+    for est in aleatorio.sample(nuevas, mover):
+        est["latitud"] += aleatorio.uniform(-0.01, 0.01)
+        est["lon"] += aleatorio.uniform(-0.01, 0.01)
+        if aleatorio.random() < 0.3:
+            est["troncal"] = aleatorio.choice(nuevas)["troncal"]
+    for i in range(agregar):
+        cerca = aleatorio.choice(nuevas)
+        nuevas.append({"nombre": f"Nueva {i}", "latitud": cerca["latitud"] + aleatorio.uniform(-0.005, 0.005),
+                       "lon": cerca["lon"] + aleatorio.uniform(-0.005, 0.005),
+                       "troncal": aleatorio.choice(nuevas)["troncal"]})
+    return nuevas
+
+
+@pytest.mark.parametrize("modelo", CONSTRUCTORES)
+@pytest.mark.parametrize("cambio", [{"agregar": 3}, {"eliminar": 3}, {"mover": 3},
+                                    {"agregar": 2, "eliminar": 2, "mover": 2}])
+def test_actualizar_da_el_mismo_grafo_que_reconstruirlo(estaciones, modelo, cambio):
+    construir = CONSTRUCTORES[modelo]
+    aleatorio = random.Random(f"{modelo}{sorted(cambio.items())}")
+    for _ in range(PRUEBAS):
+        grafo = construir(estaciones)
+        nuevas = _variar(estaciones, aleatorio, **cambio)
+
+        cambios = actualizar_grafo_estaciones(grafo, estaciones, nuevas)
+
+        assert cambios
+        reconstruido = construir(nuevas)
+        assert _nodos(grafo) == _nodos(reconstruido)
+        assert _aristas(grafo) == _aristas(reconstruido)
+
+
+@pytest.mark.parametrize("modelo", CONSTRUCTORES)
+def test_actualizar_cambia_la_version_y_descarta_las_rutas(estaciones, modelo):
+    grafo = CONSTRUCTORES[modelo](estaciones)
+    origen, destino = estaciones[0]["nombre"], estaciones[-1]["nombre"]
+    buscar_mejor_ruta_estaciones(grafo, origen, destino)
+    version = version_grafo(grafo)
+
+    assert not actualizar_grafo_estaciones(grafo, estaciones, [dict(est) for est in estaciones])
+    assert version_grafo(grafo) == version
+
+    nuevas = _variar(estaciones, random.Random(5), mover=5)
+    actualizar_grafo_estaciones(grafo, estaciones, nuevas)
+
+    assert version_grafo(grafo) != version
+    esperado = buscar_mejor_ruta_estaciones(CONSTRUCTORES[modelo](nuevas), origen, destino, usar_cache=False)
+    assert buscar_mejor_ruta_estaciones(grafo, origen, destino) == esperado
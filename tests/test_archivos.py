@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+
+import pytest
+
+from src.utils.archivos import escritura_atomica
+
+
+def test_reemplaza_el_archivo_al_terminar(tmp_path):
+    ruta = tmp_path / "sub" / "datos.json"
+    with escritura_atomica(str(ruta)) as temporal:
+        assert os.path.dirname(temporal) == str(ruta.parent)
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write("nuevo")
+    assert ruta.read_text(encoding="utf-8") == "nuevo"
+    assert os.listdir(ruta.parent) == ["datos.json"]
+
+
+def test_un_error_deja_intacto_el_archivo_anterior(tmp_path):
+    ruta = tmp_path / "datos.json"
+    ruta.write_text("anterior", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with escritura_atomica(str(ruta)) as temporal:
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.write("a medias")
+            raise RuntimeError("interrumpido")
+    assert ruta.read_text(encoding="utf-8") == "anterior"
+    assert os.listdir(tmp_path) == ["datos.json"]
+
+
+def test_hilos_que_guardan_el_mismo_archivo_no_se_pisan(tmp_path):
+    ruta = str(tmp_path / "datos.json")
+    barrera = threading.Barrier(8)
+    temporales = []
+
+    def guardar(numero):
+        with escritura_atomica(ruta) as temporal:
+            temporales.append(temporal)
+            barrera.wait()  # Todos los temporales existen a la vez
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump({"hilo": numero, "relleno": "x" * 100_000}, f)
+
+    hilos = [threading.Thread(target=guardar, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(set(temporales)) == 8
+    with open(ruta, encoding="utf-8") as f:
+        assert json.load(f)["hilo"] in range(8)
+    assert os.listdir(tmp_path) == ["datos.json"]
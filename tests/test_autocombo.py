@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from src.gui.autocombo import IndiceBusqueda, normalizar_texto
+from src.logic.estaciones import StationStore
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture(scope="module")
+def nombres():
+    return sorted(StationStore.cargar(RUTA_SNAPSHOT).nombres, key=str.lower)
+
+
+def _filtro_simple(nombres, consulta):
+    consulta = normalizar_texto(consulta.strip())
+    return [nombre for nombre in nombres if consulta in normalizar_texto(nombre)]
+
+
+def test_escribir_letra_por_letra_igual_al_filtro_simple(nombres):
+    indice = IndiceBusqueda(nombres)
+    for nombre in nombres:
+        for k in range(1, len(nombre) + 1):
+            assert indice.buscar(nombre[:k]) == _filtro_simple(nombres, nombre[:k])
+
+
+@pytest.mark.parametrize("consulta", ["Campín", "CAMPIN", "campin", "Ricaurte", "calle 26", "  norte ", "ñ", "Éxito"])
+def test_consultas_con_tildes_y_mayusculas(nombres, consulta):
+    indice = IndiceBusqueda(nombres)
+    assert indice.buscar(consulta) == _filtro_simple(nombres, consulta)
+    assert indice.buscar(consulta) == indice.buscar(normalizar_texto(consulta))
+
+
+def test_borrar_caracteres_no_reutiliza_los_resultados_previos(nombres):
+    indice = IndiceBusqueda(nombres)
+    for consulta in ["portal", "porta", "port", "por", "po", "p", "", "av", "a"]:
+        assert indice.buscar(consulta) == _filtro_simple(nombres, consulta)
+
+
+def test_secuencias_al_azar_de_teclas(nombres):
+    aleatorio = random.Random(12)
+    indice = IndiceBusqueda(nombres)
+    alfabeto = "aeiounrstlcp ñí"
+    texto = ""
+    for _ in range(3000):
+        opcion = aleatorio.random()
+        if opcion < 0.6:
+            texto += aleatorio.choice(alfabeto)
+        elif opcion < 0.9:
+            texto = texto[:-1]
+        elif opcion < 0.95:
+            texto = aleatorio.choice(nombres)[:aleatorio.randint(1, 6)]  # Se pega otro texto
+        else:
+            texto = ""
+        assert indice.buscar(texto) == _filtro_simple(nombres, texto), texto
+
+
+def test_limite_de_resultados(nombres):
+    indice = IndiceBusqueda(nombres)
+    assert indice.buscar("a", limite=5) == _filtro_simple(nombres, "a")[:5]
+    # El límite no recorta los resultados que se reutilizan en la siguiente consulta
+    assert indice.buscar("an") == _filtro_simple(nombres, "an")
+
+
+def test_indice_vacio():
+    assert IndiceBusqueda([]).buscar("a") == []
@@ -0,0 +1,77 @@
+import pytest
+
+from src.logic.cache_rutas import CacheRutas
+from src.logic.estaciones import StationStore
+from src.logic.routing import (
+    CACHE_RUTAS,
+    buscar_mejor_ruta_estaciones,
+    construir_grafo_estaciones,
+    nueva_version_grafo,
+    version_grafo
+)
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture(scope="module")
+def estaciones():
+    return StationStore.cargar(RUTA_SNAPSHOT)
+
+
+def _par(grafo):
+    nombres = list(grafo)
+    return nombres[0], nombres[-1]
+
+
+def test_lru_desaloja_el_menos_usado():
+    cache = CacheRutas(capacidad=2, ttl_segundos=None)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == (True, 1)
+    cache.guardar("c", 3)
+    assert cache.obtener("b") == (False, None)
+    assert cache.obtener("a") == (True, 1) and cache.obtener("c") == (True, 3)
+    assert cache.desalojos == 1
+
+
+def test_resultados_vencidos_se_tratan_como_ausentes():
+    cache = CacheRutas(ttl_segundos=0)
+    cache.guardar("a", 1)
+    assert cache.obtener("a") == (False, None)
+    assert cache.vencidos == 1 and len(cache) == 0
+
+
+def test_descartar_solo_quita_las_claves_indicadas():
+    cache = CacheRutas()
+    for version in (1, 2):
+        for destino in "xyz":
+            cache.guardar(("ruta", version, "o", destino), version)
+    assert cache.descartar(lambda clave: clave[1] == 1) == 3
+    assert len(cache) == 3
+    assert cache.obtener(("ruta", 2, "o", "x")) == (True, 2)
+
+
+def test_grafo_nuevo_no_vacia_los_resultados_de_otro(estaciones):
+    grafo = construir_grafo_estaciones(estaciones)
+    origen, destino = _par(grafo)
+    esperado = buscar_mejor_ruta_estaciones(grafo, origen, destino)
+
+    construir_grafo_estaciones(estaciones, umbral_km=2.0)  # Otro grafo (otra versión)
+
+    aciertos = CACHE_RUTAS.aciertos
+    assert buscar_mejor_ruta_estaciones(grafo, origen, destino) == esperado
+    assert CACHE_RUTAS.aciertos == aciertos + 1
+
+
+def test_grafo_modificado_descarta_sus_resultados_anteriores(estaciones):
+    grafo = construir_grafo_estaciones(estaciones)
+    origen, destino = _par(grafo)
+    ruta, _ = buscar_mejor_ruta_estaciones(grafo, origen, destino)
+    anterior = version_grafo(grafo)
+    assert ruta and len(ruta) > 2
+
+    grafo.add_edge(origen, destino, weight=0.001)  # Atajo directo
+    nueva_version_grafo(grafo)
+
+    assert not any(clave[1] == anterior for clave in CACHE_RUTAS._datos)
+    assert buscar_mejor_ruta_estaciones(grafo, origen, destino) == ([origen, destino], 0.001)
@@ -0,0 +1,158 @@
+import json
+
+import pytest
+import requests
+
+from benchmarks.stub_arcgis import MAX_RECORD_COUNT, ServidorStub, generar_features
+from src.logic import data
+
+
+def _nombres(estaciones):
+    return [est["nombre"] for est in estaciones]
+
+
+def _nombres_esperados(features):
+    return [feature["properties"]["nombre_estacion"] for feature in features]
+
+
+@pytest.fixture(scope="module")
+def features():
+    return generar_features(2500)
+
+
+@pytest.mark.parametrize("tam_pagina", [1000, 2500, MAX_RECORD_COUNT + 1000])
+def test_paginacion_recorre_toda_la_capa(features, tam_pagina):
+    with ServidorStub(features) as stub:
+        estaciones = list(data.iterar_estaciones_paginadas(stub.url, tam_pagina))
+
+    # Con tam_pagina > MAX_RECORD_COUNT el servidor recorta las páginas y lo indica
+    # con exceededTransferLimit: la paginación debe continuar igual.
+    assert _nombres(estaciones) == _nombres_esperados(features)
+
+
+def test_paginacion_termina_con_pagina_vacia_si_la_capa_es_multiplo(features):
+    with ServidorStub(features[:2000]) as stub:
+        estaciones = list(data.iterar_estaciones_paginadas(stub.url, 1000))
+        assert stub.peticiones == 3
+    assert len(estaciones) == 2000
+
+
+def test_descarga_paralela_igual_a_la_secuencial(features):
+    with ServidorStub(features, latencia_s=0.01) as stub:
+        paralelo = data.descargar_estaciones_paralelo(stub.url, 700, max_concurrencia=3, sesion=data.crear_sesion())
+        secuencial = list(data.iterar_estaciones_paginadas(stub.url, 700))
+    assert paralelo == secuencial
+    assert _nombres(paralelo) == _nombres_esperados(features)
+
+
+def test_descarga_paralela_rechaza_paginas_recortadas(features):
+    with ServidorStub(features) as stub:
+        with pytest.raises(ValueError, match="maxRecordCount"):
+            data.descargar_estaciones_paralelo(stub.url, MAX_RECORD_COUNT + 1, sesion=data.crear_sesion())
+
+
+
+SIN_PAGINACION = [(1000, "resultRecordCount"), (MAX_RECORD_COUNT, "resultOffset"),
+                  (MAX_RECORD_COUNT + 500, "resultOffset")]
+
+
+@pytest.mark.parametrize("tam_pagina, parametro", SIN_PAGINACION)
+def test_paginacion_se_detiene_si_el_servidor_la_ignora(features, tam_pagina, parametro):
+    with ServidorStub(features, ignorar_paginacion=True) as stub:
+        with pytest.raises(ValueError, match=parametro):
+            list(data.iterar_estaciones_paginadas(stub.url, tam_pagina))
+        assert stub.peticiones <= 2
+
+
+@pytest.mark.parametrize("tam_pagina, parametro", SIN_PAGINACION)
+def test_descarga_paralela_se_detiene_si_el_servidor_ignora_la_paginacion(features, tam_pagina, parametro):
+    with ServidorStub(features, ignorar_paginacion=True) as stub:
+        # Con páginas más grandes que maxRecordCount el recorte se detecta primero
+        with pytest.raises(ValueError, match=parametro if tam_pagina <= MAX_RECORD_COUNT else "maxRecordCount"):
+            data.descargar_estaciones_paralelo(stub.url, tam_pagina, max_concurrencia=3, sesion=data.crear_sesion())
+
+
+def test_capa_de_una_pagina_no_necesita_paginacion(features):
+    with ServidorStub(features[:50], ignorar_paginacion=True) as stub:
+        secuencial = list(data.iterar_estaciones_paginadas(stub.url, 1000))
+        paralelo = data.descargar_estaciones_paralelo(stub.url, 1000, sesion=data.crear_sesion())
+    assert _nombres(secuencial) == _nombres(paralelo) == _nombres_esperados(features[:50])
+
+def test_reintenta_los_errores_5xx(features):
+    with ServidorStub(features, fallos_por_pagina=2) as stub:
+        sesion = data.crear_sesion(reintentos=3, factor_espera=0.01)
+        estaciones = data.descargar_estaciones_paralelo(stub.url, 1000, sesion=sesion)
+    assert _nombres(estaciones) == _nombres_esperados(features)
+
+
+def test_falla_al_agotar_los_reintentos(features):
+    with ServidorStub(features, fallos_por_pagina=5) as stub:
+        sesion = data.crear_sesion(reintentos=2, factor_espera=0.01)
+        with pytest.raises(requests.RequestException):
+            data.descargar_estaciones_paralelo(stub.url, 1000, sesion=sesion)
+
+
+def test_cache_vigente_no_usa_la_red(features, tmp_path):
+    with ServidorStub(features[:50]) as stub:
+        primera = data.cargar_estaciones_api(stub.url, ttl_segundos=60, directorio_cache=str(tmp_path))
+        peticiones = stub.peticiones
+        segunda = data.cargar_estaciones_api(stub.url, ttl_segundos=60, directorio_cache=str(tmp_path))
+        assert stub.peticiones == peticiones
+    assert segunda == primera
+    assert _nombres(primera) == _nombres_esperados(features[:50])
+
+
+def test_cache_vencida_vuelve_a_descargar(features, tmp_path):
+    with ServidorStub(features[:50]) as stub:
+        data.cargar_estaciones_api(stub.url, ttl_segundos=0, directorio_cache=str(tmp_path))
+        peticiones = stub.peticiones
+        estaciones = data.cargar_estaciones_api(stub.url, ttl_segundos=0, directorio_cache=str(tmp_path))
+        assert stub.peticiones > peticiones
+    assert len(estaciones) == 50
+
+
+def test_cache_vencida_sin_red_usa_la_ultima_copia(features, tmp_path, monkeypatch):
+    with ServidorStub(features[:50]) as stub:
+        url = stub.url
+        esperadas = data.cargar_estaciones_api(url, ttl_segundos=0, directorio_cache=str(tmp_path))
+
+    # Servidor apagado; sin reintentos para no esperar la espera exponencial
+    monkeypatch.setattr(data, "_sesion", data.crear_sesion(reintentos=0))
+    estaciones = data.cargar_estaciones_api(url, ttl_segundos=0, directorio_cache=str(tmp_path))
+    assert estaciones == esperadas
+
+
+def test_snapshot_vigente_se_carga_sin_red(features, tmp_path):
+    with ServidorStub(features[:50]) as stub:
+        primera = data.cargar_estaciones(stub.url, ttl_segundos=60, directorio_cache=str(tmp_path))
+        peticiones = stub.peticiones
+        segunda = data.cargar_estaciones(stub.url, ttl_segundos=60, directorio_cache=str(tmp_path))
+        assert stub.peticiones == peticiones
+    assert list(segunda.nombres) == list(primera.nombres) == _nombres_esperados(features[:50])
+
+
+def test_pagina_malformada_interrumpe_la_paginacion(features):
+    with ServidorStub(features, pagina_malformada=1000) as stub:
+        recibidas = []
+        with pytest.raises(ValueError):
+            for estacion in data.iterar_estaciones_paginadas(stub.url, 1000):
+                recibidas.append(estacion)
+    # La primera página llega completa; de la rota solo lo que alcanzó a decodificarse
+    assert _nombres(recibidas[:1000]) == _nombres_esperados(features[:1000])
+    assert len(recibidas) < 2000
+
+
+def test_pagina_malformada_hace_fallar_la_descarga_paralela(features):
+    with ServidorStub(features, pagina_malformada=2000) as stub:
+        with pytest.raises(ValueError):
+            data.descargar_estaciones_paralelo(stub.url, 1000, sesion=data.crear_sesion())
+
+
+def test_iterar_estaciones_de_archivo_byte_a_byte(features, tmp_path):
+    ruta = tmp_path / "estaciones.geojson"
+    ruta.write_text(json.dumps({"type": "FeatureCollection", "features": features[:30]}, ensure_ascii=False),
+                    encoding="utf-8")
+    with open(ruta, "rb") as archivo:
+        estaciones = list(data.iterar_estaciones(archivo, tam_bloque=1))
+    assert estaciones == list(data.iterar_estaciones(str(ruta)))
+    assert _nombres(estaciones) == _nombres_esperados(features[:30])
@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.utils.distance import (
+    R_TIERRA_KM,
+    calcular_distancia,
+    calcular_distancias_desde,
+    calcular_distancias_pareadas,
+    matriz_distancias
+)
+
+MEDIA_CIRCUNFERENCIA_KM = math.pi * R_TIERRA_KM
+
+
+@pytest.fixture(scope="module")
+def puntos():
+    aleatorio = np.random.default_rng(3)
+    lats = aleatorio.uniform(-90, 90, 200)
+    lons = aleatorio.uniform(-180, 180, 200)
+    # Casos límite: puntos repetidos, antípodas, polos y cruce del antimeridiano
+    lats = np.concatenate([lats, [4.6, 4.6, 0.0, 0.0, 45.0, -45.0, 90.0, -90.0, 10.0, 10.0]])
+    lons = np.concatenate([lons, [-74.1, -74.1, 0.0, 180.0, 10.0, -170.0, 0.0, 0.0, 179.9, -179.9]])
+    return lats, lons
+
+
+def _escalar(lat1, lon1, lat2, lon2):
+    return np.array([calcular_distancia(*args) for args in zip(lat1, lon1, lat2, lon2)])
+
+
+def test_distancias_pareadas_igual_al_escalar(puntos):
+    lats, lons = puntos
+    lats2, lons2 = lats[::-1], lons[::-1]
+    np.testing.assert_allclose(calcular_distancias_pareadas(lats, lons, lats2, lons2),
+                               _escalar(lats, lons, lats2, lons2), rtol=1e-9, atol=1e-9)
+
+
+def test_distancias_desde_igual_al_escalar(puntos):
+    lats, lons = puntos
+    for lat, lon in zip(lats[-10:], lons[-10:]):
+        esperadas = _escalar([lat] * len(lats), [lon] * len(lats), lats, lons)
+        np.testing.assert_allclose(calcular_distancias_desde(lat, lon, lats, lons), esperadas,
+                                   rtol=1e-9, atol=1e-9)
+
+
+def test_matriz_igual_al_escalar(puntos):
+    lats, lons = puntos[0][-60:], puntos[1][-60:]
+    matriz = matriz_distancias(lats, lons)
+    filas, columnas = np.meshgrid(np.arange(len(lats)), np.arange(len(lats)), indexing="ij")
+    esperadas = _escalar(lats[filas.ravel()], lons[filas.ravel()], lats[columnas.ravel()], lons[columnas.ravel()])
+    np.testing.assert_allclose(matriz, esperadas.reshape(matriz.shape), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(matriz, matriz.T, rtol=1e-12, atol=1e-12)
+    assert matriz.shape == (60, 60)
+
+
+def test_matriz_entre_dos_conjuntos(puntos):
+    lats, lons = puntos
+    matriz = matriz_distancias(lats[:5], lons[:5], lats[5:12], lons[5:12])
+    assert matriz.shape == (5, 7)
+    assert matriz[2, 3] == pytest.approx(calcular_distancia(lats[2], lons[2], lats[8], lons[8]), rel=1e-9)
+
+
+def test_puntos_iguales_y_antipodas():
+    # Con errores de redondeo `a` puede quedar fuera de [0, 1]; el recorte evita NaN
+    lats = np.array([4.6, 0.0, 45.0, 90.0, -33.3, -20.7, -2.5, 69.3])  # Las tres últimas dan a > 1
+    lons = np.array([-74.1, 0.0, 10.0, 0.0, 151.2, -37.5, 54.3, -125.6])
+    antipodas_lats, antipodas_lons = -lats, np.where(lons > 0, lons - 180, lons + 180)
+
+    np.testing.assert_array_equal(calcular_distancias_pareadas(lats, lons, lats, lons), 0.0)
+    antipodas = calcular_distancias_pareadas(lats, lons, antipodas_lats, antipodas_lons)
+    assert not np.isnan(antipodas).any()
+    # Cerca de las antípodas el haversine pierde precisión: la tolerancia es de ~1 m
+    np.testing.assert_allclose(antipodas, MEDIA_CIRCUNFERENCIA_KM, rtol=1e-7)
+    assert (matriz_distancias(lats, lons).diagonal() == 0).all()
+
+
+def test_pareadas_rechaza_formas_distintas():
+    with pytest.raises(ValueError):
+        calcular_distancias_pareadas([1, 2], [1, 2], [1], [1])
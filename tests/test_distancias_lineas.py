@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from src.logic.estaciones import StationStore
+from src.logic.matriz_od import resolver_matriz_od
+from src.logic.routing import buscar_mejor_ruta_estaciones, construir_grafo_estaciones, construir_grafo_lineas
+from src.logic.tabla_rutas import TablaRutas
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture(scope="module", params=["distancia", "lineas"])
+def grafo(request):
+    estaciones = StationStore.cargar(RUTA_SNAPSHOT)
+    if request.param == "lineas":
+        return construir_grafo_lineas(estaciones)
+    return construir_grafo_estaciones(estaciones)
+
+
+@pytest.fixture(scope="module")
+def esperadas(grafo):
+    """Ruta y distancia de cada par según la búsqueda directa (distancia recorrida)."""
+    return {(o, d): buscar_mejor_ruta_estaciones(grafo, o, d, usar_cache=False) for o in grafo for d in grafo}
+
+
+def _igual(distancia, esperada):
+    if esperada is None:
+        return distancia is None
+    return distancia is not None and math.isclose(distancia, esperada, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_tabla_informa_la_distancia_recorrida(grafo, esperadas, tmp_path):
+    tabla = TablaRutas.construir(grafo)
+    ruta_archivo = str(tmp_path / "tabla.npz")
+    tabla.guardar(ruta_archivo)
+    for consultada in (tabla, TablaRutas.cargar(ruta_archivo)):
+        for (o, d), (ruta, distancia) in esperadas.items():
+            assert _igual(consultada.distancia(o, d), distancia), (o, d)
+            ruta_tabla, distancia_tabla = consultada.ruta(o, d)
+            assert ruta_tabla == ruta and _igual(distancia_tabla, distancia), (o, d)
+
+
+def test_tabla_guardada_se_reutiliza_con_el_mismo_grafo(grafo, tmp_path):
+    ruta_archivo = str(tmp_path / "tabla.npz")
+    TablaRutas.para_grafo(grafo, ruta_archivo)
+    tabla = TablaRutas.cargar(ruta_archivo)
+    assert tabla.actualizar(grafo) == 0
+
+
+def test_matriz_od_informa_la_distancia_recorrida(grafo, esperadas, tmp_path):
+    matriz = resolver_matriz_od(grafo, str(tmp_path / "od"), con_rutas=True, procesos=1)
+    for (o, d), (ruta, distancia) in esperadas.items():
+        assert _igual(matriz.distancia(o, d), distancia), (o, d)
+        ruta_matriz, _ = matriz.ruta(o, d)
+        assert ruta_matriz == ruta, (o, d)
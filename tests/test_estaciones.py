@@ -0,0 +1,124 @@
+import struct
+
+import numpy as np
+import pytest
+
+from src.logic.estaciones import VERSION_SNAPSHOT, StationStore, a_dataframe
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+GRADOS_POR_KM = 1 / 111.32
+
+
+@pytest.fixture(scope="module")
+def estaciones():
+    return [dict(est) for est in StationStore.cargar(RUTA_SNAPSHOT)]
+
+
+@pytest.fixture
+def almacen(estaciones):
+    return StationStore(estaciones)
+
+
+def test_guardar_y_cargar_conserva_las_estaciones(almacen, estaciones, tmp_path):
+    ruta = str(tmp_path / "estaciones.snap")
+    almacen.guardar(ruta)
+
+    cargado = StationStore.cargar(ruta)
+
+    assert [dict(est) for est in cargado] == estaciones
+    assert cargado.troncales == almacen.troncales
+    assert any(not nombre.isascii() for nombre in cargado.nombres)  # Tildes en UTF-8
+    assert not cargado.latitudes.flags.writeable  # Vista sobre el archivo mapeado
+
+
+def test_guardar_y_cargar_un_almacen_vacio(tmp_path):
+    ruta = str(tmp_path / "vacio.snap")
+    StationStore().guardar(ruta)
+    assert len(StationStore.cargar(ruta)) == 0
+
+
+def _reescribir_encabezado(ruta, **campos):
+    contenido = bytearray(open(ruta, "rb").read())
+    firma, version = struct.unpack_from("<8sI", contenido)
+    struct.pack_into("<8sI", contenido, 0, campos.get("firma", firma), campos.get("version", version))
+    open(ruta, "wb").write(bytes(contenido))
+
+
+@pytest.mark.parametrize("campos, mensaje", [
+    ({"firma": b"ESTACIOM"}, "no es un snapshot"),
+    ({"version": VERSION_SNAPSHOT + 1}, "no soportada"),
+])
+def test_encabezado_incorrecto_se_rechaza(almacen, tmp_path, campos, mensaje):
+    ruta = str(tmp_path / "estaciones.snap")
+    almacen.guardar(ruta)
+    _reescribir_encabezado(ruta, **campos)
+
+    with pytest.raises(ValueError, match=mensaje):
+        StationStore.cargar(ruta)
+
+
+@pytest.mark.parametrize("tamano", [0, 10, 64, 1000])
+def test_snapshot_truncado_se_rechaza(almacen, tmp_path, tamano):
+    ruta = tmp_path / "estaciones.snap"
+    almacen.guardar(str(ruta))
+    ruta.write_bytes(ruta.read_bytes()[:tamano])
+
+    with pytest.raises(ValueError, match="truncado|no es un snapshot"):
+        StationStore.cargar(str(ruta))
+
+
+def test_buscar_por_nombre(almacen, estaciones):
+    for i, est in enumerate(estaciones):
+        assert dict(almacen.buscar(est["nombre"])) == est
+        assert almacen.posicion(est["nombre"]) == i
+        assert est["nombre"] in almacen
+    assert almacen.buscar("No existe") is None
+    assert almacen.posicion("No existe") is None
+
+
+def test_nombre_repetido_devuelve_la_primera(estaciones):
+    repetida = dict(estaciones[0], troncal="Otra")
+    almacen = StationStore(estaciones + [repetida])
+    assert almacen.buscar(repetida["nombre"])["troncal"] == estaciones[0]["troncal"]
+
+
+def test_buscar_por_coordenadas_con_tolerancia(almacen, estaciones):
+    for est in estaciones[:20]:
+        lat, lon = est["latitud"], est["lon"]
+        assert almacen.buscar_por_coordenadas(lat, lon)["nombre"] == est["nombre"]
+        # A 5 m se encuentra; a 20 m ya no (la tolerancia es de 10 m)
+        assert almacen.buscar_por_coordenadas(lat + 0.005 * GRADOS_POR_KM, lon)["nombre"] == est["nombre"]
+        assert almacen.buscar_por_coordenadas(lat + 0.02 * GRADOS_POR_KM, lon) is None
+        assert almacen.buscar_por_coordenadas(lat + 0.02 * GRADOS_POR_KM, lon, tolerancia_km=0.05) is not None
+
+
+def test_buscar_por_coordenadas_devuelve_la_mas_cercana():
+    base = {"latitud": 4.6, "lon": -74.1, "troncal": "A"}
+    almacen = StationStore([dict(base, nombre="Lejana", latitud=4.6 + 0.008 * GRADOS_POR_KM),
+                            dict(base, nombre="Cercana", latitud=4.6 + 0.002 * GRADOS_POR_KM)])
+    assert almacen.buscar_por_coordenadas(4.6, -74.1)["nombre"] == "Cercana"
+
+
+def test_desde_dataframe_y_a_dataframe(almacen, estaciones):
+    df = a_dataframe(almacen)
+    assert list(df.columns) == ["nombre", "latitud", "lon", "troncal"]
+
+    copia = StationStore.desde_dataframe(df)
+
+    assert [dict(est) for est in copia] == estaciones
+    np.testing.assert_array_equal(copia.codigos_troncal, almacen.codigos_troncal)
+
+
+def test_desde_columnas_valida_las_longitudes():
+    with pytest.raises(ValueError):
+        StationStore.desde_columnas(["a", "b"], np.zeros(2), np.zeros(1), np.zeros(2, dtype=np.int32), ["T"])
+
+
+def test_se_comporta_como_lista_de_diccionarios(almacen, estaciones):
+    assert len(almacen) == len(estaciones)
+    assert dict(almacen[-1]) == estaciones[-1]
+    assert [dict(est) for est in almacen[:3]] == estaciones[:3]
+    assert almacen[0] == estaciones[0]
+    assert almacen[0].get("no_existe", 7) == 7
+    with pytest.raises(IndexError):
+        almacen[len(estaciones)]
@@ -0,0 +1,102 @@
+import math
+import random
+
+import networkx as nx
+import pytest
+
+from src.logic.estaciones import StationStore
+from src.logic.grafo_csr import GrafoCSR
+from src.logic.routing import (
+    METODOS_BUSQUEDA,
+    buscar_mejor_ruta_estaciones,
+    construir_grafo_estaciones,
+    construir_grafo_lineas,
+    obtener_grafo_estaciones
+)
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture(scope="module")
+def estaciones():
+    return StationStore.cargar(RUTA_SNAPSHOT)
+
+
+@pytest.fixture(scope="module", params=["distancia", "lineas"])
+def grafo(request, estaciones):
+    if request.param == "lineas":
+        return construir_grafo_lineas(estaciones)
+    return construir_grafo_estaciones(estaciones, umbral_km=1.0)
+
+
+@pytest.mark.parametrize("metodo", METODOS_BUSQUEDA)
+def test_motor_csr_encuentra_las_mismas_rutas_que_networkx(grafo, metodo):
+    nombres = list(grafo.nodes)
+    diferencias = []
+    for origen in nombres:
+        for destino in nombres:
+            ruta_nx, dist_nx = buscar_mejor_ruta_estaciones(grafo, origen, destino, metodo, motor="networkx",
+                                                            usar_cache=False)
+            ruta_csr, dist_csr = buscar_mejor_ruta_estaciones(grafo, origen, destino, metodo, motor="csr",
+                                                              usar_cache=False)
+            misma_distancia = (dist_nx is None and dist_csr is None) or (
+                dist_nx is not None and dist_csr is not None and math.isclose(dist_nx, dist_csr, abs_tol=1e-9))
+            if ruta_nx != ruta_csr or not misma_distancia:
+                diferencias.append((origen, destino))
+    assert diferencias == []
+
+
+def test_a_networkx_reproduce_el_grafo(grafo):
+    copia = GrafoCSR.desde_networkx(grafo).a_networkx()
+
+    assert list(copia.nodes(data=True)) == list(grafo.nodes(data=True))
+    for nombre in grafo:
+        # Mismo orden de vecinos: de él dependen los desempates de las búsquedas
+        assert list(copia.adj[nombre].items()) == list(grafo.adj[nombre].items())
+    assert copia.number_of_edges() == grafo.number_of_edges()
+
+
+def test_a_networkx_conserva_el_orden_de_un_grafo_editado():
+    aleatorio = random.Random(3)
+    nombres = [f"Estación {i}" for i in range(200)]
+    aleatorio.shuffle(nombres)
+    grafo = nx.Graph()
+    for nombre in nombres:
+        grafo.add_node(nombre, lat=aleatorio.random(), lon=aleatorio.random(), troncal=f"T{aleatorio.randrange(5)}")
+    for _ in range(2000):
+        grafo.add_edge(*aleatorio.sample(nombres, 2), weight=aleatorio.random())
+        if aleatorio.random() < 0.2:
+            grafo.remove_edge(*aleatorio.choice(list(grafo.edges)))
+    grafo.add_edge(nombres[0], nombres[0], weight=0.5)
+
+    copia = GrafoCSR.desde_networkx(grafo).a_networkx()
+
+    assert list(copia.nodes(data=True)) == list(grafo.nodes(data=True))
+    for nombre in grafo:
+        assert list(copia.adj[nombre].items()) == list(grafo.adj[nombre].items())
+
+
+def test_grafo_guardado_se_carga_igual(grafo, tmp_path):
+    ruta = str(tmp_path / "grafo.npz")
+    original = GrafoCSR.desde_networkx(grafo, huella="abc")
+    original.guardar(ruta)
+
+    cargado = GrafoCSR.cargar(ruta)
+
+    assert cargado.huella == "abc"
+    assert cargado.numero_aristas() == grafo.number_of_edges()
+    copia = cargado.a_networkx()
+    assert sorted(copia.edges(data="weight")) == sorted(grafo.edges(data="weight"))
+    assert dict(copia.nodes(data=True)) == dict(grafo.nodes(data=True))
+
+
+@pytest.mark.parametrize("modelo", ["distancia", "lineas"])
+def test_grafo_guardado_truncado_se_reconstruye(estaciones, tmp_path, modelo):
+    original = obtener_grafo_estaciones(estaciones, directorio_cache=str(tmp_path), modelo=modelo)
+    (ruta,) = tmp_path.glob("*.npz")
+    ruta.write_bytes(ruta.read_bytes()[:ruta.stat().st_size // 2])  # Guardado interrumpido
+
+    grafo = obtener_grafo_estaciones(estaciones, directorio_cache=str(tmp_path), modelo=modelo)
+
+    assert sorted(grafo.edges(data="weight")) == sorted(original.edges(data="weight"))
+    assert GrafoCSR.cargar(str(ruta)).numero_aristas() == original.number_of_edges()
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from benchmarks.bench_grafo_cache import estaciones_sinteticas
+from src.logic.estaciones import StationStore
+from src.logic.routing import construir_grafo_estaciones
+
+RUTA_CSV = "resources/estaciones_transmilenio.csv"
+
+
+def _aristas(grafo):
+    return {frozenset((u, v)): peso for u, v, peso in grafo.edges(data="weight")}
+
+
+def _comparar_modos(estaciones, umbral_km):
+    rejilla = construir_grafo_estaciones(estaciones, umbral_km=umbral_km, modo="rejilla")
+    referencia = construir_grafo_estaciones(estaciones, umbral_km=umbral_km, modo="referencia")
+
+    assert list(rejilla.nodes(data=True)) == list(referencia.nodes(data=True))
+    aristas_rejilla, aristas_referencia = _aristas(rejilla), _aristas(referencia)
+    assert aristas_rejilla.keys() == aristas_referencia.keys()
+    for par, peso in aristas_referencia.items():
+        assert aristas_rejilla[par] == pytest.approx(peso, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("umbral_km", [0.0, 0.5, 1.0, 2.5])
+def test_rejilla_igual_a_referencia_en_transmilenio(umbral_km):
+    registros = pd.read_csv(RUTA_CSV).to_dict("records")
+    _comparar_modos(registros, umbral_km)
+    _comparar_modos(StationStore(registros), umbral_km)
+
+
+@pytest.mark.parametrize("umbral_km", [0.3, 1.0])
+def test_rejilla_igual_a_referencia_en_red_sintetica(umbral_km):
+    _comparar_modos(estaciones_sinteticas(1500), umbral_km)
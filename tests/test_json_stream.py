@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from src.logic.data import _estaciones_de_bloques
+from src.utils.json_stream import iterar_arreglo_json
+
+DOCUMENTO = {
+    "type": "FeatureCollection",
+    "crs": {"nombre": "EPSG:4326", "números": [1.5, -2e-3, 123456789]},
+    "features": [
+        {"properties": {"nombre_estacion": "Calle 26 – Ñuñoa ✓", "latitud_estacion": 4.6,
+                        "longitud_estacion": -74.1, "troncal_estacion": " el dorado "}},
+        {"properties": {"nombre_estacion": "Estación \"Aeropuerto\" 🚍", "latitud_estacion": 4.70001,
+                        "longitud_estacion": -74.14, "troncal_estacion": "Av. Eldorado"}},
+        {"properties": {"nombre_estacion": "Perdomo", "latitud_estacion": 10,
+                        "longitud_estacion": -74, "troncal_estacion": "SOACHA"}},
+    ],
+    "properties": {"exceededTransferLimit": True},
+}
+
+
+def _bytes(documento, **opciones):
+    return json.dumps(documento, **opciones).encode("utf-8")
+
+
+def _en_bloques(datos, tam):
+    return [datos[i:i + tam] for i in range(0, len(datos), tam)]
+
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+@pytest.mark.parametrize("tam_bloque", [1, 2, 3, 5, 7, 64, 10 ** 6])
+def test_bloques_de_cualquier_tamano(tam_bloque, ensure_ascii):
+    otros = {}
+    bloques = _en_bloques(_bytes(DOCUMENTO, ensure_ascii=ensure_ascii, indent=1), tam_bloque)
+
+    assert list(iterar_arreglo_json(bloques, "features", otros)) == DOCUMENTO["features"]
+    assert otros == {k: v for k, v in DOCUMENTO.items() if k != "features"}
+
+
+def test_cortes_dentro_de_caracteres_multibyte():
+    datos = _bytes(DOCUMENTO, ensure_ascii=False)
+    # Cada corte cae dentro de un carácter de 2, 3 o 4 bytes (ñ, –, ✓, 🚍)
+    cortes = [i for i in range(1, len(datos)) if datos[i] & 0xC0 == 0x80]
+    assert cortes
+    for corte in cortes:
+        bloques = [datos[:corte], datos[corte:]]
+        assert list(iterar_arreglo_json(bloques, "features")) == DOCUMENTO["features"]
+
+
+def test_bloques_de_texto_y_vacios():
+    texto = json.dumps(DOCUMENTO, ensure_ascii=False)
+    bloques = [b""] + [c for i in range(len(texto)) for c in (texto[i], "")]
+    assert list(iterar_arreglo_json(bloques, "features")) == DOCUMENTO["features"]
+
+
+def test_numeros_partidos_entre_bloques():
+    bloques = [b'{"features": [12', b'34, 5.', b'25e', b'1, -', b'0]}']
+    assert list(iterar_arreglo_json(bloques, "features")) == [1234, 52.5, 0]
+
+
+def test_estaciones_normalizadas_byte_a_byte():
+    estaciones = list(_estaciones_de_bloques(_en_bloques(_bytes(DOCUMENTO, ensure_ascii=False), 1)))
+    assert [est["nombre"] for est in estaciones] == [
+        "Calle 26 – Ñuñoa ✓", "Estación \"Aeropuerto\" 🚍", "Perdomo"]
+    assert [est["troncal"] for est in estaciones] == ["EL DORADO", "AV. ELDORADO", "SOACHA"]
+
+
+@pytest.mark.parametrize("documento", [
+    b'{"features": []}',
+    b'{}',
+    b'{"type": "FeatureCollection"}',
+    b'{"features": {"no": "es un arreglo"}}',
+])
+def test_documentos_sin_features(documento):
+    assert list(iterar_arreglo_json(_en_bloques(documento, 1), "features")) == []
+
+
+@pytest.mark.parametrize("documento", [
+    b'',
+    b'[]',
+    b'{"features": [{"a": 1}, {"a": 2}',
+    b'{"features": [{"a": 1} {"a": 2}]}',
+    b'{"features": [{"a": 1}]',
+    b'{"features" [1]}',
+])
+def test_documentos_malformados(documento):
+    with pytest.raises(ValueError):
+        list(iterar_arreglo_json(_en_bloques(documento, 1), "features"))
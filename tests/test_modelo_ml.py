@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+from src.logic import modelo_ml
+from src.logic.estaciones import StationStore
+from src.logic.modelo_ml import generar_arbol_decision
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture
+def modelo_falso(tmp_path, monkeypatch):
+    """Modelo y snapshot propios del test, para controlar sus fechas de modificación."""
+    ruta = tmp_path / "modelo.pkl"
+    ruta.write_bytes(b"")
+    snapshot = tmp_path / "estaciones.snap"
+    shutil.copyfile(RUTA_SNAPSHOT, snapshot)
+    for archivo in (ruta, snapshot):
+        os.utime(archivo, (1, 1))
+    monkeypatch.setattr(modelo_ml, "RUTA_MODELO", str(ruta))
+    monkeypatch.setattr(modelo_ml, "RUTA_SNAPSHOT_ESTACIONES", str(snapshot))
+    return ruta
+
+
+def test_arbol_explicativo_se_dibuja_desde_el_snapshot(tmp_path, modelo_falso):
+    ruta = tmp_path / "arbol.png"
+    assert generar_arbol_decision(str(ruta)) == str(ruta)
+    assert ruta.read_bytes().startswith(b"\x89PNG")
+    assert set(os.listdir(tmp_path)) == {"arbol.png", "modelo.pkl", "estaciones.snap"}  # Sin temporales
+
+
+def test_arbol_vigente_no_se_vuelve_a_entrenar(tmp_path, modelo_falso, monkeypatch):
+    ruta = tmp_path / "arbol.png"
+    generar_arbol_decision(str(ruta))
+    antes = ruta.stat().st_mtime_ns
+
+    def sin_entrenar(variante):
+        raise AssertionError("El árbol vigente no debe volver a entrenarse")
+    monkeypatch.setattr(modelo_ml, "crear_modelo", sin_entrenar)
+
+    assert generar_arbol_decision(str(ruta)) == str(ruta)
+    assert ruta.stat().st_mtime_ns == antes
+
+
+def test_arbol_se_redibuja_si_el_modelo_es_mas_reciente(tmp_path, modelo_falso):
+    ruta = tmp_path / "arbol.png"
+    generar_arbol_decision(str(ruta))
+    os.utime(ruta, (2, 2))
+    os.utime(modelo_falso, (3, 3))  # Modelo reentrenado después de dibujar el árbol
+
+    generar_arbol_decision(str(ruta))
+
+    assert ruta.stat().st_mtime > 3
+
+
+def test_forzar_redibuja_con_las_estaciones_dadas(tmp_path, modelo_falso):
+    ruta = tmp_path / "arbol.png"
+    generar_arbol_decision(str(ruta))
+    os.utime(ruta, (2, 2))
+
+    generar_arbol_decision(str(ruta), forzar=True, estaciones=StationStore.cargar(RUTA_SNAPSHOT))
+
+    assert ruta.stat().st_mtime > 2
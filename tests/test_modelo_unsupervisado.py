@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from src.logic import modelo_unsupervisado
+from src.logic.modelo_unsupervisado import (
+    ResultadoAgrupamiento,
+    agrupar_estaciones,
+    huella_agrupamiento,
+    seleccionar_k
+)
+
+
+def _manchas(k, por_mancha=60, semilla=1):
+    """Puntos en `k` manchas compactas y bien separadas alrededor de Bogotá."""
+    aleatorio = np.random.default_rng(semilla)
+    angulos = np.linspace(0, 2 * np.pi, k, endpoint=False)
+    centros = np.column_stack([4.65 + 0.2 * np.sin(angulos), -74.1 + 0.2 * np.cos(angulos)])
+    return np.concatenate([c + aleatorio.normal(scale=0.005, size=(por_mancha, 2)) for c in centros])
+
+
+@pytest.fixture
+def ajustes(monkeypatch):
+    """Cuenta las selecciones de k y vacía la memoria de resultados del proceso."""
+    monkeypatch.setattr(modelo_unsupervisado, "_resultados", {})
+    llamadas = []
+    original = modelo_unsupervisado.seleccionar_k
+
+    def contar_llamada(*args, **kwargs):
+        llamadas.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(modelo_unsupervisado, "seleccionar_k", contar_llamada)
+    return llamadas
+
+
+@pytest.mark.parametrize("k", [3, 4, 6])
+@pytest.mark.parametrize("criterio", ["inercia", "silhouette"])
+def test_seleccionar_k_encuentra_las_manchas(k, criterio):
+    X = _manchas(k)
+    elegido, modelo, puntajes = seleccionar_k(X, criterio=criterio, hilos=2)
+    assert elegido == k
+    assert modelo.n_clusters == k and len(set(modelo.labels_)) == k
+    assert sorted(puntajes) == list(range(2, 11))
+
+
+def test_seleccionar_k_valida_sus_parametros():
+    with pytest.raises(ValueError):
+        seleccionar_k(_manchas(3), criterio="otro")
+    with pytest.raises(ValueError):
+        seleccionar_k(_manchas(1, por_mancha=2), candidatos=[2, 3])
+
+
+def test_resultado_se_guarda_y_carga(tmp_path):
+    resultado = ResultadoAgrupamiento("abc", 3, np.array([0, 1, 2, 1]), np.arange(6.0).reshape(3, 2),
+                                      "silhouette", {2: 0.5, 3: 0.75})
+    ruta = str(tmp_path / "agrupamiento.npz")
+    resultado.guardar(ruta)
+
+    cargado = ResultadoAgrupamiento.cargar(ruta)
+
+    assert (cargado.huella, cargado.k, cargado.criterio, cargado.puntajes) == ("abc", 3, "silhouette", {2: 0.5, 3: 0.75})
+    np.testing.assert_array_equal(cargado.etiquetas, resultado.etiquetas)
+    np.testing.assert_array_equal(cargado.centros, resultado.centros)
+
+
+def test_resultado_con_k_fijo_se_guarda_sin_criterio(tmp_path):
+    ruta = str(tmp_path / "agrupamiento.npz")
+    ResultadoAgrupamiento("abc", 2, np.array([0, 1]), np.zeros((2, 2))).guardar(ruta)
+    cargado = ResultadoAgrupamiento.cargar(ruta)
+    assert cargado.criterio is None and cargado.puntajes == {}
+
+
+def test_mismos_datos_se_reutilizan_en_memoria_y_en_disco(tmp_path, ajustes, monkeypatch):
+    X = _manchas(4)
+    primero = agrupar_estaciones(X, directorio_cache=str(tmp_path))
+    assert agrupar_estaciones(X.copy(), directorio_cache=str(tmp_path)) is primero  # Memoria
+    assert len(ajustes) == 1
+
+    monkeypatch.setattr(modelo_unsupervisado, "_resultados", {})  # Otro proceso: solo queda el disco
+    desde_disco = agrupar_estaciones(X, directorio_cache=str(tmp_path))
+
+    assert len(ajustes) == 1
+    assert desde_disco.huella == primero.huella == huella_agrupamiento(X)
+    np.testing.assert_array_equal(desde_disco.etiquetas, primero.etiquetas)
+
+
+def test_otras_estaciones_u_otros_parametros_no_reutilizan(tmp_path, ajustes):
+    X = _manchas(4)
+    agrupar_estaciones(X, directorio_cache=str(tmp_path))
+
+    movidas = X.copy()
+    movidas[0, 0] += 1e-6
+    agrupar_estaciones(movidas, directorio_cache=str(tmp_path))
+    agrupar_estaciones(X[1:], directorio_cache=str(tmp_path))
+    agrupar_estaciones(X, criterio="silhouette", directorio_cache=str(tmp_path))
+
+    assert len(ajustes) == 4
+    assert len(list(tmp_path.glob("agrupamiento_*.npz"))) == 4
+
+
+def test_resultado_guardado_truncado_se_recalcula(tmp_path, ajustes, monkeypatch):
+    X = _manchas(3)
+    primero = agrupar_estaciones(X, directorio_cache=str(tmp_path))
+    (ruta,) = tmp_path.glob("agrupamiento_*.npz")
+    ruta.write_bytes(ruta.read_bytes()[:ruta.stat().st_size // 2])
+    monkeypatch.setattr(modelo_unsupervisado, "_resultados", {})
+
+    resultado = agrupar_estaciones(X, directorio_cache=str(tmp_path))
+
+    assert len(ajustes) == 2
+    assert resultado.k == primero.k == 3
+    assert ResultadoAgrupamiento.cargar(str(ruta)).k == 3
@@ -0,0 +1,33 @@
+import pytest
+
+from src.logic.estaciones import StationStore
+from src.logic.routing import construir_grafo_estaciones
+from src.logic.tabla_rutas import TablaRutas
+
+RUTA_SNAPSHOT = "resources/estaciones_transmilenio.snap"
+
+
+@pytest.fixture(scope="module")
+def grafo():
+    return construir_grafo_estaciones(StationStore.cargar(RUTA_SNAPSHOT))
+
+
+def test_tabla_guardada_se_reutiliza(grafo, tmp_path):
+    ruta = str(tmp_path / "tabla.npz")
+    original = TablaRutas.para_grafo(grafo, ruta)
+    cargada = TablaRutas.para_grafo(grafo, ruta)
+
+    origen, destino = list(grafo)[0], list(grafo)[-1]
+    assert cargada.ruta(origen, destino) == original.ruta(origen, destino)
+
+
+def test_tabla_guardada_truncada_se_recalcula(grafo, tmp_path):
+    ruta = tmp_path / "tabla.npz"
+    original = TablaRutas.para_grafo(grafo, str(ruta))
+    ruta.write_bytes(ruta.read_bytes()[:ruta.stat().st_size // 2])  # Guardado interrumpido
+
+    tabla = TablaRutas.para_grafo(grafo, str(ruta))
+
+    origen, destino = list(grafo)[0], list(grafo)[-1]
+    assert tabla.ruta(origen, destino) == original.ruta(origen, destino)
+    assert len(TablaRutas.cargar(str(ruta))) == len(original)